@@ -0,0 +1,193 @@
+"""
+Benchmarks the backtester stage by stage on deterministic synthetic data
+(no network access needed).
+
+    python benchmark.py --sizes 1000,100000,1000000 --output bench.json
+    python benchmark.py --sizes 1000,100000 --baseline bench.json
+    python benchmark.py --compare bench.json new.json
+
+Each stage is timed `--repeat` times (the best and median wall times are
+reported) and run once more under tracemalloc for its peak memory. Comparing
+against a baseline flags stages that got slower or hungrier than
+`--threshold`, and the exit code is 1 if any did.
+"""
+import argparse
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+from contextlib import redirect_stdout
+from functools import partial
+from io import StringIO
+
+import numpy as np
+import pandas as pd
+from src import indicators, registry
+from src.data import DataLoader
+from src.engine import BacktestEngine
+from src.synthetic import as_yfinance, synthetic_ohlcv
+
+DEFAULT_STRATEGIES = 'sma,rsi,momentum,rf,lr'
+
+
+def _trained(name: str, train_bars: int, seed: int):
+    options = {'epochs': 1} if name == 'lstm' else {}
+    strategy = registry.create(name, **registry.supported_options(name, **options))
+    if hasattr(strategy, 'train'):
+        # Training is setup, not part of the measured stage; keep its logging out of the report
+        with redirect_stdout(StringIO()):
+            strategy.train(synthetic_ohlcv(train_bars, seed=seed + 1))
+    return strategy
+
+
+def stages(n_bars: int, strategies: list, seed: int = 0):
+    """
+    Yields (stage name, setup) pairs. setup() prepares the stage's inputs
+    (untimed) and returns the zero-argument callable to measure.
+    """
+    from src.features import FeatureEngineer
+    from src.performance import calculate_panel_metrics, calculate_rolling_metrics
+
+    df = synthetic_ohlcv(n_bars, seed=seed)
+    fe = FeatureEngineer()
+    fe32 = FeatureEngineer(dtype=np.float32)
+    with_indicators = fe.add_technical_indicators(df)
+    features = fe.build(df)
+    targets = features.targets()
+    returns = df['Close'].pct_change().dropna()
+
+    def normalize():
+        raw = as_yfinance(df)
+        return partial(DataLoader.normalize, raw)
+
+    def run_engine():
+        engine = BacktestEngine(None, registry.create('sma'))
+        return partial(engine.run_on_data, df.copy())
+
+    yield 'DataLoader.normalize', normalize
+    yield 'FeatureEngineer.add_technical_indicators', lambda: partial(fe.add_technical_indicators, df)
+    yield 'FeatureEngineer.create_lag_features', lambda: partial(fe.create_lag_features, with_indicators)
+    yield 'FeatureEngineer.build', lambda: partial(fe.build, df)
+    yield 'FeatureEngineer.build[float32]', lambda: partial(fe32.build, df)
+    yield 'FeatureEngineer.prepare_data_for_ml', lambda: partial(fe.prepare_data_for_ml, features, targets)
+    yield 'FeatureEngineer.prepare_data_for_lstm', lambda: partial(fe.prepare_data_for_lstm, features, targets, time_steps=60)
+
+    for name in strategies:
+        strategy = _trained(name, min(max(n_bars, 500), 5000), seed)
+        yield f'{name}.generate_signals', lambda strategy=strategy: partial(strategy.generate_signals, df)
+
+    yield 'BacktestEngine.run_on_data[sma]', run_engine
+    yield 'performance.calculate_panel_metrics', lambda: partial(calculate_panel_metrics, returns)
+    yield 'performance.calculate_rolling_metrics', lambda: partial(calculate_rolling_metrics, returns)
+
+
+def measure(setup, repeat: int) -> dict:
+    times = []
+    for _ in range(repeat):
+        # Memoized indicators would turn every repetition after the first into a cache hit
+        indicators.cache.clear()
+        run = setup()
+        start = time.perf_counter()
+        run()
+        times.append(time.perf_counter() - start)
+
+    indicators.cache.clear()
+    run = setup()
+    tracemalloc.start()
+    try:
+        run()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {'wall_seconds': min(times), 'wall_median_seconds': statistics.median(times), 'peak_memory_bytes': peak}
+
+
+def run_benchmarks(sizes: list, strategies: list, repeat: int = 3, seed: int = 0) -> dict:
+    results = []
+    for n_bars in sizes:
+        for stage, setup in stages(n_bars, strategies, seed):
+            row = {'stage': stage, 'bars': n_bars, **measure(setup, repeat)}
+            row['bars_per_second'] = n_bars / row['wall_seconds'] if row['wall_seconds'] > 0 else float('inf')
+            results.append(row)
+            print(f"{stage:<45} {n_bars:>10,} bars  {row['wall_seconds'] * 1000:>10.2f} ms  "
+                  f"{row['peak_memory_bytes'] / 2**20:>9.1f} MB")
+
+    return {
+        'meta': {
+            'created': pd.Timestamp.now().isoformat(),
+            'python': platform.python_version(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+            'machine': platform.platform(),
+            'repeat': repeat,
+            'seed': seed,
+        },
+        'results': results,
+    }
+
+
+def compare(baseline: dict, current: dict, threshold: float = 0.2) -> pd.DataFrame:
+    """
+    Joins two benchmark reports on (stage, bars). A stage regresses if its
+    best wall time or its peak memory grew by more than `threshold` (0.2 = 20%).
+    """
+    columns = ['stage', 'bars', 'wall_seconds', 'peak_memory_bytes']
+    table = pd.DataFrame(baseline['results'])[columns].merge(
+        pd.DataFrame(current['results'])[columns], on=['stage', 'bars'], suffixes=('_baseline', '_current'))
+    table['time_ratio'] = table['wall_seconds_current'] / table['wall_seconds_baseline']
+    table['memory_ratio'] = table['peak_memory_bytes_current'] / table['peak_memory_bytes_baseline'].replace(0, np.nan)
+    table['regression'] = (table['time_ratio'] > 1 + threshold) | (table['memory_ratio'] > 1 + threshold)
+    return table
+
+
+def print_comparison(table: pd.DataFrame, threshold: float) -> bool:
+    print("\n" + "="*40)
+    print(f"Comparison against baseline (threshold {threshold:.0%})")
+    print("="*40)
+    print(table[['stage', 'bars', 'time_ratio', 'memory_ratio', 'regression']].to_string(index=False))
+    regressions = table[table['regression']]
+    if len(regressions):
+        print(f"\n{len(regressions)} regression(s):")
+        for row in regressions.itertuples():
+            print(f"  {row.stage} @ {row.bars:,} bars: time x{row.time_ratio:.2f}, memory x{row.memory_ratio:.2f}")
+    else:
+        print("\nNo regressions.")
+    return len(regressions) > 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtester benchmarks on synthetic OHLCV data')
+    parser.add_argument('--sizes', type=str, default='1000,10000,100000,1000000', help='Comma-separated bar counts (up to 10M)')
+    parser.add_argument('--strategies', type=str, default=DEFAULT_STRATEGIES, help='Strategies whose generate_signals is timed (lstm is opt-in)')
+    parser.add_argument('--repeat', type=int, default=3, help='Timed repetitions per stage')
+    parser.add_argument('--seed', type=int, default=0, help='Seed of the synthetic data')
+    parser.add_argument('--output', type=str, default='benchmark_results.json', help='Where to write the JSON report')
+    parser.add_argument('--baseline', type=str, default=None, help='Baseline JSON report to compare the new run against')
+    parser.add_argument('--compare', type=str, nargs=2, default=None, metavar=('BASELINE', 'CURRENT'), help='Compare two saved reports without running')
+    parser.add_argument('--threshold', type=float, default=0.2, help='Relative slowdown / memory growth flagged as a regression')
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            baseline = json.load(f)
+        with open(args.compare[1]) as f:
+            current = json.load(f)
+    else:
+        sizes = [int(size) for size in args.sizes.split(',')]
+        strategies = [name.strip() for name in args.strategies.split(',') if name.strip()]
+        current = run_benchmarks(sizes, strategies, args.repeat, args.seed)
+        with open(args.output, 'w') as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBenchmark results saved to {args.output}")
+        if args.baseline is None:
+            return
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if print_comparison(compare(baseline, current, args.threshold), args.threshold):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
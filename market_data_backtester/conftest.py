@@ -0,0 +1,10 @@
+import pandas as pd
+import pytest
+
+from src.synthetic import synthetic_ohlcv
+
+
+@pytest.fixture
+def bars() -> pd.DataFrame:
+    # Two years of daily bars with enough movement to trigger entries and stops
+    return synthetic_ohlcv(504, seed=7, freq='B', volatility=0.015)
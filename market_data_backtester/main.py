@@ -1,52 +1,405 @@
+import time
+_START = time.perf_counter()
+
 import argparse
-import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from src import profiling, registry
+from src.profiling import StageProfiler
 from src.data import DataLoader
-from src.strategies import MovingAverageCrossover, RSIStrategy, MomentumStrategy
-from src.ml_strategies import MLStrategy
-from src.dl_strategies import LSTMStrategy
+from src.sources import SyntheticSource, YFinanceSource
 from src.engine import BacktestEngine
-from src.performance import calculate_cagr, calculate_win_rate
+from src.sweep import parameter_grid, random_search, run_sweep
+from src.artifacts import ArtifactStore
+from src.results import ResultStore
+from src.walkforward import WalkForward
+
+def plot_results(df, title: str, path: str):
+    # matplotlib is only imported when a plot is requested
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    plt.figure(figsize=(12, 6))
+    plt.plot(df.index, df['Cumulative_Market_Returns'], label='Market (Buy & Hold)', alpha=0.6)
+    plt.plot(df.index, df['Cumulative_Strategy_Returns'], label='Strategy', alpha=0.8)
+    plt.title(title)
+    plt.xlabel('Date')
+    plt.ylabel('Cumulative Returns')
+    plt.legend()
+    plt.grid(True)
+
+    # Save plot instead of showing it (headless environment)
+    plt.savefig(path)
+    plt.close()
+
+def parse_param_values(spec: str):
+    """
+    Parses 'name=v1,v2,...' or 'name=start:stop:step' into (name, [values]).
+    """
+    name, values = spec.split('=', 1)
+
+    def convert(value):
+        for cast in (int, float):
+            try:
+                return cast(value)
+            except ValueError:
+                pass
+        return value
+
+    if ':' in values:
+        start, stop, step = (convert(v) for v in values.split(':'))
+        if all(isinstance(v, int) for v in (start, stop, step)):
+            return name, list(range(start, stop, step))
+        return name, [float(v) for v in np.arange(start, stop, step)]
+    return name, [convert(v) for v in values.split(',')]
+
+def result_store(args):
+    return None if args.no_result_cache else ResultStore(args.results_dir)
+
+def run_parameter_sweep(args, loader: DataLoader):
+    grid = dict(parse_param_values(spec) for spec in args.param)
+    if args.n_iter > 0:
+        points = random_search(grid, args.n_iter)
+    else:
+        points = parameter_grid(grid)
+
+    strategy_factory = registry.factory(args.strategy)
+    train_df = None
+    if hasattr(strategy_factory.func, 'train'):
+        train_df = loader.load_data(args.ticker, args.train_start, args.train_end)
+    df = loader.load_data(args.ticker, args.start, args.end)
+
+    print(f"\nSweeping {len(points)} parameter sets for {args.strategy.upper()} on {args.ticker}...")
+    table = run_sweep(strategy_factory, df, points, initial_capital=args.initial_capital,
+                      train_df=train_df, n_workers=args.workers, rank_by=args.rank_by,
+                      result_store=result_store(args))
+
+    print("\n" + table.head(args.top).to_string(index=False))
+    if args.sweep_output:
+        table.to_csv(args.sweep_output, index=False)
+        print(f"\nSweep results saved to {args.sweep_output}")
+
+def run_walk_forward(args, loader: DataLoader):
+    strategy_factory = registry.factory(args.strategy)
+    if not hasattr(strategy_factory.func, 'fit_features'):
+        raise SystemExit("Walk-forward validation needs a trainable strategy (e.g. rf, lr or lstm)")
+    
+    df = loader.load_data(args.ticker, args.start, args.end)
+    walk_forward = WalkForward(strategy_factory, train_size=args.wf_train, test_size=args.wf_test,
+                               expanding=args.wf_expanding, initial_capital=args.initial_capital, n_workers=args.workers)
+    results = walk_forward.run(df, args.ticker)
+    
+    print("\n" + results['folds'].to_string(index=False))
+    print("\n" + "="*40)
+    print(f"Walk-Forward Results for {args.ticker} ({args.strategy.upper()}, {len(results['folds'])} folds)")
+    print("="*40)
+    print(f"Final Equity:      ${results['final_equity']:,.2f}")
+    print(f"Total Return:      {results['total_return_pct']:.2f}%")
+    print(f"Sharpe Ratio:      {results['sharpe_ratio']:.2f}")
+    print(f"Max Drawdown:      {results['max_drawdown']:.2%}")
+    print("="*40 + "\n")
+
+def run_out_of_core(args, loader: DataLoader, strategy):
+    from src.store import BarStore
+    if strategy.warmup is None:
+        raise SystemExit(f"{args.strategy} does not support out-of-core runs")
+    
+    store = BarStore(args.bar_store)
+    tickers = [t.strip() for t in (args.tickers or args.ticker).split(',') if t.strip()]
+    rows = []
+    engine = BacktestEngine(loader, strategy, args.initial_capital, stop_loss=args.stop_loss, take_profit=args.take_profit,
+                            trailing_stop=args.trailing_stop, position_size=args.position_size)
+    for ticker in tickers:
+        try:
+            if not store.partitions(ticker, args.interval, args.start, args.end):
+                # Nothing stored yet: fetch once through the loader and partition it
+                store.write(ticker, args.interval, loader.load_data(ticker, args.start, args.end, args.interval))
+            results = engine.run_stored(store, ticker, args.start, args.end, args.interval, args.chunk_rows)
+        except ValueError as e:
+            print(f"Skipping {ticker}: {e}")
+            continue
+        rows.append({k: v for k, v in results.items() if k != 'data'})
+    
+    if not rows:
+        raise SystemExit("No data found for any ticker")
+    
+    print("\n" + "="*40)
+    print(f"Out-of-Core Backtest Results ({args.strategy.upper()}, {args.interval} bars)")
+    print("="*40)
+    print(pd.DataFrame(rows).set_index('ticker').to_string())
+
+def run_checkpointed(args, loader: DataLoader, strategy):
+    import os
+    if strategy.warmup is None:
+        raise SystemExit(f"{args.strategy} does not support checkpointed runs")
+    
+    tickers = [t.strip() for t in (args.tickers or args.ticker).split(',') if t.strip()]
+    rows = []
+    engine = BacktestEngine(loader, strategy, args.initial_capital, stop_loss=args.stop_loss, take_profit=args.take_profit,
+                            trailing_stop=args.trailing_stop, position_size=args.position_size)
+    for ticker in tickers:
+        path = os.path.join(args.checkpoint_dir, f'{ticker}_{args.strategy}.pkl')
+        try:
+            results = engine.run_incremental(ticker, args.start, args.end, path)
+        except ValueError as e:
+            print(f"Skipping {ticker}: {e}")
+            continue
+        rows.append({k: v for k, v in results.items() if k != 'data'})
+    
+    if not rows:
+        raise SystemExit("No data found for any ticker")
+    
+    print("\n" + "="*40)
+    print(f"Incremental Backtest Results ({args.strategy.upper()}, through {args.end})")
+    print("="*40)
+    print(pd.DataFrame(rows).set_index('ticker').to_string())
+
+def run_portfolio(args, loader: DataLoader, strategy):
+    from src import portfolio
+    if not args.tickers:
+        raise SystemExit("--portfolio needs --tickers")
+    tickers = [t.strip() for t in args.tickers.split(',') if t.strip()]
+    
+    if args.weighting == 'equal':
+        allocator = portfolio.EqualWeight()
+    elif args.weighting == 'signal':
+        allocator = portfolio.SignalWeights(strategy)
+    elif args.weighting == 'inverse_vol':
+        allocator = portfolio.InverseVolatility(window=args.cov_window)
+    else:
+        allocator = portfolio.RiskParity(window=args.cov_window)
+    if args.vol_target:
+        allocator = portfolio.VolatilityTarget(allocator, args.vol_target, window=args.cov_window, max_leverage=args.max_leverage)
+    
+    rebalance = None if args.rebalance.lower() == 'none' else int(args.rebalance) if args.rebalance.isdigit() else args.rebalance
+    engine = portfolio.PortfolioEngine(loader, allocator, args.initial_capital, rebalance=rebalance,
+                                       drift_threshold=args.drift_threshold, transaction_cost=args.transaction_cost)
+    start = time.perf_counter()
+    results = engine.run(tickers, args.start, args.end)
+    metrics = results['metrics']
+    
+    print("\n" + "="*40)
+    print(f"Portfolio Results ({args.weighting}, {len(results['tickers'])} assets, {time.perf_counter() - start:.2f}s)")
+    print("="*40)
+    print(f"Initial Capital:   ${args.initial_capital:,.2f}")
+    print(f"Final Equity:      ${metrics['final_equity']:,.2f}")
+    print(f"Total Return:      {metrics['total_return_pct']:.2f}%")
+    print(f"CAGR:              {metrics['cagr']:.2%}")
+    print(f"Sharpe Ratio:      {metrics['sharpe_ratio']:.2f}")
+    print(f"Max Drawdown:      {metrics['max_drawdown']:.2%}")
+    print(f"Volatility:        {metrics['volatility']:.2%}")
+    print(f"Rebalances:        {metrics['n_rebalances']}")
+    print(f"Annual Turnover:   {metrics['annual_turnover']:.2f}")
+    print(f"Total Costs:       ${metrics['total_costs']:,.2f}")
+    print("="*40)
+    print("Final weights:")
+    print(results['weights'].iloc[-1].sort_values(ascending=False).head(args.top).to_string(float_format=lambda x: f"{x:.2%}"))
+    print(f"Cash: {results['cash'].iloc[-1]:.2%}\n")
+    
+    if args.monte_carlo:
+        run_monte_carlo(args, results['returns'])
+
+def run_monte_carlo(args, returns: pd.Series):
+    from src.montecarlo import MonteCarlo
+    monte_carlo = MonteCarlo(n_paths=args.monte_carlo, method=args.mc_method, block_size=args.mc_block,
+                             ruin_threshold=args.mc_ruin, seed=args.mc_seed)
+    start = time.perf_counter()
+    results = monte_carlo.run(returns)
+    print(f"Monte Carlo ({results['n_paths']:,} {results['method']} paths, block {results['block_size']}, "
+          f"{time.perf_counter() - start:.2f}s)")
+    print(f"{results['confidence']:.0%} confidence intervals:")
+    print(results['summary'].to_string(float_format=lambda x: f"{x:.4f}"))
+    print(f"Probability of ruin (-{args.mc_ruin:.0%}): {results['probability_of_ruin']:.2%}")
+    print("="*40 + "\n")
 
 def main():
     parser = argparse.ArgumentParser(description='Market Data Backtester')
     parser.add_argument('--ticker', type=str, default='AAPL', help='Stock ticker symbol')
     parser.add_argument('--start', type=str, default='2020-01-01', help='Start date (YYYY-MM-DD)')
     parser.add_argument('--end', type=str, default='2023-01-01', help='End date (YYYY-MM-DD)')
-    parser.add_argument('--strategy', type=str, choices=['sma', 'rsi', 'momentum', 'rf', 'lr', 'lstm'], default='sma', help='Strategy to use')
+    parser.add_argument('--strategy', type=str, choices=registry.available(), default='sma', help='Strategy to use')
     parser.add_argument('--initial_capital', type=float, default=10000.0, help='Initial capital')
     parser.add_argument('--train_start', type=str, default='2010-01-01', help='Training start date for ML/DL')
     parser.add_argument('--train_end', type=str, default='2019-12-31', help='Training end date for ML/DL')
+    parser.add_argument('--cache_dir', type=str, default='.cache/ohlcv', help='Directory for the local OHLCV cache')
+    parser.add_argument('--no_cache', action='store_true', help='Always download fresh data, bypassing the cache')
+    parser.add_argument('--offline', action='store_true', help='Read data from the cache only, without network access')
+    parser.add_argument('--source', type=str, choices=['yfinance', 'synthetic'], default='yfinance', help='Where bars are downloaded from (synthetic: deterministic fake data)')
+    parser.add_argument('--fetch_workers', type=int, default=8, help='Concurrent downloads when loading several tickers')
+    parser.add_argument('--rate_limit', type=float, default=None, help='Max download requests per second (default: the source default)')
+    parser.add_argument('--prefetch', action='store_true', help='Download --tickers for --start/--end into the cache and exit')
+    parser.add_argument('--artifact_dir', type=str, default='.cache/artifacts', help='Directory for trained model and scaler artifacts')
+    parser.add_argument('--retrain', action='store_true', help='Ignore stored artifacts and train ML/DL models from scratch')
+    parser.add_argument('--results_dir', type=str, default='.cache/results', help='Directory for stored backtest results')
+    parser.add_argument('--no_result_cache', action='store_true', help='Always rerun the backtest instead of reusing stored results')
+    parser.add_argument('--search', action='store_true', help='ML strategies: pick hyperparameters by time-series cross-validation before training')
+    parser.add_argument('--n_jobs', type=int, default=None, help='Cores for ML hyperparameter search and forest training (-1: all)')
+    parser.add_argument('--export_model', type=str, default=None, help='After training an LSTM, export its weights to this .npz file for --strategy lstm_numpy')
+    parser.add_argument('--model_path', type=str, default=None, help='Exported LSTM weights used by --strategy lstm_numpy (no TensorFlow needed)')
+    parser.add_argument('--feature_dtype', type=str, choices=['float32', 'float64'], default=None, help='Feature matrix dtype of ML/DL strategies (float32 halves its memory)')
+    parser.add_argument('--stream', action='store_true', help='Train the LSTM on streamed, prefetched batches (bounded memory)')
+    parser.add_argument('--stop_loss', type=float, default=None, help='Stop-loss as a fraction of the entry price (e.g. 0.05)')
+    parser.add_argument('--take_profit', type=float, default=None, help='Take-profit as a fraction of the entry price')
+    parser.add_argument('--trailing_stop', type=float, default=None, help='Trailing stop as a fraction of the best price since entry')
+    parser.add_argument('--position_size', type=float, default=1.0, help='Fraction of equity per unit of signal')
+    parser.add_argument('--event_driven', action='store_true', help='Feed bars to the strategy one at a time (rule-based strategies)')
+    parser.add_argument('--tickers', type=str, default=None, help='Comma-separated tickers for a panel backtest (rule-based strategies)')
+    parser.add_argument('--portfolio', action='store_true', help='Allocate capital across --tickers and rebalance instead of trading each ticker alone')
+    parser.add_argument('--weighting', type=str, choices=['equal', 'signal', 'inverse_vol', 'risk_parity'], default='signal', help='Portfolio target weights (signal: split over the assets --strategy is in)')
+    parser.add_argument('--rebalance', type=str, default='M', help="Portfolio rebalance schedule: a period ('W', 'M', 'Q'), a number of bars, or 'none'")
+    parser.add_argument('--drift_threshold', type=float, default=None, help='Also rebalance when any weight drifts this far from its target')
+    parser.add_argument('--vol_target', type=float, default=None, help='Scale portfolio weights to this annualized volatility (e.g. 0.1)')
+    parser.add_argument('--max_leverage', type=float, default=1.0, help='Gross exposure cap with --vol_target')
+    parser.add_argument('--cov_window', type=int, default=63, help='Rolling covariance window in bars (inverse_vol, risk_parity, vol_target)')
+    parser.add_argument('--transaction_cost', type=float, default=0.0, help='Portfolio trading cost as a fraction of traded value (0.001 = 10 bps)')
+    parser.add_argument('--walk_forward', action='store_true', help='Walk-forward validation of an ML/DL strategy over --start/--end')
+    parser.add_argument('--wf_train', type=int, default=756, help='Walk-forward training window in bars')
+    parser.add_argument('--wf_test', type=int, default=126, help='Walk-forward out-of-sample window in bars')
+    parser.add_argument('--wf_expanding', action='store_true', help='Use expanding instead of rolling training windows')
+    parser.add_argument('--sweep', action='store_true', help='Run a parameter sweep instead of a single backtest')
+    parser.add_argument('--param', type=str, action='append', default=[], help='Sweep values as name=v1,v2,... or name=start:stop:step (repeatable)')
+    parser.add_argument('--n_iter', type=int, default=0, help='Sample this many random points instead of the full grid')
+    parser.add_argument('--workers', type=int, default=None, help='Sweep worker processes (default: all cores)')
+    parser.add_argument('--rank_by', type=str, default='sharpe_ratio', help='Metric used to rank sweep results')
+    parser.add_argument('--top', type=int, default=20, help='Number of sweep results to print')
+    parser.add_argument('--sweep_output', type=str, default=None, help='Optional CSV path for the full sweep table')
+    parser.add_argument('--monte_carlo', type=int, default=0, help='Resample the strategy returns into this many paths and report confidence intervals')
+    parser.add_argument('--mc_method', type=str, choices=['block', 'iid', 'shuffle'], default='block', help='Monte Carlo resampling method')
+    parser.add_argument('--mc_block', type=int, default=None, help='Block length of the block bootstrap (default: n^(1/3))')
+    parser.add_argument('--mc_ruin', type=float, default=0.5, help='Loss fraction counted as ruin (0.5 = half the capital)')
+    parser.add_argument('--mc_seed', type=int, default=None, help='Seed of the Monte Carlo resampling')
+    parser.add_argument('--plot', type=str, default='backtest_result.png', help='Path of the equity curve plot')
+    parser.add_argument('--no_plot', action='store_true', help='Skip plotting (matplotlib is not imported)')
+    parser.add_argument('--bar_store', type=str, default=None, help='Run out of core over a partitioned bar store in this directory')
+    parser.add_argument('--checkpoint_dir', type=str, default=None, help='Incremental runs: continue each ticker\'s checkpointed backtest in this directory with the bars since its last run')
+    parser.add_argument('--interval', type=str, default='1m', help='Bar interval for --bar_store runs')
+    parser.add_argument('--chunk_rows', type=int, default=100_000, help='Bars held in memory at a time in --bar_store runs')
+    parser.add_argument('--profile', type=str, default=None, help='Record per-stage time/CPU/rows/memory and write the trace to this path')
+    parser.add_argument('--profile_format', type=str, choices=['json', 'chrome'], default='json', help='Trace format (chrome: chrome://tracing / Perfetto)')
+    parser.add_argument('--profile_no_memory', action='store_true', help='Skip peak memory tracking (lower profiling overhead)')
+    parser.add_argument('--serve', action='store_true', help='Run a long-lived backtest service instead of a single backtest')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Service host')
+    parser.add_argument('--port', type=int, default=8765, help='Service port')
+    parser.add_argument('--socket', type=str, default=None, help='Serve on this Unix socket instead of host:port')
+    parser.add_argument('--max_cache_mb', type=int, default=512, help='Service memory budget for frames and for features, each (MB)')
+    parser.add_argument('--max_strategies', type=int, default=32, help='Trained strategies kept warm by the service')
     
     args = parser.parse_args()
     
+    if not args.profile:
+        run(args)
+        return
+    
+    profiler = StageProfiler(memory=not args.profile_no_memory, strategy=args.strategy, ticker=args.ticker,
+                             start=args.start, end=args.end)
+    try:
+        with profiling.profile(profiler):
+            run(args)
+    finally:
+        profiler.close()
+        if args.profile_format == 'chrome':
+            profiler.write_chrome_trace(args.profile)
+        else:
+            profiler.write_json(args.profile)
+        print("\n" + profiler.summary().to_string())
+        print(f"Profile saved to {args.profile}")
+
+def make_source(args):
+    if args.source == 'synthetic':
+        return SyntheticSource(rate_limit=args.rate_limit)
+    return YFinanceSource() if args.rate_limit is None else YFinanceSource(rate_limit=args.rate_limit)
+
+def run(args):
     # 1. Initialize Data Loader
-    loader = DataLoader()
+    loader = DataLoader(cache_dir=None if args.no_cache else args.cache_dir, offline=args.offline,
+                        source=make_source(args), max_workers=args.fetch_workers)
+    
+    if args.prefetch:
+        tickers = [t.strip() for t in (args.tickers or args.ticker).split(',') if t.strip()]
+        _, failures = loader.load_many(tickers, args.start, args.end)
+        for ticker, error in failures.items():
+            print(f"  {ticker}: {error}")
+        return
+    
+    if args.serve:
+        from src.server import BacktestService, serve
+        service = BacktestService(loader, None if args.retrain else ArtifactStore(args.artifact_dir),
+                                  max_frame_bytes=args.max_cache_mb * 2**20, max_feature_bytes=args.max_cache_mb * 2**20,
+                                  max_strategies=args.max_strategies)
+        serve(service, args.host, args.port, args.socket)
+        return
+    
+    if args.sweep:
+        run_parameter_sweep(args, loader)
+        return
+    
+    if args.walk_forward:
+        run_walk_forward(args, loader)
+        return
     
     # 2. Initialize Strategy
-    if args.strategy == 'sma':
-        strategy = MovingAverageCrossover(short_window=50, long_window=200)
-    elif args.strategy == 'rsi':
-        strategy = RSIStrategy(period=14, buy_threshold=30, sell_threshold=70)
-    elif args.strategy == 'momentum':
-        strategy = MomentumStrategy(period=10)
-    elif args.strategy in ['rf', 'lr']:
-        strategy = MLStrategy(model_type=args.strategy)
-    elif args.strategy == 'lstm':
-        strategy = LSTMStrategy(epochs=5) # Reduced epochs for demo
+    # Only the chosen strategy's module (and its ML/DL backend) is imported
+    strategy_cls = registry.get_class(args.strategy)
+    artifact_store = None if args.retrain or not hasattr(strategy_cls, 'train') else ArtifactStore(args.artifact_dir)
+    strategy = registry.create(args.strategy, **registry.supported_options(args.strategy, artifact_store=artifact_store,
+                                                                           streaming=args.stream, feature_dtype=args.feature_dtype,
+                                                                           model_path=args.model_path, search=args.search,
+                                                                           n_jobs=args.n_jobs))
+    startup_time = time.perf_counter() - _START
+        
+    if args.bar_store:
+        run_out_of_core(args, loader, strategy)
+        return
+        
+    if args.checkpoint_dir:
+        run_checkpointed(args, loader, strategy)
+        return
+        
+    if args.portfolio:
+        run_portfolio(args, loader, strategy)
+        return
+        
+    # Panel mode: one vectorized backtest over all tickers
+    if args.tickers:
+        if not strategy.supports_panel:
+            raise SystemExit(f"{args.strategy} does not support panel runs")
+        if args.stop_loss or args.take_profit or args.trailing_stop:
+            raise SystemExit("Panel runs do not support --stop_loss, --take_profit or --trailing_stop")
+        tickers = [t.strip() for t in args.tickers.split(',') if t.strip()]
+        engine = BacktestEngine(loader, strategy, args.initial_capital, position_size=args.position_size)
+        results = engine.run_panel(tickers, args.start, args.end)
+        metrics = results['metrics'].sort_values('sharpe_ratio', ascending=False)
+        print("\n" + "="*40)
+        print(f"Panel Backtest Results ({args.strategy.upper()}, {len(metrics)} tickers)")
+        print("="*40)
+        print(metrics.head(args.top).to_string())
+        return
         
     # 2.5 Train Model (if ML/DL)
-    if args.strategy in ['rf', 'lr', 'lstm']:
+    if hasattr(strategy, 'train'):
         print(f"\nTraining {args.strategy.upper()} model from {args.train_start} to {args.train_end}...")
-        train_df = loader.load_data(args.ticker, args.train_start, args.train_end)
+        with profiling.stage('main.load_train_data', ticker=args.ticker) as stage:
+            train_df = loader.load_data(args.ticker, args.train_start, args.train_end)
+            stage['rows'] = len(train_df)
         strategy.train(train_df)
         print("Training complete.\n")
+        if args.export_model:
+            if not hasattr(strategy, 'export'):
+                raise SystemExit(f"{args.strategy} models cannot be exported")
+            print(f"Model exported to {strategy.export(args.export_model)}\n")
         
     # 3. Initialize Engine
-    engine = BacktestEngine(loader, strategy, args.initial_capital)
+    engine = BacktestEngine(loader, strategy, args.initial_capital, stop_loss=args.stop_loss, take_profit=args.take_profit,
+                            trailing_stop=args.trailing_stop, position_size=args.position_size,
+                            result_store=result_store(args))
     
     # 4. Run Backtest
     try:
-        results = engine.run(args.ticker, args.start, args.end)
+        if args.event_driven:
+            results = engine.run_event_driven(args.ticker, args.start, args.end)
+        else:
+            results = engine.run(args.ticker, args.start, args.end)
         
         # 5. Print Results
         print("\n" + "="*40)
@@ -55,27 +408,26 @@ def main():
         print(f"Initial Capital:   ${args.initial_capital:,.2f}")
         print(f"Final Equity:      ${results['final_equity']:,.2f}")
         print(f"Total Return:      {results['total_return_pct']:.2f}%")
-        print(f"CAGR:              {calculate_cagr(results['data']['Cumulative_Strategy_Returns']):.2%}")
-        print(f"Win Rate:          {calculate_win_rate(results['data']['Strategy_Returns']):.2%}")
+        print(f"CAGR:              {results['cagr']:.2%}")
+        print(f"Win Rate:          {results['win_rate']:.2%}")
         print(f"Sharpe Ratio:      {results['sharpe_ratio']:.2f}")
+        print(f"Sortino Ratio:     {results['sortino_ratio']:.2f}")
+        print(f"Calmar Ratio:      {results['calmar_ratio']:.2f}")
         print(f"Max Drawdown:      {results['max_drawdown']:.2%}")
+        print(f"Max DD Duration:   {results['max_drawdown_duration']} periods")
         print(f"Volatility:        {results['volatility']:.2%}")
+        print(f"Startup Time:      {startup_time:.2f}s")
+        if engine.from_store:
+            print("(served from the result store)")
         print("="*40 + "\n")
         
-        # 6. Plotting (Optional)
-        df = results['data']
-        plt.figure(figsize=(12, 6))
-        plt.plot(df.index, df['Cumulative_Market_Returns'], label='Market (Buy & Hold)', alpha=0.6)
-        plt.plot(df.index, df['Cumulative_Strategy_Returns'], label='Strategy', alpha=0.8)
-        plt.title(f'Equity Curve: {args.ticker} - {args.strategy.upper()}')
-        plt.xlabel('Date')
-        plt.ylabel('Cumulative Returns')
-        plt.legend()
-        plt.grid(True)
+        if args.monte_carlo:
+            run_monte_carlo(args, results['data']['Strategy_Returns'])
         
-        # Save plot instead of showing it (headless environment)
-        plt.savefig('backtest_result.png')
-        print("Plot saved to backtest_result.png")
+        # 6. Plotting (Optional)
+        if not args.no_plot:
+            plot_results(results['data'], f'Equity Curve: {args.ticker} - {args.strategy.upper()}', args.plot)
+            print(f"Plot saved to {args.plot}")
         
     except Exception as e:
         print(f"Error running backtest: {e}")
@@ -0,0 +1,82 @@
+import hashlib
+import inspect
+import json
+import os
+import pickle
+from typing import Optional
+
+import pandas as pd
+
+
+def fingerprint_frame(df: pd.DataFrame) -> str:
+    """
+    Returns a content hash of a DataFrame (values, index and column names).
+    """
+    digest = hashlib.sha256(pd.util.hash_pandas_object(df, index=True).values.tobytes())
+    digest.update(json.dumps([str(c) for c in df.columns]).encode())
+    return digest.hexdigest()
+
+
+def fingerprint_code(*objects) -> str:
+    """
+    Returns a hash of the source files defining the given modules or classes,
+    so stored artifacts are invalidated when that code changes.
+    """
+    digest = hashlib.sha256()
+    for obj in objects:
+        with open(inspect.getsourcefile(obj), 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for fitted models and the scalers fitted with them.
+
+    Each artifact lives in its own directory named after the hash of its
+    configuration. Python objects are pickled; callers may also write other
+    files (e.g. a Keras model) into `path(key)` before calling `save`.
+    """
+
+    def __init__(self, root: str = ".cache/artifacts"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, **config) -> str:
+        """
+        Hashes a configuration (ticker, training data, features, hyperparameters...).
+        """
+        payload = json.dumps(config, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def path(self, key: str) -> str:
+        path = os.path.join(self.root, key)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    def exists(self, key: str) -> bool:
+        # meta.json is written last, so it marks a complete artifact
+        return os.path.exists(os.path.join(self.root, key, 'meta.json'))
+
+    def save(self, key: str, objects: dict, meta: dict):
+        path = self.path(key)
+        for name, obj in objects.items():
+            with open(os.path.join(path, f'{name}.pkl'), 'wb') as f:
+                pickle.dump(obj, f)
+        with open(os.path.join(path, 'meta.json'), 'w') as f:
+            json.dump({**meta, 'objects': list(objects)}, f, default=str)
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        Returns the pickled objects plus a 'meta' entry, or None if the key is unknown.
+        """
+        if not self.exists(key):
+            return None
+        path = os.path.join(self.root, key)
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        artifact = {'meta': meta}
+        for name in meta['objects']:
+            with open(os.path.join(path, f'{name}.pkl'), 'rb') as f:
+                artifact[name] = pickle.load(f)
+        return artifact
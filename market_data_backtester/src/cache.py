@@ -0,0 +1,86 @@
+import json
+import os
+import re
+from typing import List, Optional, Tuple
+
+import pandas as pd
+
+
+class DataCache:
+    """
+    On-disk OHLCV cache with one Parquet file per ticker and interval.
+
+    Next to each data file a small JSON sidecar records the date range that
+    has already been requested from the source, so that holidays and weekends
+    inside that range are not treated as missing data.
+    """
+
+    def __init__(self, cache_dir: str = ".cache/ohlcv"):
+        self.cache_dir = cache_dir
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def _base_path(self, ticker: str, interval: str) -> str:
+        safe_ticker = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        return os.path.join(self.cache_dir, f"{safe_ticker}_{interval}")
+
+    def coverage(self, ticker: str, interval: str) -> Optional[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Returns the cached [start, end) range, or None if nothing is cached.
+        """
+        meta_path = self._base_path(ticker, interval) + ".json"
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            meta = json.load(f)
+        return pd.Timestamp(meta["start"]), pd.Timestamp(meta["end"])
+
+    def missing_ranges(self, ticker: str, interval: str, start: pd.Timestamp, end: pd.Timestamp) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        Returns the [start, end) ranges that must be downloaded so that the
+        cache covers the requested range. The cached range is kept contiguous,
+        so a request past either edge also fills the gap up to that edge.
+        """
+        covered = self.coverage(ticker, interval)
+        if covered is None:
+            return [(start, end)] if start < end else []
+
+        cov_start, cov_end = covered
+        ranges = []
+        if start < cov_start:
+            ranges.append((start, cov_start))
+        if end > cov_end:
+            ranges.append((cov_end, end))
+        return ranges
+
+    def read(self, ticker: str, interval: str) -> pd.DataFrame:
+        data_path = self._base_path(ticker, interval) + ".parquet"
+        if not os.path.exists(data_path):
+            return pd.DataFrame()
+        return pd.read_parquet(data_path)
+
+    def write(self, ticker: str, interval: str, df: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+        """
+        Merges `df` into the cached frame and extends the covered range to
+        include [start, end). Freshly downloaded rows win over cached ones.
+        """
+        cached = self.read(ticker, interval)
+        if not cached.empty:
+            if not df.empty:
+                df = pd.concat([cached, df])
+                df = df[~df.index.duplicated(keep="last")]
+            else:
+                df = cached
+        df = df.sort_index()
+
+        covered = self.coverage(ticker, interval)
+        if covered is not None:
+            start, end = min(start, covered[0]), max(end, covered[1])
+
+        base = self._base_path(ticker, interval)
+        # Write to temporary files first so an interrupted run never leaves
+        # a data file that disagrees with its sidecar.
+        df.to_parquet(base + ".parquet.tmp")
+        with open(base + ".json.tmp", "w") as f:
+            json.dump({"start": start.isoformat(), "end": end.isoformat()}, f)
+        os.replace(base + ".parquet.tmp", base + ".parquet")
+        os.replace(base + ".json.tmp", base + ".json")
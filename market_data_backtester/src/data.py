@@ -1,36 +1,185 @@
+import os
+import random
+import re
+import time
 import pandas as pd
-import yfinance as yf
-from typing import Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, Tuple
+from .cache import DataCache
+from .sources import DataSource, YFinanceSource
+from .pyramid import DEFAULT_LEVELS, BarPyramid, bars_key
 
 class DataLoader:
-    def __init__(self):
-        pass
+    def __init__(self, cache_dir: Optional[str] = None, offline: bool = False, source: Optional[DataSource] = None,
+                 max_workers: int = 8, retries: int = 3, backoff: float = 1.0):
+        """
+        cache_dir: directory for the on-disk OHLCV cache. If None, every call downloads.
+        offline: serve requests from the cache only, never touching the network.
+        source: where bars are downloaded from (default: yfinance).
+        max_workers: concurrent fetches in load_many / load_panel.
+        retries / backoff: failed fetches are retried up to `retries` times, waiting
+        about backoff * 2^attempt seconds (with jitter) in between.
+        """
+        if offline and cache_dir is None:
+            raise ValueError("Offline mode requires a cache_dir.")
+        self.cache = DataCache(cache_dir) if cache_dir is not None else None
+        self.offline = offline
+        self.source = source if source is not None else YFinanceSource()
+        self.max_workers = max_workers
+        self.retries = retries
+        self.backoff = backoff
 
     def load_data(self, ticker: str, start_date: str, end_date: str, interval: str = "1d") -> pd.DataFrame:
         """
-        Loads OHLC data from yfinance.
+        Loads OHLC data from the source, going through the local cache if one is configured.
         """
-        print(f"Downloading data for {ticker} from {start_date} to {end_date}...")
-        df = yf.download(ticker, start=start_date, end=end_date, interval=interval, progress=False)
-        
+        return self._load(ticker, start_date, end_date, interval)
+
+    def _load(self, ticker: str, start_date: str, end_date: str, interval: str, quiet: bool = False) -> pd.DataFrame:
+        if self.cache is None:
+            df = self._download(ticker, start_date, end_date, interval, quiet)
+        else:
+            df = self._load_cached(ticker, start_date, end_date, interval, quiet)
+
         if df.empty:
             raise ValueError(f"No data found for {ticker}")
 
-        # Ensure we have a DatetimeIndex
+        return df
+
+    def load_many(self, tickers: List[str], start_date: str, end_date: str, interval: str = "1d",
+                  max_workers: Optional[int] = None, progress: bool = True) -> Tuple[Dict[str, pd.DataFrame], Dict[str, str]]:
+        """
+        Loads many tickers concurrently on a bounded thread pool (the source's
+        rate limit still applies). A failing ticker does not stop the others.
+        Returns (frames, failures): ticker -> frame for the loaded tickers, in
+        request order, and ticker -> error message for the rest.
+        """
+        tickers = list(dict.fromkeys(tickers))
+        started = time.perf_counter()
+        frames, failures = {}, {}
+        if tickers:
+            workers = min(max_workers or self.max_workers, len(tickers))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='load_many') as executor:
+                futures = {ticker: executor.submit(self._load, ticker, start_date, end_date, interval, True)
+                           for ticker in tickers}
+                for ticker, future in futures.items():
+                    try:
+                        frames[ticker] = future.result()
+                    except Exception as e:
+                        failures[ticker] = str(e) if isinstance(e, ValueError) else f"{type(e).__name__}: {e}"
+
+        if progress:
+            print(f"Loaded {len(frames)}/{len(tickers)} tickers in {time.perf_counter() - started:.1f}s"
+                  + (f" ({len(failures)} failed)" if failures else ""))
+        return frames, failures
+
+    def load_panel(self, tickers: List[str], start_date: str, end_date: str, interval: str = "1d", field: str = "Close") -> pd.DataFrame:
+        """
+        Loads `field` for several tickers into a dates x tickers DataFrame,
+        aligned on the union of their dates. Tickers without data are skipped.
+        """
+        frames, failures = self.load_many(tickers, start_date, end_date, interval, progress=len(tickers) > 1)
+        for ticker, error in failures.items():
+            print(f"Skipping {ticker}: {error}")
+
+        if not frames:
+            raise ValueError("No data found for any ticker")
+
+        return pd.DataFrame({ticker: df[field] for ticker, df in frames.items()}).sort_index()
+
+    def load_pyramid(self, ticker: str, start_date: str, end_date: str, interval: str = "1m",
+                     levels: Sequence[str] = DEFAULT_LEVELS) -> BarPyramid:
+        """
+        Loads `interval` bars and aggregates them into each of `levels`
+        (see BarPyramid). With a cache, the pyramid is persisted next to the
+        cached bars and memory-mapped back while those bars are unchanged.
+        """
+        bars = self.load_data(ticker, start_date, end_date, interval)
+        if self.cache is None:
+            return BarPyramid.build(bars, interval, levels)
+
+        safe_ticker = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        path = os.path.join(self.cache.cache_dir, 'pyramids', f"{safe_ticker}_{interval}")
+        key = f"{start_date}:{end_date}:{bars_key(bars, interval, levels)}"
+        if BarPyramid.stored_key(path) != key:
+            BarPyramid.build(bars, interval, levels).save(path, key)
+        return BarPyramid.load(path)
+
+    def _load_cached(self, ticker: str, start_date: str, end_date: str, interval: str, quiet: bool = False) -> pd.DataFrame:
+        start = pd.Timestamp(start_date)
+        # Only complete days are cached; today's bars are still forming
+        today = pd.Timestamp.today().normalize()
+        end = min(pd.Timestamp(end_date), today)
+
+        if not self.offline:
+            for missing_start, missing_end in self.cache.missing_ranges(ticker, interval, start, end):
+                df = self._download(ticker, missing_start.strftime("%Y-%m-%d"), missing_end.strftime("%Y-%m-%d"), interval, quiet)
+                self.cache.write(ticker, interval, df, missing_start, missing_end)
+
+        df = self.cache.read(ticker, interval)
+        if not df.empty:
+            # yfinance treats `end` as exclusive, mirror that here
+            lower, upper = start, end
+            if df.index.tz is not None:
+                lower, upper = lower.tz_localize(df.index.tz), upper.tz_localize(df.index.tz)
+            df = df[(df.index >= lower) & (df.index < upper)].copy()
+
+        if self.offline or pd.Timestamp(end_date) <= today:
+            return df
+
+        # The live part of the range is fetched on every call and never written to the cache
+        live = self._download(ticker, max(start, today).strftime("%Y-%m-%d"), end_date, interval, quiet)
+        if not live.empty:
+            lower, upper = max(start, today), pd.Timestamp(end_date)
+            if live.index.tz is not None:
+                lower, upper = lower.tz_localize(live.index.tz), upper.tz_localize(live.index.tz)
+            live = live[(live.index >= lower) & (live.index < upper)]
+        if df.empty:
+            return live
+        if live.empty:
+            return df
+        return pd.concat([df, live])
+
+    def _download(self, ticker: str, start_date: str, end_date: str, interval: str, quiet: bool = False) -> pd.DataFrame:
+        if not quiet:
+            print(f"Downloading data for {ticker} from {start_date} to {end_date}...")
+        for attempt in range(self.retries + 1):
+            self.source.limiter.acquire()
+            try:
+                df = self.source.fetch(ticker, start_date, end_date, interval)
+                break
+            except Exception:
+                if attempt == self.retries:
+                    raise
+                # Exponential backoff with jitter, so retrying threads do not hit the source in lockstep
+                time.sleep(self.backoff * 2 ** attempt * random.uniform(0.5, 1.5))
+
+        return self.normalize(df)
+
+    @staticmethod
+    def normalize(df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Turns a raw yfinance frame into numeric Open/High/Low/Close/Volume
+        columns on a DatetimeIndex, without rows that have missing values.
+        """
+        if df.empty:
+            return pd.DataFrame(columns=['Open', 'High', 'Low', 'Close', 'Volume'], index=pd.DatetimeIndex([]), dtype=float)
+
+        # Ensure we have a DatetimeIndex (set_axis returns a new frame, the caller's is left alone)
         if not isinstance(df.index, pd.DatetimeIndex):
-            df.index = pd.to_datetime(df.index)
+            df = df.set_axis(pd.to_datetime(df.index), axis=0)
 
         # Handle multi-level columns if any (yfinance sometimes returns them)
         if isinstance(df.columns, pd.MultiIndex):
-            df.columns = df.columns.droplevel(1)
+            df = df.set_axis(df.columns.droplevel(1), axis=1)
 
         # Keep only required columns and ensure they are numeric
         required_cols = ['Open', 'High', 'Low', 'Close', 'Volume']
         df = df[required_cols].copy()
-        
+
         for col in required_cols:
             df[col] = pd.to_numeric(df[col], errors='coerce')
-            
+
         df.dropna(inplace=True)
-        
+
         return df
@@ -1,18 +1,108 @@
+import os
 import pandas as pd
 import numpy as np
 import tensorflow as tf
 from tensorflow.keras.models import Sequential
 from tensorflow.keras.layers import LSTM, Dense, Dropout
+from typing import Optional
 from .strategies import Strategy
-from .features import FeatureEngineer
+from .features import INDICATOR_SPEC, FeatureEngineer, FeatureMatrix, spec_columns
+from .artifacts import ArtifactStore, fingerprint_code, fingerprint_frame
+from . import lstm_numpy, profiling
+
+class WindowBatches(tf.keras.utils.Sequence):
+    """
+    Feeds batches from a (possibly strided, read-only) window array to Keras.
+    Only the current batch is materialized, never the full 3D tensor.
+    """
+    def __init__(self, X: np.ndarray, y: np.ndarray = None, batch_size: int = 32, shuffle: bool = False, seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        self.X = X
+        self.y = y
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        self.order = np.arange(len(X))
+        self.rng = np.random.default_rng(seed)
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+    def __len__(self):
+        return int(np.ceil(len(self.X) / self.batch_size))
+
+    def __getitem__(self, i):
+        idx = self.order[i * self.batch_size:(i + 1) * self.batch_size]
+        X_batch = np.asarray(self.X[idx], dtype=np.float32)
+        if self.y is None:
+            return X_batch
+        return X_batch, self.y[idx]
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.order)
+
+class StreamingWindowBatches(tf.keras.utils.Sequence):
+    """
+    Builds each batch on demand from unscaled feature rows, e.g. a memory-mapped
+    feature file, covering windows [first_window, last_window).
+    With workers > 0 Keras prepares the next batches in background threads
+    while the current training step runs.
+    """
+    def __init__(self, feature_engineer: FeatureEngineer, data: np.ndarray, targets: np.ndarray, time_steps: int,
+                 batch_size: int, first_window: int, last_window: int, shuffle: bool = False, seed: int = 42, **kwargs):
+        super().__init__(**kwargs)
+        self.feature_engineer = feature_engineer
+        self.data = data
+        self.targets = targets
+        self.time_steps = time_steps
+        self.last_window = last_window
+        self.batch_size = batch_size
+        self.shuffle = shuffle
+        # Batches are runs of consecutive windows, so each one reads a single block of rows
+        self.starts = np.arange(first_window, last_window, batch_size)
+        self.rng = np.random.default_rng(seed)
+        if self.shuffle:
+            self.rng.shuffle(self.starts)
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, i):
+        start = self.starts[i]
+        stop = min(start + self.batch_size, self.last_window)
+        X, y = self.feature_engineer.lstm_window_batch(self.data, self.targets, start, stop, self.time_steps)
+        return np.asarray(X, dtype=np.float32), y
+
+    def on_epoch_end(self):
+        if self.shuffle:
+            self.rng.shuffle(self.starts)
 
 class LSTMStrategy(Strategy):
-    def __init__(self, time_steps: int = 60, epochs: int = 10, batch_size: int = 32):
+    def __init__(self, time_steps: int = 60, epochs: int = 10, batch_size: int = 32,
+                 streaming: bool = False, workers: int = 2, max_queue_size: int = 10,
+                 artifact_store: Optional[ArtifactStore] = None, feature_dtype: str = 'float32',
+                 train_split: float = 0.8):
+        """
+        streaming: build training batches on demand instead of scaling the whole history up front.
+        workers / max_queue_size: background threads and queue depth used to prefetch streamed batches.
+        artifact_store: if given, the fitted model and scaler are saved there and
+        reloaded instead of retrained when the same configuration is trained again.
+        feature_dtype: dtype of the feature matrix (Keras trains in float32 either way).
+        train_split: fraction of the windows to train on; the rest is the
+        validation set (1.0: train on all windows, without validation).
+        """
         self.time_steps = time_steps
         self.epochs = epochs
         self.batch_size = batch_size
-        self.feature_engineer = FeatureEngineer()
+        self.streaming = streaming
+        self.workers = workers
+        self.max_queue_size = max_queue_size
+        self.artifact_store = artifact_store
+        self.feature_dtype = feature_dtype
+        self.train_split = train_split
+        self.feature_engineer = FeatureEngineer(dtype=feature_dtype)
         self.model = None
+        # Identifies the data (and configuration) the model was fitted on
+        self.fitted_on = None
 
     def build_model(self, input_shape):
         model = Sequential()
@@ -26,39 +116,150 @@ class LSTMStrategy(Strategy):
         return model
 
     def train(self, df: pd.DataFrame):
-        print("Preprocessing data for LSTM...")
-        df = self.feature_engineer.add_technical_indicators(df)
+        artifact_key = None
+        if self.artifact_store is not None:
+            artifact_key = self.artifact_store.key(
+                strategy=type(self).__name__,
+                time_steps=self.time_steps,
+                epochs=self.epochs,
+                batch_size=self.batch_size,
+                streaming=self.streaming,
+                feature_dtype=self.feature_dtype,
+                train_split=self.train_split,
+                data=fingerprint_frame(df),
+                code=fingerprint_code(FeatureEngineer, LSTMStrategy),
+            )
+        
+        with profiling.stage('LSTMStrategy.train', rows=len(df), streaming=self.streaming):
+            print("Preprocessing data for LSTM...")
+            with profiling.stage('LSTMStrategy.build_features', rows=len(df)):
+                features = self.build_features(df)
+            
+            return self.fit_features(features, artifact_key)
+
+    @property
+    def lookback(self) -> int:
+        """
+        Feature rows needed before the first prediction.
+        """
+        return self.time_steps
+
+    def build_features(self, df: pd.DataFrame) -> FeatureMatrix:
+        """
+        Builds the indicator feature matrix. Features only look backwards, so
+        they can be built once over a long history and sliced afterwards.
+        """
+        return self.feature_engineer.build(df, INDICATOR_SPEC)
+
+    def fit_features(self, features: FeatureMatrix, artifact_key: Optional[str] = None):
+        """
+        Trains the LSTM on a matrix returned by build_features.
+        """
+        self.fitted_on = artifact_key or features.fingerprint()
         
         # Target: 1 if Close[t+1] > Close[t], else 0
-        df['Target'] = np.where(df['Close'].shift(-1) > df['Close'], 1, 0)
-        df.dropna(inplace=True)
+        targets = features.targets()
+        
+        # Reuse a previously fitted model and scaler for this exact configuration
+        if artifact_key is not None and self.artifact_store.exists(artifact_key):
+            with profiling.stage('LSTMStrategy.load_artifact'):
+                artifact = self.artifact_store.load(artifact_key)
+                self.model = tf.keras.models.load_model(os.path.join(self.artifact_store.path(artifact_key), 'model.keras'))
+            self.feature_engineer.scaler = artifact['scaler']
+            print(f"Loaded LSTM model from artifact store ({artifact_key})")
+            return features
+        
+        if self.streaming:
+            self._fit_streaming(features.values, targets)
+        else:
+            with profiling.stage('LSTMStrategy.prepare_data', rows=len(features)):
+                X, y, _ = self.feature_engineer.prepare_data_for_lstm(features, targets, time_steps=self.time_steps)
+            
+            # Split
+            split = int(len(X) * self.train_split)
+            X_train, y_train = X[:split], y[:split]
+            X_test, y_test = X[split:], y[split:]
+            
+            self.model = self.build_model((X_train.shape[1], X_train.shape[2]))
+            
+            print(f"Training LSTM on {len(X_train)} samples...")
+            # X is a window view over the feature matrix; batches are copied out one at a time
+            with profiling.stage('LSTMStrategy.fit', rows=len(X_train), epochs=self.epochs):
+                self.model.fit(
+                    WindowBatches(X_train, y_train, self.batch_size, shuffle=True),
+                    epochs=self.epochs,
+                    validation_data=WindowBatches(X_test, y_test, self.batch_size) if len(X_test) else None,
+                    verbose=1
+                )
         
-        X, y, _ = self.feature_engineer.prepare_data_for_lstm(df, target_col='Target', time_steps=self.time_steps)
+        if artifact_key is not None:
+            # The Keras model goes next to the pickled scaler; save() writes the completion marker last
+            self.model.save(os.path.join(self.artifact_store.path(artifact_key), 'model.keras'))
+            self.artifact_store.save(
+                artifact_key,
+                {'scaler': self.feature_engineer.scaler},
+                {'features': features.columns, 'train_start': features.index[0], 'train_end': features.index[-1]},
+            )
         
-        # Split
-        split = int(len(X) * 0.8)
-        X_train, y_train = X[:split], y[:split]
-        X_test, y_test = X[split:], y[split:]
+        return features
+
+    def train_from_feature_file(self, path: str):
+        """
+        Trains on a feature file written by FeatureEngineer.write_feature_file.
+        The file is memory-mapped, so only the batches in flight are in memory.
+        """
+        data, targets, _ = self.feature_engineer.load_feature_file(path)
+        self.fitted_on = f"{os.path.abspath(path)}@{os.path.getmtime(path)}"
+        self._fit_streaming(data, targets)
+
+    def _fit_streaming(self, data: np.ndarray, targets: np.ndarray):
+        self.feature_engineer.partial_fit_scaler(data)
         
-        self.model = self.build_model((X_train.shape[1], X_train.shape[2]))
+        # Same split over windows as the in-memory path
+        n_windows = len(data) - self.time_steps
+        split = int(n_windows * self.train_split)
+        prefetch = dict(workers=self.workers, max_queue_size=self.max_queue_size)
+        train_batches = StreamingWindowBatches(self.feature_engineer, data, targets, self.time_steps, self.batch_size, 0, split, shuffle=True, **prefetch)
+        val_batches = None
+        if split < n_windows:
+            val_batches = StreamingWindowBatches(self.feature_engineer, data, targets, self.time_steps, self.batch_size, split, n_windows, **prefetch)
         
-        print(f"Training LSTM on {len(X_train)} samples...")
-        self.model.fit(X_train, y_train, epochs=self.epochs, batch_size=self.batch_size, validation_data=(X_test, y_test), verbose=1)
+        self.model = self.build_model((self.time_steps, data.shape[1]))
         
-        return df
+        print(f"Training LSTM on {split} samples (streaming)...")
+        with profiling.stage('LSTMStrategy.fit', rows=split, epochs=self.epochs, streaming=True):
+            self.model.fit(train_batches, epochs=self.epochs, validation_data=val_batches, verbose=1)
+
+    def export(self, path: str) -> str:
+        """
+        Writes the trained weights, the fitted scaler and the feature settings
+        to `path` (.npz) for TensorFlow-free inference with
+        lstm_numpy.NumpyLSTMStrategy.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained.")
+        return lstm_numpy.export_model(self.model, path, scaler=self.feature_engineer.scaler,
+                                       time_steps=self.time_steps, columns=spec_columns(INDICATOR_SPEC),
+                                       fitted_on=self.fitted_on)
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
+        features = self.build_features(df)
+        
+        return self.predict_features(features).reindex(df.index).fillna(0)
+
+    def predict_features(self, features: FeatureMatrix) -> pd.Series:
+        """
+        Returns signals for the rows of a build_features matrix that have
+        `time_steps` rows of history before them.
+        """
         if self.model is None:
             raise ValueError("Model not trained.")
-            
-        df_features = self.feature_engineer.add_technical_indicators(df)
-        # Dummy target for shape alignment
-        df_features['Target'] = 0 
         
-        X, _, _ = self.feature_engineer.prepare_data_for_lstm(df_features, target_col='Target', time_steps=self.time_steps)
+        # Scale with the scaler fitted during training, so no statistics leak in from the backtest period
+        X, _, _ = self.feature_engineer.prepare_data_for_lstm(features, time_steps=self.time_steps, fit=False)
         
         # Predict
-        probs = self.model.predict(X, verbose=0)
+        probs = self.model.predict(WindowBatches(X, batch_size=self.batch_size), verbose=0)
         predictions = (probs > 0.5).astype(int).flatten()
         
         # Align signals with original index
@@ -67,7 +268,7 @@ class LSTMStrategy(Strategy):
         
         signals = np.where(predictions == 1, 1.0, -1.0)
         
-        # Create series aligned with df_features (which is slightly shorter than df due to indicators)
+        # Create series aligned with the feature rows (fewer than in df due to the indicator warmup)
         # The LSTM consumes `time_steps` rows to make 1 prediction.
         # The prediction is for the NEXT step? 
         # In training: X[t-60:t] -> y[t] (Target at t).
@@ -82,7 +283,5 @@ class LSTMStrategy(Strategy):
         # The signals series needs to match the original index.
         # We pad the beginning with 0s.
         
-        valid_index = df_features.index[self.time_steps:]
-        signal_series = pd.Series(signals, index=valid_index)
-        
-        return signal_series.reindex(df.index).fillna(0)
+        valid_index = features.index[self.time_steps:]
+        return pd.Series(signals, index=valid_index)
@@ -1,59 +1,454 @@
+import copy
+import os
+import pickle
+
 import pandas as pd
 import numpy as np
 from .data import DataLoader
 from .strategies import Strategy
-from .performance import calculate_sharpe_ratio, calculate_max_drawdown, calculate_total_return, calculate_volatility
+from typing import Iterable, List, Optional
+from . import indicators
+from . import kernels
+from . import profiling
+from .performance import RunningMetrics, calculate_panel_metrics
+from .artifacts import fingerprint_frame
+from .results import ResultStore, code_version
+
+class EngineCheckpoint:
+    """
+    Terminal state of a chunked backtest: the strategy's warm-up tail, the
+    last bar and signal, the open position (stops), the cumulative market
+    return and the metric accumulators, plus the configuration it is valid
+    for. Its size depends on the strategy's warm-up, not on the history.
+    """
+
+    def __init__(self, ticker: str, config: dict, initial_capital: float):
+        self.ticker = ticker
+        self.config = config
+        self.history = None
+        self.last_bar = None
+        self.previous_signal = np.nan
+        self.position_state = kernels.position_state()
+        self.market_cumulative = 1.0
+        self.final_equity = np.nan
+        self.metrics = RunningMetrics(initial_capital)
+
+    def save(self, path: str):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # Written aside and renamed, so a crash never leaves a truncated checkpoint
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def load(path: str) -> 'EngineCheckpoint':
+        with open(path, 'rb') as f:
+            return pickle.load(f)
 
 class BacktestEngine:
-    def __init__(self, data_loader: DataLoader, strategy: Strategy, initial_capital: float = 10000.0):
+    def __init__(self, data_loader: DataLoader, strategy: Strategy, initial_capital: float = 10000.0,
+                 stop_loss: Optional[float] = None, take_profit: Optional[float] = None,
+                 trailing_stop: Optional[float] = None, position_size: float = 1.0,
+                 result_store: Optional[ResultStore] = None):
+        """
+        stop_loss / take_profit / trailing_stop: exit levels as fractions of the entry
+        price (trailing: of the best price since entry), e.g. 0.05 for 5%.
+        position_size: fraction of equity committed per unit of signal.
+        result_store: if given, results are stored under a hash of the full run
+        configuration, and identical runs are served from the store.
+        """
         self.data_loader = data_loader
         self.strategy = strategy
         self.initial_capital = initial_capital
+        self.stop_loss = stop_loss
+        self.take_profit = take_profit
+        self.trailing_stop = trailing_stop
+        self.position_size = position_size
+        self.result_store = result_store
+        # Whether the last run was served from the result store
+        self.from_store = False
         self.results = {}
+        # Terminal state of the last chunked run or extend()
+        self.checkpoint = None
 
     def run(self, ticker: str, start_date: str, end_date: str):
         # 1. Load Data
-        df = self.data_loader.load_data(ticker, start_date, end_date)
+        with profiling.stage('engine.load_data', ticker=ticker) as stage:
+            df = self.data_loader.load_data(ticker, start_date, end_date)
+            stage['rows'] = len(df)
         
+        return self.run_on_data(df, ticker)
+
+    def run_on_data(self, df: pd.DataFrame, ticker: str = ''):
+        """
+        Runs the backtest on an already loaded OHLCV DataFrame.
+        The DataFrame is modified in place (result columns are added), unless
+        the result is served from the result store.
+        """
+        return self._memoized('vectorized', df, ticker, self._run_vectorized)
+
+    def _run_vectorized(self, df: pd.DataFrame, ticker: str):
         # 2. Generate Signals
-        signals = self.strategy.generate_signals(df)
-        
-        # 3. Calculate Returns
-        # Market Returns (Log returns are often better for additivity, but simple returns are standard for basic backtests)
-        df['Market_Returns'] = df['Close'].pct_change()
-        
-        # Strategy Returns
-        # Shift signals by 1 because we trade at the Close based on data available up to that Close, 
-        # so the return we get is the NEXT day's return. 
-        # Or if we assume we trade at the Open of the next day?
-        # Standard vectorized assumption: Signal calculated at Close t, Position held from Close t to Close t+1.
-        # So we multiply Signal(t) * Return(t+1).
+        # Each price column is hashed for the indicator cache once per run, not once per indicator
+        with profiling.stage('engine.generate_signals', rows=len(df), strategy=type(self.strategy).__name__), indicators.shared_inputs():
+            signals = self.strategy.generate_signals(df)
+        
+        return self.run_with_signals(df, signals, ticker)
+
+    def _memoized(self, mode: str, df: pd.DataFrame, ticker: str, run):
+        self.from_store = False
+        if self.result_store is None:
+            return run(df, ticker)
+        
+        config = {'mode': mode, **self._config(ticker), 'data': fingerprint_frame(df)}
+        key = self.result_store.key(**config)
+        results = self.result_store.load(key)
+        if results is not None:
+            self.from_store = True
+            self.results = results
+            return results
+        
+        results = run(df, ticker)
+        self.result_store.save(key, results, config)
+        return results
+
+    def run_with_signals(self, df: pd.DataFrame, signals: pd.Series, ticker: str = ''):
+        """
+        Backtests precomputed signals (aligned with df) on an OHLCV DataFrame.
+        """
+        with profiling.stage('engine.returns_equity', rows=len(df)):
+            # 3. Calculate Returns
+            # Market Returns (Log returns are often better for additivity, but simple returns are standard for basic backtests)
+            df['Market_Returns'] = df['Close'].pct_change()
+        
+            # Strategy Returns
+            # Shift signals by 1 because we trade at the Close based on data available up to that Close, 
+            # so the return we get is the NEXT day's return. 
+            # Or if we assume we trade at the Open of the next day?
+            # Standard vectorized assumption: Signal calculated at Close t, Position held from Close t to Close t+1.
+            # So we multiply Signal(t) * Return(t+1).
+            df['Signal'] = signals
+            # Without stops the kernel is vectorized; exits depend on the path since entry otherwise
+            positions, strategy_returns = kernels.simulate_positions(
+                df['Signal'], df['Close'], df['High'], df['Low'], df['Open'], size=self.position_size,
+                stop_loss=self.stop_loss, take_profit=self.take_profit, trailing_stop=self.trailing_stop
+            )
+            df['Position'] = positions
+            df['Strategy_Returns'] = strategy_returns
+        
+            # Handle NaN from shifting
+            df.dropna(inplace=True)
+        
+            # 4. Calculate Equity Curve
+            df['Cumulative_Market_Returns'] = (1 + df['Market_Returns']).cumprod()
+            df['Cumulative_Strategy_Returns'] = (1 + df['Strategy_Returns']).cumprod()
+        
+            df['Equity'] = self.initial_capital * df['Cumulative_Strategy_Returns']
+        
+        return self._collect_results(df, ticker)
+
+    def run_event_driven(self, ticker: str, start_date: str, end_date: str):
+        """
+        Bar-by-bar backtest: the strategy sees one bar at a time through on_bar().
+        Gives the same results as run() for strategies implementing both paths.
+        """
+        with profiling.stage('engine.load_data', ticker=ticker) as stage:
+            df = self.data_loader.load_data(ticker, start_date, end_date)
+            stage['rows'] = len(df)
+        
+        return self.run_events_on_data(df, ticker)
+
+    def run_events_on_data(self, df: pd.DataFrame, ticker: str = ''):
+        """
+        Event-driven run on an already loaded OHLCV DataFrame (modified in place).
+        Positions, returns and equity are updated as each bar arrives.
+        """
+        return self._memoized('event_driven', df, ticker, self._run_events)
+
+    def _run_events(self, df: pd.DataFrame, ticker: str):
+        self.strategy.reset()
+        
+        n = len(df)
+        signals = np.zeros(n)
+        positions = np.zeros(n)
+        market_returns = np.full(n, np.nan)
+        strategy_returns = np.full(n, np.nan)
+        cumulative_market = np.full(n, np.nan)
+        cumulative_strategy = np.full(n, np.nan)
+        
+        with profiling.stage('engine.event_loop', rows=n, strategy=type(self.strategy).__name__):
+            market_equity = strategy_equity = 1.0
+            prev_close = np.nan
+            # Sizing and stops go through the same kernel as run(), one bar at a time
+            state = kernels.position_state()
+            for i, bar in enumerate(df.itertuples()):
+                signals[i] = self.strategy.on_bar(bar)
+                positions[i], bar_return = kernels.step_position(
+                    state, signals[i], bar.Close, bar.High, bar.Low, bar.Open, size=self.position_size,
+                    stop_loss=self.stop_loss, take_profit=self.take_profit, trailing_stop=self.trailing_stop
+                )
+                if i > 0:
+                    # The position taken at the previous close earns this bar's return
+                    market_returns[i] = bar.Close / prev_close - 1
+                    strategy_returns[i] = bar_return
+                    market_equity *= 1 + market_returns[i]
+                    strategy_equity *= 1 + strategy_returns[i]
+                    cumulative_market[i] = market_equity
+                    cumulative_strategy[i] = strategy_equity
+                prev_close = bar.Close
+        
+        df['Market_Returns'] = market_returns
         df['Signal'] = signals
-        df['Strategy_Returns'] = df['Signal'].shift(1) * df['Market_Returns']
+        df['Position'] = positions
+        df['Strategy_Returns'] = strategy_returns
+        df['Cumulative_Market_Returns'] = cumulative_market
+        df['Cumulative_Strategy_Returns'] = cumulative_strategy
         
-        # Handle NaN from shifting
+        # The first bar has no return yet
         df.dropna(inplace=True)
         
-        # 4. Calculate Equity Curve
-        df['Cumulative_Market_Returns'] = (1 + df['Market_Returns']).cumprod()
-        df['Cumulative_Strategy_Returns'] = (1 + df['Strategy_Returns']).cumprod()
-        
         df['Equity'] = self.initial_capital * df['Cumulative_Strategy_Returns']
         
-        # 5. Calculate Metrics
-        sharpe = calculate_sharpe_ratio(df['Strategy_Returns'])
-        max_dd = calculate_max_drawdown(df['Cumulative_Strategy_Returns'])
-        total_ret = calculate_total_return(df['Cumulative_Strategy_Returns'])
-        volatility = calculate_volatility(df['Strategy_Returns'])
+        return self._collect_results(df, ticker)
+
+    def _collect_results(self, df: pd.DataFrame, ticker: str):
+        # 5. Calculate Metrics (all of them in one pass over the returns)
+        with profiling.stage('engine.metrics', rows=len(df)):
+            metrics = calculate_panel_metrics(df['Strategy_Returns'], self.initial_capital).iloc[0]
         
+        return self._store_results(metrics, ticker, df['Equity'].iloc[-1], df)
+
+    def _store_results(self, metrics, ticker: str, final_equity: float, data: Optional[pd.DataFrame]):
         self.results = {
             'ticker': ticker,
-            'sharpe_ratio': sharpe,
-            'max_drawdown': max_dd,
-            'total_return_pct': total_ret,
-            'volatility': volatility,
-            'final_equity': df['Equity'].iloc[-1],
-            'data': df
+            'sharpe_ratio': metrics['sharpe_ratio'],
+            'max_drawdown': metrics['max_drawdown'],
+            'total_return_pct': metrics['total_return_pct'],
+            'volatility': metrics['volatility'],
+            'cagr': metrics['cagr'],
+            'win_rate': metrics['win_rate'],
+            'sortino_ratio': metrics['sortino_ratio'],
+            'calmar_ratio': metrics['calmar_ratio'],
+            'max_drawdown_duration': int(metrics['max_drawdown_duration']),
+            'final_equity': final_equity,
+            'data': data
+        }
+        
+        return self.results
+
+    def run_stored(self, store, ticker: str, start_date: Optional[str] = None, end_date: Optional[str] = None,
+                   interval: str = "1m", chunk_rows: int = 100_000, output: Optional[str] = None):
+        """
+        Out-of-core backtest over the bars of a BarStore, read in chunks of
+        `chunk_rows` (see run_chunks).
+        """
+        chunks = store.iter_chunks(ticker, interval, start_date, end_date, chunk_rows)
+        
+        return self.run_chunks(chunks, ticker, output)
+
+    def run_chunks(self, chunks: Iterable[pd.DataFrame], ticker: str = '', output: Optional[str] = None):
+        """
+        Backtests a history delivered as consecutive OHLCV chunks, holding one
+        chunk at a time. The strategy's warm-up rows, the last close and signal,
+        the open position (stops) and the metric accumulators are carried
+        across chunk boundaries, so the metrics equal run_on_data on the whole
+        history. Per-bar results are appended to the Parquet file `output` if
+        given; 'data' is None. The terminal state is kept in self.checkpoint,
+        from which extend() continues.
+        """
+        self._chunked_warmup()
+        checkpoint = EngineCheckpoint(ticker, self._config(ticker), self.initial_capital)
+        writer = None
+        
+        # Chunks are seen once, caching their indicators would only evict useful entries
+        with profiling.stage('engine.run_chunks', ticker=ticker) as stage, indicators.cache.disabled():
+            for chunk in chunks:
+                df = self._advance(checkpoint, chunk)
+                if output is not None and not df.empty:
+                    writer = self._write_chunk(writer, df, output)
+            stage['rows'] = checkpoint.metrics.n_obs
+        
+        if writer is not None:
+            writer.close()
+        if checkpoint.metrics.n_obs == 0:
+            raise ValueError(f"No data found for {ticker}")
+        
+        self.checkpoint = checkpoint
+        return self._store_results(checkpoint.metrics.result(), ticker, checkpoint.final_equity, None)
+
+    def extend(self, checkpoint: 'EngineCheckpoint', new_bars: pd.DataFrame):
+        """
+        Continues a checkpointed run (see run_chunks) with the bars that
+        arrived since, in O(new bars): only the new rows are simulated and the
+        metrics are updated from the checkpoint's accumulators. Bars at or
+        before the checkpoint's last bar are skipped, so overlapping reloads
+        are harmless. Returns the results of the whole history; 'data' holds
+        the new rows only. The checkpoint passed in is left untouched, the
+        updated one is self.checkpoint.
+        """
+        self._chunked_warmup()
+        if checkpoint.config != self._config(checkpoint.ticker):
+            raise ValueError(f"Checkpoint of {checkpoint.ticker} was made with a different strategy, "
+                             "engine settings or code version")
+        checkpoint = copy.deepcopy(checkpoint)
+        
+        with profiling.stage('engine.extend', ticker=checkpoint.ticker, rows=len(new_bars)), indicators.cache.disabled():
+            df = self._advance(checkpoint, new_bars)
+        
+        self.checkpoint = checkpoint
+        return self._store_results(checkpoint.metrics.result(), checkpoint.ticker, checkpoint.final_equity, df)
+
+    def run_incremental(self, ticker: str, start_date: str, end_date: str, path: str):
+        """
+        Nightly update: extends the checkpoint stored at `path` with the bars
+        loaded since its last bar, or runs the whole history if there is no
+        usable checkpoint yet (missing, or made with other settings or code).
+        The updated checkpoint is written back to `path`.
+        """
+        self._chunked_warmup()
+        checkpoint = EngineCheckpoint.load(path) if os.path.exists(path) else None
+        if checkpoint is not None and checkpoint.config == self._config(ticker):
+            # The loader's end date is exclusive, so the last bar's day is reloaded and skipped
+            start = max(pd.Timestamp(start_date), checkpoint.last_bar.normalize()).strftime("%Y-%m-%d")
+            with profiling.stage('engine.load_data', ticker=ticker) as stage:
+                new_bars = self.data_loader.load_data(ticker, start, end_date)
+                stage['rows'] = len(new_bars)
+            results = self.extend(checkpoint, new_bars)
+        else:
+            with profiling.stage('engine.load_data', ticker=ticker) as stage:
+                df = self.data_loader.load_data(ticker, start_date, end_date)
+                stage['rows'] = len(df)
+            results = self.run_chunks([df], ticker)
+        
+        self.checkpoint.save(path)
+        return results
+
+    def _config(self, ticker: str) -> dict:
+        """
+        Everything besides the data that determines a run's results.
+        """
+        return {
+            'ticker': ticker,
+            'strategy': type(self.strategy).__qualname__,
+            'params': self.strategy.config(),
+            'initial_capital': self.initial_capital,
+            'stop_loss': self.stop_loss,
+            'take_profit': self.take_profit,
+            'trailing_stop': self.trailing_stop,
+            'position_size': self.position_size,
+            'code': code_version(self.strategy),
+        }
+
+    def _chunked_warmup(self) -> int:
+        """
+        The strategy's warm-up rows; ValueError if it cannot run chunk by chunk.
+        """
+        warmup = self.strategy.warmup
+        if warmup is None:
+            raise ValueError(f"strategy {type(self.strategy).__name__} does not support chunked execution")
+        return warmup
+
+    def _advance(self, checkpoint: 'EngineCheckpoint', chunk: pd.DataFrame) -> pd.DataFrame:
+        """
+        Simulates the bars of `chunk` after the checkpoint's last bar,
+        updating the checkpoint in place. Returns the new rows with their
+        result columns.
+        """
+        warmup = self._chunked_warmup()
+        
+        if checkpoint.last_bar is not None:
+            chunk = chunk[chunk.index > checkpoint.last_bar]
+        if chunk.empty:
+            return chunk.copy()
+        
+        history = checkpoint.history
+        n_history = 0 if history is None else len(history)
+        frame = chunk if history is None else pd.concat([history, chunk])
+        signals = self.strategy.generate_chunk_signals(frame, n_history, 0.0 if history is None else checkpoint.previous_signal)
+        signals = np.asarray(signals, dtype=np.float64)
+        
+        df = chunk.copy()
+        df['Market_Returns'] = frame['Close'].pct_change().to_numpy()[n_history:]
+        df['Signal'] = signals
+        # The first bar of a chunk earns the position carried over from the previous chunk
+        positions, strategy_returns = kernels.simulate_positions(
+            df['Signal'], df['Close'], df['High'], df['Low'], df['Open'], size=self.position_size,
+            stop_loss=self.stop_loss, take_profit=self.take_profit, trailing_stop=self.trailing_stop,
+            state=checkpoint.position_state
+        )
+        df['Position'] = positions
+        df['Strategy_Returns'] = strategy_returns
+        
+        checkpoint.previous_signal = signals[-1]
+        checkpoint.history = frame.iloc[-max(warmup, 1):]
+        checkpoint.last_bar = chunk.index[-1]
+        
+        df.dropna(inplace=True)
+        if df.empty:
+            return df
+        
+        market = np.cumprod(np.concatenate(([checkpoint.market_cumulative], 1 + df['Market_Returns'].to_numpy())))[1:]
+        checkpoint.market_cumulative = market[-1]
+        df['Cumulative_Market_Returns'] = market
+        df['Cumulative_Strategy_Returns'] = checkpoint.metrics.update(df['Strategy_Returns'])
+        df['Equity'] = self.initial_capital * df['Cumulative_Strategy_Returns']
+        checkpoint.final_equity = df['Equity'].iloc[-1]
+        return df
+
+    @staticmethod
+    def _write_chunk(writer, df: pd.DataFrame, path: str):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        table = pa.Table.from_pandas(df)
+        if writer is None:
+            writer = pq.ParquetWriter(path, table.schema)
+        writer.write_table(table.cast(writer.schema))
+        return writer
+
+    def _check_panel(self):
+        if not self.strategy.supports_panel:
+            raise ValueError(f"{type(self.strategy).__name__} does not support panel mode")
+        # Stops are checked against each bar's high and low, which a Close panel does not have
+        if self.stop_loss or self.take_profit or self.trailing_stop:
+            raise ValueError("Panel runs do not support stop_loss, take_profit or trailing_stop")
+
+    def run_panel(self, tickers: List[str], start_date: str, end_date: str):
+        """
+        Backtests the strategy on many tickers at once. Prices, signals and
+        returns are dates x tickers matrices and every step is column-wise.
+        """
+        self._check_panel()
+        close = self.data_loader.load_panel(tickers, start_date, end_date)
+        
+        return self.run_panel_on_data(close)
+
+    def run_panel_on_data(self, close: pd.DataFrame):
+        """
+        Runs the panel backtest on an aligned dates x tickers Close DataFrame.
+        """
+        self._check_panel()
+        signals = self.strategy.generate_panel_signals(close)
+        
+        prices = close.to_numpy(dtype=np.float64)
+        market_returns = prices[1:] / prices[:-1] - 1
+        # Same convention as run(): signal at t is held over the return t -> t+1
+        strategy_returns = signals.to_numpy()[:-1] * self.position_size * market_returns
+        
+        index = close.index[1:]
+        market_returns = pd.DataFrame(market_returns, index=index, columns=close.columns)
+        strategy_returns = pd.DataFrame(strategy_returns, index=index, columns=close.columns)
+        
+        equity = self.initial_capital * np.nancumprod(1 + strategy_returns.to_numpy(), axis=0)
+        
+        self.results = {
+            'tickers': list(close.columns),
+            'metrics': calculate_panel_metrics(strategy_returns, self.initial_capital),
+            'signals': signals,
+            'market_returns': market_returns,
+            'strategy_returns': strategy_returns,
+            'equity': pd.DataFrame(equity, index=index, columns=close.columns),
         }
         
         return self.results
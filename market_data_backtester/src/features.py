@@ -1,96 +1,320 @@
+import hashlib
+import json
 import pandas as pd
 import numpy as np
-from sklearn.preprocessing import MinMaxScaler, StandardScaler
+from typing import List, Optional, Sequence, Tuple
+from . import indicators
+
+# A feature specification is a sequence of (feature, parameters) pairs; each
+# feature contributes one or more named columns to the matrix, in order.
+INDICATOR_SPEC = (
+    ('rsi', {'period': 14}),
+    ('macd', {'fast': 12, 'slow': 26, 'signal': 9}),
+    ('bollinger_bands', {'window': 20, 'num_std': 2}),
+    ('roc', {'period': 10}),
+    ('true_range', {}),
+    ('atr', {'window': 14}),
+)
+ML_SPEC = INDICATOR_SPEC + (('lags', {'lags': 5}),)
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+
+def _rsi(bars, start, out, period=14):
+    out[:, 0] = indicators.rsi(bars['Close'], period).to_numpy()[start:]
+
+
+def _macd(bars, start, out, fast=12, slow=26, signal=9):
+    macd_line, signal_line = indicators.macd(bars['Close'], fast, slow, signal)
+    out[:, 0] = macd_line.to_numpy()[start:]
+    out[:, 1] = signal_line.to_numpy()[start:]
+
+
+def _bollinger_bands(bars, start, out, window=20, num_std=2):
+    for j, series in enumerate(indicators.bollinger_bands(bars['Close'], window, num_std)):
+        out[:, j] = series.to_numpy()[start:]
+
+
+def _roc(bars, start, out, period=10):
+    out[:, 0] = indicators.roc(bars['Close'], period).to_numpy()[start:]
+
+
+def _true_range(bars, start, out):
+    out[:, 0] = indicators.true_range(bars['High'], bars['Low'], bars['Close']).to_numpy()[start:]
+
+
+def _atr(bars, start, out, window=14):
+    out[:, 0] = indicators.atr(bars['High'], bars['Low'], bars['Close'], window).to_numpy()[start:]
+
+
+def _lags(bars, start, out, lags=5):
+    close = bars['Close'].to_numpy(dtype=np.float64)
+    # Returns are computed once; every lag is a shifted slice of the same arrays
+    returns = np.full_like(close, np.nan)
+    np.divide(close[1:], close[:-1], out=returns[1:])
+    returns[1:] -= 1
+    n = len(close)
+    for i in range(1, lags + 1):
+        out[:, 2 * i - 2] = close[start - i:n - i]
+        out[:, 2 * i - 1] = returns[start - i:n - i]
+
+
+# feature -> (column builder, column names, rows of history consumed before the first valid value).
+# Builders write their columns, in order, into `out`: the feature's columns of the
+# matrix, whose rows are bars start..end.
+FEATURES = {
+    'rsi': (_rsi, lambda period=14: ['RSI'], lambda period=14: period),
+    'macd': (_macd, lambda fast=12, slow=26, signal=9: ['MACD', 'Signal_Line'], lambda fast=12, slow=26, signal=9: 0),
+    'bollinger_bands': (_bollinger_bands, lambda window=20, num_std=2: [f'MA{window}', f'{window}dSTD', 'Upper_Band', 'Lower_Band'],
+                        lambda window=20, num_std=2: window - 1),
+    'roc': (_roc, lambda period=10: ['ROC'], lambda period=10: period),
+    'true_range': (_true_range, lambda: ['TR'], lambda: 1),
+    'atr': (_atr, lambda window=14: ['ATR'], lambda window=14: window),
+    'lags': (_lags, lambda lags=5: [f'{kind}_Lag_{i}' for i in range(1, lags + 1) for kind in ('Close', 'Return')],
+             lambda lags=5: lags + 1),
+}
+
+
+def spec_columns(spec: Sequence[Tuple[str, dict]]) -> List[str]:
+    """
+    Column names of the matrix a spec produces, in order.
+    """
+    return [name for feature, params in spec for name in FEATURES[feature][1](**params)]
+
+
+def spec_warmup(spec: Sequence[Tuple[str, dict]]) -> int:
+    """
+    Rows of history the spec consumes before its first complete row.
+    """
+    return max([FEATURES[feature][2](**params) for feature, params in spec] + [0])
+
+
+class FeatureMatrix:
+    """
+    Model inputs as a single C-contiguous (rows x features) array, with the
+    column names, the row index (bar timestamps) and the Close of each row
+    (used to build targets) as metadata. Slicing rows (`features[a:b]`)
+    returns views, not copies.
+    """
+
+    def __init__(self, values: np.ndarray, columns: List[str], index: pd.Index, close: np.ndarray):
+        self.values = values
+        self.columns = list(columns)
+        self.index = index
+        self.close = close
+
+    def __len__(self):
+        return len(self.values)
+
+    def __getitem__(self, rows: slice) -> 'FeatureMatrix':
+        return FeatureMatrix(self.values[rows], self.columns, self.index[rows], self.close[rows])
+
+    @property
+    def shape(self) -> tuple:
+        return self.values.shape
+
+    @property
+    def dtype(self):
+        return self.values.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.values.nbytes + self.close.nbytes + self.index.nbytes
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    def targets(self) -> np.ndarray:
+        """
+        1 where the next row's Close is higher, else 0 (also for the last row).
+        """
+        targets = np.zeros(len(self.close), dtype=np.int64)
+        targets[:-1] = self.close[1:] > self.close[:-1]
+        return targets
+
+    def fingerprint(self) -> str:
+        """
+        Content hash of the values, index and column names.
+        """
+        digest = hashlib.sha256(np.ascontiguousarray(self.values).view(np.uint8))
+        digest.update(pd.util.hash_pandas_object(self.index, index=False).values.tobytes())
+        digest.update(json.dumps(self.columns).encode())
+        return digest.hexdigest()
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, index=self.index, columns=self.columns)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, columns: List[str], dtype=np.float64) -> 'FeatureMatrix':
+        values = np.ascontiguousarray(df[columns].to_numpy(dtype=dtype))
+        return cls(values, columns, df.index, df['Close'].to_numpy(dtype=np.float64))
+
 
 class FeatureEngineer:
-    def __init__(self):
-        self.scaler = StandardScaler()
+    def __init__(self, dtype=np.float64):
+        """
+        dtype: dtype of the feature matrices built by build() (np.float32 halves their memory).
+        """
+        self._scaler = None
+        self.dtype = np.dtype(dtype)
+
+    @property
+    def scaler(self):
+        # scikit-learn is imported on first use, so building features alone never loads it
+        if self._scaler is None:
+            from sklearn.preprocessing import StandardScaler
+            self._scaler = StandardScaler()
+        return self._scaler
+
+    @scaler.setter
+    def scaler(self, scaler):
+        self._scaler = scaler
+
+    def build(self, df: pd.DataFrame, spec: Sequence[Tuple[str, dict]] = ML_SPEC) -> FeatureMatrix:
+        """
+        Computes the features of `spec` over an OHLCV frame straight into one
+        preallocated C-contiguous matrix. Rows before every feature has its
+        history (the warmup) are not part of the matrix; rows that are NaN for
+        any other reason (missing input data) are dropped.
+        """
+        start = min(spec_warmup(spec), len(df))
+        columns = spec_columns(spec)
+        bars = {column: df[column] for column in OHLCV if column in df.columns}
+
+        # Each builder writes into its own column slice, so no feature is held
+        # as a separate full-length array. Indicators go through the indicator
+        # cache, so rebuilding the features of the same bars (training and
+        # predicting on one frame, sweeps, the server) reuses them; chunked
+        # runs disable the cache around their one-off chunks.
+        matrix = np.empty((len(df) - start, len(columns)), dtype=self.dtype)
+        j = 0
+        with indicators.shared_inputs():
+            for feature, params in spec:
+                builder, names, _ = FEATURES[feature]
+                width = len(names(**params))
+                builder(bars, start, matrix[:, j:j + width], **params)
+                j += width
+
+        close = df['Close'].to_numpy(dtype=np.float64)[start:]
+        index = df.index[start:]
+        valid = ~np.isnan(matrix).any(axis=1) & ~np.isnan(close)
+        for column, series in bars.items():
+            if column != 'Close':
+                valid &= ~np.isnan(series.to_numpy(dtype=np.float64)[start:])
+        if not valid.all():
+            matrix, close, index = matrix[valid], close[valid], index[valid]
+
+        return FeatureMatrix(matrix, columns, index, close)
 
     def add_technical_indicators(self, df: pd.DataFrame) -> pd.DataFrame:
         """
         Adds technical indicators to the DataFrame.
+        Indicators come from the shared, memoized indicator layer.
         """
-        df = df.copy()
-        
-        # RSI
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        df['RSI'] = 100 - (100 / (1 + rs))
-        
-        # MACD
-        exp1 = df['Close'].ewm(span=12, adjust=False).mean()
-        exp2 = df['Close'].ewm(span=26, adjust=False).mean()
-        df['MACD'] = exp1 - exp2
-        df['Signal_Line'] = df['MACD'].ewm(span=9, adjust=False).mean()
-        
-        # Bollinger Bands
-        df['MA20'] = df['Close'].rolling(window=20).mean()
-        df['20dSTD'] = df['Close'].rolling(window=20).std()
-        df['Upper_Band'] = df['MA20'] + (df['20dSTD'] * 2)
-        df['Lower_Band'] = df['MA20'] - (df['20dSTD'] * 2)
-        
-        # Momentum (ROC)
-        df['ROC'] = df['Close'].pct_change(periods=10) * 100
-        
-        # Volatility (ATR - simplified)
-        df['TR'] = np.maximum(
-            (df['High'] - df['Low']), 
-            np.maximum(
-                abs(df['High'] - df['Close'].shift(1)), 
-                abs(df['Low'] - df['Close'].shift(1))
-            )
-        )
-        df['ATR'] = df['TR'].rolling(window=14).mean()
-        
-        return df.dropna()
+        features = self.build(df, INDICATOR_SPEC)
+        return pd.concat([df.loc[features.index], features.to_frame()], axis=1)
 
     def create_lag_features(self, df: pd.DataFrame, lags: int = 5) -> pd.DataFrame:
         """
         Creates lag features for Close price and Returns.
         """
-        df = df.copy()
-        for i in range(1, lags + 1):
-            df[f'Close_Lag_{i}'] = df['Close'].shift(i)
-            df[f'Return_Lag_{i}'] = df['Close'].pct_change().shift(i)
-        return df.dropna()
+        features = self.build(df, (('lags', {'lags': lags}),))
+        return pd.concat([df.loc[features.index], features.to_frame()], axis=1)
 
-    def prepare_data_for_ml(self, df: pd.DataFrame, target_col: str = 'Target') -> tuple:
+    def feature_columns(self, df: pd.DataFrame) -> list:
         """
-        Prepares data for Scikit-Learn models.
+        Returns the model input columns of a feature DataFrame.
         """
-        # Define features (exclude OHLC if we only want indicators/lags, or keep them)
-        # Let's use indicators and lags
-        feature_cols = [c for c in df.columns if c not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Target', 'Signal']]
-        
-        X = df[feature_cols].values
-        y = df[target_col].values
-        
+        return [c for c in df.columns if c not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Target', 'Signal']]
+
+    def _as_matrix(self, features) -> FeatureMatrix:
+        if isinstance(features, FeatureMatrix):
+            return features
+        return FeatureMatrix.from_frame(features, self.feature_columns(features), self.dtype)
+
+    def prepare_data_for_ml(self, features, targets: Optional[np.ndarray] = None, fit: bool = True) -> tuple:
+        """
+        Prepares data for Scikit-Learn models from a FeatureMatrix (or a feature DataFrame).
+        fit: fit the scaler on this data (training) or reuse the fitted one (inference).
+        Returns (X_scaled, targets, feature_cols); the scaled matrix keeps the feature dtype.
+        """
+        features = self._as_matrix(features)
+        X = features.values
+
         # Scale features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        return X_scaled, y, feature_cols
+        X_scaled = self.scaler.fit_transform(X) if fit else self.scaler.transform(X)
+
+        return X_scaled, targets, features.columns
 
-    def prepare_data_for_lstm(self, df: pd.DataFrame, target_col: str = 'Target', time_steps: int = 60) -> tuple:
+    def prepare_data_for_lstm(self, features, targets: Optional[np.ndarray] = None, time_steps: int = 60, fit: bool = True) -> tuple:
         """
-        Prepares data for LSTM (3D array).
+        Prepares data for LSTM (3D array) from a FeatureMatrix (or a feature DataFrame).
+        X is a read-only sliding-window view of shape (samples, time_steps, features)
+        over the scaled feature matrix, so rows are not copied once per window.
+        Window i covers rows [i, i + time_steps) and predicts targets[i + time_steps].
+        fit: fit the scaler on this data (training) or reuse the fitted one (inference).
         """
-        feature_cols = [c for c in df.columns if c not in ['Open', 'High', 'Low', 'Close', 'Volume', 'Target', 'Signal']]
-        data = df[feature_cols].values
-        
+        features = self._as_matrix(features)
+        n_features = len(features.columns)
+
         # Scale data
-        data_scaled = self.scaler.fit_transform(data)
-        
-        X, y = [], []
-        # We need to align target with the end of the sequence
-        # If we want to predict T+1 using T-60 to T, target should be at T+1 (or T if we shift target)
-        # Assumes 'Target' column is already aligned such that row i contains the target for the prediction made at i
-        
-        targets = df[target_col].values
-        
-        for i in range(time_steps, len(data)):
-            X.append(data_scaled[i-time_steps:i])
-            y.append(targets[i])
-            
-        return np.array(X), np.array(y), feature_cols
+        data_scaled = self.scaler.fit_transform(features.values) if fit else self.scaler.transform(features.values)
+
+        if len(data_scaled) <= time_steps:
+            y = None if targets is None else targets[:0]
+            return np.empty((0, time_steps, n_features), dtype=data_scaled.dtype), y, features.columns
+
+        windows = np.lib.stride_tricks.sliding_window_view(data_scaled, time_steps, axis=0)
+        X = windows[:-1].transpose(0, 2, 1)
+        y = None if targets is None else targets[time_steps:]
+
+        return X, y, features.columns
+
+    def write_feature_file(self, features, path: str, targets: Optional[np.ndarray] = None, chunk_size: int = 100_000) -> str:
+        """
+        Writes a FeatureMatrix (or feature DataFrame) and its targets to a float32
+        .npy file (target in the last column) that can later be memory-mapped for
+        streaming training. Targets default to features.targets().
+        """
+        features = self._as_matrix(features)
+        if targets is None:
+            targets = features.targets()
+        table = np.lib.format.open_memmap(path, mode='w+', dtype=np.float32, shape=(len(features), len(features.columns) + 1))
+        for start in range(0, len(features), chunk_size):
+            stop = min(start + chunk_size, len(features))
+            table[start:stop, :-1] = features.values[start:stop]
+            table[start:stop, -1] = targets[start:stop]
+        table.flush()
+
+        with open(path + '.json', 'w') as f:
+            json.dump(features.columns, f)
+        return path
+
+    def load_feature_file(self, path: str) -> tuple:
+        """
+        Memory-maps a file written by write_feature_file.
+        Returns (features, targets, feature_cols) without reading the data.
+        """
+        table = np.load(path, mmap_mode='r')
+        with open(path + '.json') as f:
+            feature_cols = json.load(f)
+        return table[:, :-1], table[:, -1], feature_cols
+
+    def partial_fit_scaler(self, data: np.ndarray, chunk_size: int = 100_000):
+        """
+        Fits the scaler chunk by chunk, so `data` is never scaled as a whole.
+        """
+        from sklearn.preprocessing import StandardScaler
+        self.scaler = StandardScaler()
+        for start in range(0, len(data), chunk_size):
+            self.scaler.partial_fit(data[start:start + chunk_size])
+
+    def lstm_window_batch(self, data: np.ndarray, targets: np.ndarray, start: int, stop: int, time_steps: int = 60) -> tuple:
+        """
+        Builds LSTM windows start..stop-1 (numbered as in prepare_data_for_lstm),
+        scaling only the rows those windows cover.
+        """
+        rows = self.scaler.transform(data[start:stop + time_steps - 1])
+        X = np.lib.stride_tricks.sliding_window_view(rows, time_steps, axis=0).transpose(0, 2, 1)
+        y = targets[start + time_steps:stop + time_steps]
+        return X, y
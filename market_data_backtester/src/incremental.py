@@ -0,0 +1,238 @@
+import math
+from collections import deque
+
+NAN = float('nan')
+
+
+class SMA:
+    """
+    Simple moving average with O(1) updates. NaN inputs are skipped, and the
+    value is NaN until the window holds `min_periods` valid observations
+    (same semantics as pandas rolling().mean()).
+    """
+
+    def __init__(self, window: int, min_periods: int = None):
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.count = 0
+        # Neumaier-compensated running sum, so long streams do not drift
+        self.total = 0.0
+        self.compensation = 0.0
+        self.value = NAN
+
+    def _add(self, x: float):
+        t = self.total + x
+        if abs(self.total) >= abs(x):
+            self.compensation += (self.total - t) + x
+        else:
+            self.compensation += (x - t) + self.total
+        self.total = t
+
+    def update(self, x: float) -> float:
+        self.values.append(x)
+        if not math.isnan(x):
+            self._add(x)
+            self.count += 1
+        if len(self.values) > self.window:
+            old = self.values.popleft()
+            if not math.isnan(old):
+                self._add(-old)
+                self.count -= 1
+        if self.count >= self.min_periods and self.count > 0:
+            self.value = (self.total + self.compensation) / self.count
+        else:
+            self.value = NAN
+        return self.value
+
+
+class RollingStd:
+    """
+    Rolling mean and sample standard deviation over a fixed window, using
+    Welford's add/remove updates (the same online scheme pandas uses).
+    """
+
+    def __init__(self, window: int):
+        self.window = window
+        self.values = deque()
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.values.append(x)
+        n = len(self.values)
+        delta = x - self.mean
+        self.mean += delta / n
+        self.m2 += delta * (x - self.mean)
+        if n > self.window:
+            old = self.values.popleft()
+            n -= 1
+            delta = old - self.mean
+            self.mean -= delta / n
+            self.m2 -= delta * (old - self.mean)
+        if n >= self.window and n > 1:
+            self.value = math.sqrt(max(self.m2, 0.0) / (n - 1))
+        else:
+            self.value = NAN
+        return self.value
+
+
+class EMA:
+    """
+    Exponential moving average, seeded with the first value
+    (pandas ewm(span=..., adjust=False)).
+    """
+
+    def __init__(self, span: int):
+        self.alpha = 2.0 / (span + 1)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        if math.isnan(self.value):
+            self.value = x
+        else:
+            self.value = self.alpha * x + (1 - self.alpha) * self.value
+        return self.value
+
+
+class RSI:
+    """
+    Relative Strength Index.
+    wilder=False: simple rolling means of gains and losses, matching
+    indicators.rsi (the first bar counts as a zero change).
+    wilder=True: Wilder smoothing, seeded with the mean of the first `period` changes.
+    """
+
+    def __init__(self, period: int = 14, wilder: bool = False):
+        self.period = period
+        self.wilder = wilder
+        self.prev = NAN
+        self.value = NAN
+        if wilder:
+            self.avg_gain = self.avg_loss = NAN
+            self.seed_gains = []
+            self.seed_losses = []
+        else:
+            self.gain = SMA(period)
+            self.loss = SMA(period)
+
+    def update(self, x: float) -> float:
+        delta = x - self.prev
+        self.prev = x
+        gain = delta if delta > 0 else 0.0
+        loss = -delta if delta < 0 else 0.0
+
+        if not self.wilder:
+            avg_gain, avg_loss = self.gain.update(gain), self.loss.update(loss)
+        elif math.isnan(delta):
+            return self.value
+        elif math.isnan(self.avg_gain):
+            self.seed_gains.append(gain)
+            self.seed_losses.append(loss)
+            if len(self.seed_gains) < self.period:
+                return self.value
+            self.avg_gain = sum(self.seed_gains) / self.period
+            self.avg_loss = sum(self.seed_losses) / self.period
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+            avg_gain, avg_loss = self.avg_gain, self.avg_loss
+
+        if math.isnan(avg_gain) or math.isnan(avg_loss) or (avg_gain == 0 and avg_loss == 0):
+            self.value = NAN
+        elif avg_loss == 0:
+            self.value = 100.0
+        else:
+            self.value = 100 - (100 / (1 + avg_gain / avg_loss))
+        return self.value
+
+
+class MACD:
+    """
+    MACD line (fast EMA - slow EMA) and its signal line.
+    """
+
+    def __init__(self, fast: int = 12, slow: int = 26, signal: int = 9):
+        self.fast = EMA(fast)
+        self.slow = EMA(slow)
+        self.signal = EMA(signal)
+        self.value = NAN
+        self.signal_value = NAN
+
+    def update(self, x: float) -> float:
+        self.value = self.fast.update(x) - self.slow.update(x)
+        self.signal_value = self.signal.update(self.value)
+        return self.value
+
+
+class BollingerBands:
+    """
+    Moving average with upper and lower bands `num_std` standard deviations away.
+    """
+
+    def __init__(self, window: int = 20, num_std: float = 2.0):
+        self.std = RollingStd(window)
+        self.num_std = num_std
+        self.value = self.upper = self.lower = NAN
+
+    def update(self, x: float) -> float:
+        std = self.std.update(x)
+        self.value = self.std.mean if not math.isnan(std) else NAN
+        self.upper = self.value + std * self.num_std
+        self.lower = self.value - std * self.num_std
+        return self.value
+
+
+class ATR:
+    """
+    Simplified ATR: simple moving average of the true range (indicators.atr).
+    Takes the bar's high, low and close.
+    """
+
+    def __init__(self, window: int = 14):
+        self.tr = SMA(window)
+        self.prev_close = NAN
+        self.value = NAN
+
+    def update(self, high: float, low: float, close: float) -> float:
+        if math.isnan(self.prev_close):
+            true_range = NAN
+        else:
+            true_range = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = close
+        self.value = self.tr.update(true_range)
+        return self.value
+
+
+class ROC:
+    """
+    Rate of change in percent over `period` bars.
+    """
+
+    def __init__(self, period: int = 10):
+        self.history = deque(maxlen=period + 1)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.history.append(x)
+        if len(self.history) == self.history.maxlen:
+            self.value = (x / self.history[0] - 1) * 100
+        return self.value
+
+
+class Momentum:
+    """
+    Price change over `period` bars.
+    """
+
+    def __init__(self, period: int = 10):
+        self.history = deque(maxlen=period + 1)
+        self.value = NAN
+
+    def update(self, x: float) -> float:
+        self.history.append(x)
+        if len(self.history) == self.history.maxlen:
+            self.value = x - self.history[0]
+        return self.value
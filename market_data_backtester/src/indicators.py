@@ -0,0 +1,179 @@
+import hashlib
+import threading
+from contextlib import contextmanager
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from .lru import BoundedCache
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, tuple):
+        return sum(_nbytes(v) for v in value)
+    return value.nbytes if isinstance(value, (pd.Series, np.ndarray)) else 0
+
+
+class IndicatorCache(BoundedCache):
+    """
+    LRU cache of computed indicator Series, keyed by indicator name, parameters
+    and a content hash of the input series, bounded by the total size of the
+    cached values and/or their number. Cached Series are shared between
+    consumers and must be treated as read-only.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = 256 * 2**20, max_items: Optional[int] = None):
+        super().__init__(max_bytes, max_items, sizeof=_nbytes)
+        self._local = threading.local()
+
+    @property
+    def enabled(self) -> bool:
+        return not getattr(self._local, 'disabled', False)
+
+    @contextmanager
+    def disabled(self):
+        """
+        Computes without caching on the current thread, e.g. for the one-off
+        chunks of a streamed run that would only evict reusable entries.
+        """
+        previous = getattr(self._local, 'disabled', False)
+        self._local.disabled = True
+        try:
+            yield
+        finally:
+            self._local.disabled = previous
+
+
+cache = IndicatorCache()
+
+
+_scope = threading.local()
+
+
+@contextmanager
+def shared_inputs():
+    """
+    Within this block each input column is hashed once, however many
+    indicators are computed from it and however often it is taken from its
+    frame (`df['Close']` is a new Series every time). The inputs must not be
+    modified inside the block: they are recognized by the memory they view
+    and their index, not by content.
+    """
+    previous = getattr(_scope, 'fingerprints', None)
+    _scope.fingerprints = {} if previous is None else previous
+    try:
+        yield
+    finally:
+        _scope.fingerprints = previous
+
+
+def fingerprint(series: pd.Series) -> str:
+    """
+    Content hash of a series' values and index.
+    """
+    fingerprints = getattr(_scope, 'fingerprints', None)
+    if fingerprints is not None:
+        values = series.to_numpy()
+        # The Series is kept alongside its hash, so its memory and index cannot be reused within the block
+        key = (values.__array_interface__['data'][0], values.shape, values.strides, values.dtype.str, id(series.index))
+        entry = fingerprints.get(key)
+        if entry is None:
+            entry = fingerprints[key] = (series, _fingerprint(series))
+        return entry[1]
+    return _fingerprint(series)
+
+
+def _fingerprint(series: pd.Series) -> str:
+    index = series.index
+    index_values = index.asi8 if isinstance(index, pd.DatetimeIndex) else pd.util.hash_array(index.to_numpy())
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(np.ascontiguousarray(series.to_numpy(dtype=np.float64)).view(np.uint8))
+    digest.update(np.ascontiguousarray(index_values).view(np.uint8))
+    return digest.hexdigest()
+
+
+def _memoize(name: str, params: tuple, inputs: Tuple[pd.Series, ...], compute: Callable):
+    if not cache.enabled:
+        return compute()
+    key = (name, params) + tuple(fingerprint(s) for s in inputs)
+    return cache.get_or_compute(key, compute)
+
+
+def sma(close: pd.Series, window: int, min_periods: int = None) -> pd.Series:
+    return _memoize('sma', (window, min_periods), (close,),
+                    lambda: close.rolling(window=window, min_periods=min_periods).mean())
+
+
+def rolling_std(close: pd.Series, window: int) -> pd.Series:
+    return _memoize('rolling_std', (window,), (close,),
+                    lambda: close.rolling(window=window).std())
+
+
+def ema(close: pd.Series, span: int) -> pd.Series:
+    return _memoize('ema', (span,), (close,),
+                    lambda: close.ewm(span=span, adjust=False).mean())
+
+
+def rsi(close: pd.Series, period: int = 14) -> pd.Series:
+    """
+    RSI using simple rolling means of gains and losses.
+    """
+    def compute():
+        delta = close.diff()
+        gain = (delta.where(delta > 0, 0)).rolling(window=period).mean()
+        loss = (-delta.where(delta < 0, 0)).rolling(window=period).mean()
+        rs = gain / loss
+        return 100 - (100 / (1 + rs))
+    return _memoize('rsi', (period,), (close,), compute)
+
+
+def macd(close: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series]:
+    """
+    Returns the MACD line and its signal line.
+    """
+    def compute():
+        macd_line = ema(close, fast) - ema(close, slow)
+        return macd_line, macd_line.ewm(span=signal, adjust=False).mean()
+    return _memoize('macd', (fast, slow, signal), (close,), compute)
+
+
+def bollinger_bands(close: pd.Series, window: int = 20, num_std: float = 2.0) -> Tuple[pd.Series, pd.Series, pd.Series, pd.Series]:
+    """
+    Returns the moving average, rolling standard deviation, upper and lower band.
+    """
+    def compute():
+        ma = sma(close, window)
+        std = rolling_std(close, window)
+        return ma, std, ma + (std * num_std), ma - (std * num_std)
+    return _memoize('bollinger_bands', (window, num_std), (close,), compute)
+
+
+def roc(close: pd.Series, period: int = 10) -> pd.Series:
+    return _memoize('roc', (period,), (close,),
+                    lambda: close.pct_change(periods=period) * 100)
+
+
+def momentum(close: pd.Series, period: int = 10) -> pd.Series:
+    return _memoize('momentum', (period,), (close,),
+                    lambda: close - close.shift(period))
+
+
+def true_range(high: pd.Series, low: pd.Series, close: pd.Series) -> pd.Series:
+    def compute():
+        prev_close = close.shift(1)
+        return np.maximum(
+            (high - low),
+            np.maximum(
+                abs(high - prev_close),
+                abs(low - prev_close)
+            )
+        )
+    return _memoize('true_range', (), (high, low, close), compute)
+
+
+def atr(high: pd.Series, low: pd.Series, close: pd.Series, window: int = 14) -> pd.Series:
+    """
+    Simplified ATR: simple rolling mean of the true range.
+    """
+    return _memoize('atr', (window,), (high, low, close),
+                    lambda: true_range(high, low, close).rolling(window=window).mean())
@@ -0,0 +1,227 @@
+"""
+Tight loops for stateful position logic (stops, holds, sizing).
+
+The kernels work on contiguous float64 arrays and are JIT-compiled with numba
+(listed in requirements.txt) when it is installed. Without numba the same
+functions run as plain Python, which is slow (seconds per million bars), so
+the paths that are not path-dependent have vectorized NumPy versions:
+`ffill_nonzero`, and `simulate_positions` when no stops are set.
+numba is imported on the first kernel call, not at import time.
+"""
+import functools
+import importlib.util
+import types
+
+import numpy as np
+
+HAVE_NUMBA = importlib.util.find_spec('numba') is not None
+
+
+def njit(func):
+    """
+    Compiles `func` with numba.njit on its first call (plain Python without numba).
+    Other kernels it calls are compiled along with it.
+    """
+    compiled = None
+
+    def compile():
+        nonlocal compiled
+        if compiled is None:
+            if HAVE_NUMBA:
+                from numba import njit as numba_njit
+                # numba can only call kernels that are compiled themselves
+                kernels = {name: func.__globals__[name].compile() for name in func.__code__.co_names
+                           if hasattr(func.__globals__.get(name), 'compile')}
+                if kernels:
+                    func_globals = {**func.__globals__, **kernels}
+                    func_copy = types.FunctionType(func.__code__, func_globals, func.__name__, func.__defaults__, func.__closure__)
+                    compiled = numba_njit(cache=True)(functools.update_wrapper(func_copy, func))
+                else:
+                    compiled = numba_njit(cache=True)(func)
+            else:
+                compiled = func
+        return compiled
+
+    @functools.wraps(func)
+    def wrapper(*args):
+        return (compiled or compile())(*args)
+    wrapper.compile = compile
+    return wrapper
+
+
+@njit
+def _ffill_nonzero_1d(signals, initial):
+    out = np.empty_like(signals)
+    current = initial
+    for i in range(len(signals)):
+        if signals[i] != 0:
+            current = signals[i]
+        out[i] = current
+    return out
+
+
+def ffill_nonzero(signals: np.ndarray, initial: float = 0.0) -> np.ndarray:
+    """
+    Holds every non-zero signal until the next non-zero one ("hold until exit").
+    Rows before the first non-zero signal take `initial`. Works column-wise on 2D input.
+    """
+    signals = np.ascontiguousarray(signals, dtype=np.float64)
+    if HAVE_NUMBA and signals.ndim == 1:
+        return _ffill_nonzero_1d(signals, initial)
+
+    rows = np.arange(len(signals)).reshape((-1,) + (1,) * (signals.ndim - 1))
+    last = np.maximum.accumulate(np.where(signals != 0, rows, -1), axis=0)
+    filled = np.take_along_axis(signals, np.maximum(last, 0), axis=0)
+    return np.where(last >= 0, filled, initial)
+
+
+def position_state() -> np.ndarray:
+    """
+    Fresh carry-over state for simulate_positions: position, entry price,
+    best price since entry, blocked direction, previous close, started flag.
+    """
+    return np.array([0.0, 0.0, 0.0, 0.0, np.nan, 0.0])
+
+
+@njit
+def _step(state, signal, size, open_, high, low, close, stop_loss, take_profit, trailing_stop):
+    # One bar of _simulate_positions: updates `state` in place and returns the bar's return
+    position = state[0]
+    entry_price = state[1]
+    extreme = state[2]      # highest high while long, lowest low while short
+    blocked = state[3]      # direction that was stopped out; not re-entered until the signal changes
+    prev_close = state[4]
+
+    bar_return = np.nan
+    if state[5] > 0:
+        exit_price = np.nan
+        if position > 0:
+            stop = -np.inf
+            if stop_loss > 0:
+                stop = entry_price * (1 - stop_loss)
+            if trailing_stop > 0:
+                stop = max(stop, extreme * (1 - trailing_stop))
+            target = entry_price * (1 + take_profit) if take_profit > 0 else np.inf
+            # If both levels are inside the bar, assume the stop was hit first
+            if low <= stop:
+                exit_price = min(open_, stop)
+            elif high >= target:
+                exit_price = max(open_, target)
+            else:
+                extreme = max(extreme, high)
+        elif position < 0:
+            stop = np.inf
+            if stop_loss > 0:
+                stop = entry_price * (1 + stop_loss)
+            if trailing_stop > 0:
+                stop = min(stop, extreme * (1 + trailing_stop))
+            target = entry_price * (1 - take_profit) if take_profit > 0 else -np.inf
+            if high >= stop:
+                exit_price = max(open_, stop)
+            elif low <= target:
+                exit_price = min(open_, target)
+            else:
+                extreme = min(extreme, low)
+
+        if np.isnan(exit_price):
+            bar_return = position * (close / prev_close - 1)
+        else:
+            bar_return = position * (exit_price / prev_close - 1)
+            blocked = np.sign(position)
+            position = 0.0
+
+    direction = np.sign(signal)
+    if direction != blocked:
+        blocked = 0.0
+    if direction == 0 or direction == blocked:
+        position = 0.0
+    elif direction != np.sign(position):
+        # New entry at this bar's close
+        entry_price = close
+        extreme = close
+        position = signal * size
+    else:
+        position = signal * size
+
+    state[0] = position
+    state[1] = entry_price
+    state[2] = extreme
+    state[3] = blocked
+    state[4] = close
+    state[5] = 1.0
+    return bar_return
+
+
+@njit
+def _simulate_positions(signals, size, open_, high, low, close, stop_loss, take_profit, trailing_stop, state):
+    n = len(close)
+    positions = np.zeros(n)
+    returns = np.full(n, np.nan)
+    for t in range(n):
+        returns[t] = _step(state, signals[t], size[t], open_[t], high[t], low[t], close[t],
+                           stop_loss, take_profit, trailing_stop)
+        positions[t] = state[0]
+    return positions, returns
+
+
+def _hold_positions(signals, size, close, state):
+    # simulate_positions without stops: the position is the sized signal, held for one bar
+    positions = signals * size
+    if len(close) == 0:
+        return positions, np.full(0, np.nan)
+    held = np.concatenate((state[:1], positions[:-1]))
+    prev_close = np.concatenate((state[4:5], close[:-1]))
+    returns = held * (close / prev_close - 1)
+    if not state[5] > 0:
+        returns[0] = np.nan
+    state[0] = positions[-1]
+    state[4] = close[-1]
+    state[5] = 1.0
+    return positions, returns
+
+
+def simulate_positions(signals, close, high=None, low=None, open_=None, size=1.0,
+                       stop_loss: float = None, take_profit: float = None, trailing_stop: float = None,
+                       state: np.ndarray = None):
+    """
+    Turns target signals into realized positions and per-bar returns.
+
+    Same timing as BacktestEngine: the position set at the close of bar t earns
+    bar t+1's return. While a position is open, each bar's high/low is checked
+    against the stop-loss, take-profit and trailing-stop levels (fractions of the
+    entry price / best price since entry). A triggered exit fills at that level,
+    or at the open if the bar gapped through it, and the strategy then stays flat
+    until its signal changes. `size` scales positions (scalar or per-bar array).
+
+    Returns (positions, returns); returns[0] is NaN unless a `state` from
+    position_state() is passed, which is updated in place so that the next
+    call continues where this one stopped (chunked runs). Entry and best
+    prices are only tracked in the state while stops are set.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    high = close if high is None else np.ascontiguousarray(high, dtype=np.float64)
+    low = close if low is None else np.ascontiguousarray(low, dtype=np.float64)
+    open_ = close if open_ is None else np.ascontiguousarray(open_, dtype=np.float64)
+    signals = np.ascontiguousarray(signals, dtype=np.float64)
+    size = np.ascontiguousarray(np.broadcast_to(np.asarray(size, dtype=np.float64), close.shape))
+
+    if state is None:
+        state = position_state()
+
+    if not (stop_loss or take_profit or trailing_stop) and state[3] == 0:
+        return _hold_positions(signals, size, close, state)
+    return _simulate_positions(signals, size, open_, high, low, close,
+                               stop_loss or 0.0, take_profit or 0.0, trailing_stop or 0.0, state)
+
+
+def step_position(state: np.ndarray, signal: float, close: float, high: float, low: float, open_: float,
+                  size: float = 1.0, stop_loss: float = None, take_profit: float = None,
+                  trailing_stop: float = None):
+    """
+    simulate_positions for a single bar, for event-driven runs: updates
+    `state` (from position_state()) in place and returns (position, return).
+    The first bar's return is NaN.
+    """
+    bar_return = _step(state, float(signal), float(size), float(open_), float(high), float(low), float(close),
+                       stop_loss or 0.0, take_profit or 0.0, trailing_stop or 0.0)
+    return state[0], bar_return
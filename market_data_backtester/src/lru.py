@@ -0,0 +1,88 @@
+"""
+Size-bounded LRU cache shared by the indicator cache and the backtest service.
+"""
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, Optional
+
+
+class BoundedCache:
+    """
+    Thread-safe LRU cache bounded by total size (as measured by `sizeof`)
+    and/or number of entries. Concurrent requests for a missing key wait for a
+    single computation instead of repeating it.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_items: Optional[int] = None,
+                 sizeof: Callable = lambda value: 0):
+        self.max_bytes = max_bytes
+        self.max_items = max_items
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.nbytes = 0
+        self._entries = OrderedDict()   # key -> (value, size)
+        self._pending = {}              # key -> lock held while the value is computed
+        self._lock = threading.Lock()
+
+    def _lookup(self, key: Hashable):
+        # Caller holds self._lock
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+        return False, None
+
+    def get_or_compute(self, key: Hashable, compute: Callable):
+        with self._lock:
+            found, value = self._lookup(key)
+            if found:
+                return value
+            key_lock = self._pending.setdefault(key, threading.Lock())
+
+        with key_lock:
+            with self._lock:
+                found, value = self._lookup(key)
+                if found:
+                    return value
+                self.misses += 1
+            try:
+                value = compute()
+                size = self.sizeof(value)
+                with self._lock:
+                    self._entries[key] = (value, size)
+                    self.nbytes += size
+                    self._evict()
+            finally:
+                with self._lock:
+                    self._pending.pop(key, None)
+        return value
+
+    def _evict(self):
+        # Caller holds self._lock; the newest entry is always kept
+        while len(self._entries) > 1 and (
+                (self.max_items is not None and len(self._entries) > self.max_items)
+                or (self.max_bytes is not None and self.nbytes > self.max_bytes)):
+            _, (_, size) = self._entries.popitem(last=False)
+            self.nbytes -= size
+            self.evictions += 1
+
+    def clear(self):
+        """
+        Drops every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {'entries': len(self._entries), 'bytes': self.nbytes, 'hits': self.hits,
+                    'misses': self.misses, 'evictions': self.evictions}
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,223 @@
+"""
+TensorFlow-free inference for trained LSTMStrategy models.
+
+export_model() writes the weights of a Keras LSTM/Dense stack (plus the
+fitted scaler and feature settings) to one .npz file. NumpyLSTM runs the
+same forward pass in batched NumPy, and NumpyLSTMStrategy generates the
+signals of LSTMStrategy from such a file. Nothing here imports TensorFlow,
+so signal-generation workers skip its import time and memory.
+"""
+import json
+
+import numpy as np
+import pandas as pd
+
+from .features import INDICATOR_SPEC, FeatureEngineer, FeatureMatrix, spec_columns
+from .strategies import Strategy
+from . import profiling
+
+FORMAT_VERSION = 1
+
+
+def _sigmoid(x):
+    # Same as 1 / (1 + exp(-x)), without overflow warnings for large |x|
+    return 0.5 * (1.0 + np.tanh(0.5 * x))
+
+
+def _relu(x):
+    return np.maximum(x, 0.0)
+
+
+def _linear(x):
+    return x
+
+
+ACTIVATIONS = {'sigmoid': _sigmoid, 'tanh': np.tanh, 'relu': _relu, 'linear': _linear}
+
+
+def _activation(name: str):
+    if name not in ACTIVATIONS:
+        raise ValueError(f"Unsupported activation: {name} (expected one of {', '.join(ACTIVATIONS)})")
+    return ACTIVATIONS[name]
+
+
+def export_model(model, path: str, scaler=None, **meta) -> str:
+    """
+    Writes the LSTM and Dense layers of a Keras Sequential model to `path`
+    (.npz). Dropout is the identity at inference and is left out. A fitted
+    StandardScaler is stored as its mean and scale; `meta` (JSON-serializable)
+    is stored alongside, e.g. the time steps and feature columns.
+    """
+    layers, arrays = [], {}
+    for layer in model.layers:
+        kind = type(layer).__name__
+        if kind == 'Dropout':
+            continue
+        if kind not in ('LSTM', 'Dense'):
+            raise ValueError(f"Cannot export {kind} layers (only LSTM, Dense and Dropout)")
+        config = layer.get_config()
+        weights = layer.get_weights()
+        prefix = f'layer{len(layers)}'
+        if kind == 'LSTM':
+            spec = {'type': 'lstm', 'units': config['units'], 'activation': config['activation'],
+                    'recurrent_activation': config['recurrent_activation'],
+                    'return_sequences': config['return_sequences']}
+            names = ['kernel', 'recurrent_kernel', 'bias']
+        else:
+            spec = {'type': 'dense', 'activation': config['activation']}
+            names = ['kernel', 'bias']
+        _activation(spec['activation'])
+        if 'recurrent_activation' in spec:
+            _activation(spec['recurrent_activation'])
+        for name, weight in zip(names, weights):
+            arrays[f'{prefix}_{name}'] = weight
+        layers.append(spec)
+
+    if scaler is not None:
+        arrays['scaler_mean'] = scaler.mean_
+        arrays['scaler_scale'] = scaler.scale_
+    meta = {'format': FORMAT_VERSION, 'layers': layers, **meta}
+    with open(path, 'wb') as f:
+        np.savez(f, meta=np.array(json.dumps(meta)), **arrays)
+    return path
+
+
+class NumpyLSTM:
+    """
+    Batched NumPy forward pass of an exported LSTM/Dense stack.
+    Keras gate order (input, forget, cell, output) and activations are
+    reproduced; the input projection of every time step of a batch is one
+    matrix product, so only the recurrent product runs per step.
+    """
+
+    def __init__(self, layers: list, weights: dict, dtype=np.float32):
+        self.layers = layers
+        self.dtype = np.dtype(dtype)
+        self.weights = {name: np.ascontiguousarray(value, dtype=self.dtype) for name, value in weights.items()}
+
+    @classmethod
+    def load(cls, path: str, dtype=np.float32) -> 'NumpyLSTM':
+        model, _, _ = cls.load_export(path, dtype)
+        return model
+
+    @classmethod
+    def load_export(cls, path: str, dtype=np.float32) -> tuple:
+        """
+        Returns (model, meta, arrays): the network, the exported metadata and
+        the remaining arrays (e.g. the scaler).
+        """
+        with np.load(path) as archive:
+            arrays = {name: archive[name] for name in archive.files}
+        meta = json.loads(str(arrays.pop('meta')))
+        if meta.get('format') != FORMAT_VERSION:
+            raise ValueError(f"Unsupported export format in {path}: {meta.get('format')}")
+        weights = {name: arrays.pop(name) for name in list(arrays) if name.startswith('layer')}
+        return cls(meta['layers'], weights, dtype), meta, arrays
+
+    def _lstm(self, x: np.ndarray, i: int, spec: dict) -> np.ndarray:
+        kernel = self.weights[f'layer{i}_kernel']
+        recurrent_kernel = self.weights[f'layer{i}_recurrent_kernel']
+        bias = self.weights.get(f'layer{i}_bias')
+        activation = _activation(spec['activation'])
+        recurrent_activation = _activation(spec['recurrent_activation'])
+        units = spec['units']
+
+        n, time_steps, _ = x.shape
+        projected = (x.reshape(n * time_steps, -1) @ kernel).reshape(n, time_steps, 4 * units)
+        if bias is not None:
+            projected += bias
+        h = np.zeros((n, units), dtype=self.dtype)
+        c = np.zeros((n, units), dtype=self.dtype)
+        outputs = np.empty((n, time_steps, units), dtype=self.dtype) if spec['return_sequences'] else None
+        for t in range(time_steps):
+            z = h @ recurrent_kernel
+            z += projected[:, t]
+            input_gate = recurrent_activation(z[:, :units])
+            forget_gate = recurrent_activation(z[:, units:2 * units])
+            candidate = activation(z[:, 2 * units:3 * units])
+            output_gate = recurrent_activation(z[:, 3 * units:])
+            c = forget_gate * c + input_gate * candidate
+            h = output_gate * activation(c)
+            if outputs is not None:
+                outputs[:, t] = h
+        return h if outputs is None else outputs
+
+    def _dense(self, x: np.ndarray, i: int, spec: dict) -> np.ndarray:
+        out = x @ self.weights[f'layer{i}_kernel']
+        bias = self.weights.get(f'layer{i}_bias')
+        if bias is not None:
+            out += bias
+        return _activation(spec['activation'])(out)
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        x = np.ascontiguousarray(x, dtype=self.dtype)
+        for i, spec in enumerate(self.layers):
+            x = self._lstm(x, i, spec) if spec['type'] == 'lstm' else self._dense(x, i, spec)
+        return x
+
+    def predict(self, X: np.ndarray, batch_size: int = 1024) -> np.ndarray:
+        """
+        Predictions for a (samples, time_steps, features) array, e.g. the
+        window view of prepare_data_for_lstm, copied out one batch at a time.
+        """
+        batches = [self.forward(X[start:start + batch_size]) for start in range(0, len(X), batch_size)]
+        if not batches:
+            return np.empty((0, self.weights[f'layer{len(self.layers) - 1}_kernel'].shape[1]), dtype=self.dtype)
+        return np.concatenate(batches)
+
+
+class NumpyLSTMStrategy(Strategy):
+    """
+    Signals of a trained LSTMStrategy from its export (LSTMStrategy.export),
+    computed without TensorFlow. Matches LSTMStrategy's predictions within
+    float32 round-off; probabilities within that of 0.5 may flip.
+    """
+
+    def __init__(self, model_path: str, batch_size: int = 1024, feature_dtype: str = 'float32'):
+        """
+        model_path: .npz file written by LSTMStrategy.export.
+        batch_size: windows per forward pass (memory grows with it).
+        """
+        self.model_path = model_path
+        self.batch_size = batch_size
+        self.feature_dtype = feature_dtype
+        self.feature_engineer = FeatureEngineer(dtype=feature_dtype)
+        self.model, meta, arrays = NumpyLSTM.load_export(model_path)
+        self.time_steps = meta['time_steps']
+        # Identifies the training run, so stored results follow re-exports
+        self.fitted_on = meta.get('fitted_on')
+        if meta['columns'] != spec_columns(INDICATOR_SPEC):
+            raise ValueError(f"{model_path} was exported with other features: {meta['columns']}")
+        self._mean = arrays['scaler_mean']
+        self._scale = arrays['scaler_scale']
+
+    @property
+    def lookback(self) -> int:
+        return self.time_steps
+
+    def build_features(self, df: pd.DataFrame) -> FeatureMatrix:
+        return self.feature_engineer.build(df, INDICATOR_SPEC)
+
+    def generate_signals(self, df: pd.DataFrame) -> pd.Series:
+        features = self.build_features(df)
+
+        return self.predict_features(features).reindex(df.index).fillna(0)
+
+    def predict_features(self, features: FeatureMatrix) -> pd.Series:
+        """
+        Same windows and alignment as LSTMStrategy.predict_features.
+        """
+        valid_index = features.index[self.time_steps:]
+        if len(valid_index) == 0:
+            return pd.Series(np.empty(0), index=valid_index)
+
+        # Scaled like StandardScaler.transform with the scaler fitted in training
+        data_scaled = (features.values - self._mean) / self._scale
+        windows = np.lib.stride_tricks.sliding_window_view(data_scaled, self.time_steps, axis=0)
+        X = windows[:-1].transpose(0, 2, 1)
+
+        with profiling.stage('NumpyLSTMStrategy.predict', rows=len(X)):
+            probs = self.model.predict(X, self.batch_size)
+        signals = np.where(probs[:, 0] > 0.5, 1.0, -1.0)
+
+        return pd.Series(signals, index=valid_index)
@@ -1,59 +1,191 @@
 import pandas as pd
 import numpy as np
-from sklearn.ensemble import RandomForestClassifier
-from sklearn.linear_model import LogisticRegression
 from sklearn.metrics import accuracy_score
+from typing import Optional
 from .strategies import Strategy
-from .features import FeatureEngineer
+from .features import ML_SPEC, FeatureEngineer, FeatureMatrix
+from .artifacts import ArtifactStore, fingerprint_code, fingerprint_frame
+from . import profiling, training
 
 class MLStrategy(Strategy):
-    def __init__(self, model_type: str = 'rf', train_split: float = 0.7):
+    def __init__(self, model_type: str = 'rf', train_split: float = 0.7, artifact_store: Optional[ArtifactStore] = None,
+                 feature_dtype: str = 'float64', model_params: Optional[dict] = None, search: bool = False,
+                 cv_splits: int = 5, n_jobs: Optional[int] = None, new_trees: int = 20, max_trees: Optional[int] = 300):
+        """
+        model_type: 'rf', 'lr' or 'sgd' (see training.MODELS).
+        train_split: fraction of the rows to fit on; the rest is held out for
+        the test accuracy (1.0: fit on all rows, e.g. per walk-forward fold).
+        artifact_store: if given, fitted models and scalers are saved there and
+        reloaded instead of retrained when the same configuration is trained again.
+        feature_dtype: dtype of the feature matrix ('float32' halves its memory).
+        model_params: hyperparameters overriding the model type's defaults.
+        search: pick the remaining hyperparameters by time-series cross-validation
+        on the training rows (training.search).
+        n_jobs: cores for the search and for growing forests (-1: all).
+        new_trees: trees a random forest grows per update().
+        max_trees: a random forest drops its oldest trees beyond this many (None: no limit).
+        """
         self.model_type = model_type
         self.train_split = train_split
-        self.feature_engineer = FeatureEngineer()
+        self.artifact_store = artifact_store
+        self.feature_dtype = feature_dtype
+        self.model_params = dict(model_params or {})
+        self.search = search
+        self.cv_splits = cv_splits
+        self.n_jobs = n_jobs
+        self.new_trees = new_trees
+        self.max_trees = max_trees
+        self.feature_engineer = FeatureEngineer(dtype=feature_dtype)
         self.model = None
         self.features = []
+        # Hyperparameters chosen by the search and its per-candidate scores
+        self.best_params = None
+        self.search_scores = None
+        # Identifies the data (and configuration) the model was fitted on
+        self.fitted_on = None
+        # Last feature row whose target the model has been fitted on
+        self.trained_through = None
+
+    def config(self) -> dict:
+        # The number of cores does not change the fitted model
+        config = {**super().config(), 'model_params': self.model_params}
+        config.pop('n_jobs', None)
+        return config
 
     def train(self, df: pd.DataFrame):
         """
         Trains the ML model.
         """
-        # 1. Feature Engineering
-        df = self.feature_engineer.add_technical_indicators(df)
-        df = self.feature_engineer.create_lag_features(df)
+        artifact_key = None
+        if self.artifact_store is not None:
+            artifact_key = self.artifact_store.key(
+                strategy=type(self).__name__,
+                model_type=self.model_type,
+                train_split=self.train_split,
+                feature_dtype=self.feature_dtype,
+                model_params=self.model_params,
+                search=self.search,
+                cv_splits=self.cv_splits,
+                data=fingerprint_frame(df),
+                # The defaults behind model_params and the search grid live in training.MODELS
+                model_defaults=training.MODELS.get(self.model_type),
+                code=fingerprint_code(FeatureEngineer, MLStrategy, training),
+            )
+            
+        with profiling.stage('MLStrategy.train', rows=len(df), model_type=self.model_type):
+            # 1. Feature Engineering
+            with profiling.stage('MLStrategy.build_features', rows=len(df)):
+                features = self.build_features(df)
+            
+            return self.fit_features(features, artifact_key)
+
+    # Feature rows needed before the first prediction
+    lookback = 0
+
+    def build_features(self, df: pd.DataFrame) -> FeatureMatrix:
+        """
+        Builds the indicator and lag feature matrix. Features only look
+        backwards, so they can be built once over a long history and sliced afterwards.
+        """
+        return self.feature_engineer.build(df, ML_SPEC)
+
+    def fit_features(self, features: FeatureMatrix, artifact_key: Optional[str] = None):
+        """
+        Trains the ML model on a matrix returned by build_features.
+        """
+        self.fitted_on = artifact_key or features.fingerprint()
+        self.trained_through = features.index[-1]
         
         # 2. Create Target
         # Predict if next day's return is positive (1) or negative (0)
-        df['Target'] = np.where(df['Close'].shift(-1) > df['Close'], 1, 0)
-        df.dropna(inplace=True)
+        targets = features.targets()
         
+        # Reuse a previously fitted model and scaler for this exact configuration
+        if artifact_key is not None:
+            with profiling.stage('MLStrategy.load_artifact'):
+                artifact = self.artifact_store.load(artifact_key)
+            if artifact is not None:
+                self.model = artifact['model']
+                self.feature_engineer.scaler = artifact['scaler']
+                self.features = artifact['meta']['features']
+                self.best_params = artifact['meta'].get('best_params')
+                print(f"Loaded {self.model_type.upper()} model from artifact store ({artifact_key})")
+                return features
+            
         # 3. Prepare Data
-        X, y, self.features = self.feature_engineer.prepare_data_for_ml(df)
+        with profiling.stage('MLStrategy.prepare_data', rows=len(features)):
+            X, y, self.features = self.feature_engineer.prepare_data_for_ml(features, targets)
         
         # 4. Train/Test Split
         split_idx = int(len(X) * self.train_split)
         X_train, y_train = X[:split_idx], y[:split_idx]
         X_test, y_test = X[split_idx:], y[split_idx:]
         
-        # 5. Initialize Model
-        if self.model_type == 'rf':
-            self.model = RandomForestClassifier(n_estimators=100, max_depth=5, random_state=42)
-        elif self.model_type == 'lr':
-            self.model = LogisticRegression(random_state=42)
+        # 5-6. Initialize and Train Model
+        if self.search:
+            print(f"Searching {self.model_type.upper()} hyperparameters on {len(X_train)} samples ({self.cv_splits} time-series folds)...")
+            with profiling.stage('MLStrategy.search', rows=len(X_train), model_type=self.model_type):
+                self.model, self.best_params, self.search_scores = training.search(
+                    self.model_type, X_train, y_train, self.model_params, n_splits=self.cv_splits, n_jobs=self.n_jobs)
+            if self.model_type == 'rf':
+                self.model.set_params(n_jobs=self.n_jobs)
+            print(f"Best parameters: {self.best_params} (CV accuracy {self.search_scores['mean_score'].iloc[0]:.2%})")
         else:
-            raise ValueError("Invalid model type. Use 'rf' or 'lr'.")
-            
-        # 6. Train
-        print(f"Training {self.model_type.upper()} model on {len(X_train)} samples...")
-        self.model.fit(X_train, y_train)
+            self.model = training.make_model(self.model_type, self.model_params, n_jobs=self.n_jobs)
+            print(f"Training {self.model_type.upper()} model on {len(X_train)} samples...")
+            with profiling.stage('MLStrategy.fit', rows=len(X_train), model_type=self.model_type):
+                self.model.fit(X_train, y_train)
+        
+        # 7. Evaluate (nothing is held out with train_split=1.0)
+        if len(X_test):
+            with profiling.stage('MLStrategy.evaluate', rows=len(X)):
+                train_acc = accuracy_score(y_train, self.model.predict(X_train))
+                test_acc = accuracy_score(y_test, self.model.predict(X_test))
+            print(f"Train Accuracy: {train_acc:.2%}")
+            print(f"Test Accuracy:  {test_acc:.2%}")
         
-        # 7. Evaluate
-        train_acc = accuracy_score(y_train, self.model.predict(X_train))
-        test_acc = accuracy_score(y_test, self.model.predict(X_test))
-        print(f"Train Accuracy: {train_acc:.2%}")
-        print(f"Test Accuracy:  {test_acc:.2%}")
+        if artifact_key is not None:
+            self.artifact_store.save(
+                artifact_key,
+                {'model': self.model, 'scaler': self.feature_engineer.scaler},
+                {'features': self.features, 'model_type': self.model_type, 'best_params': self.best_params,
+                 'train_start': features.index[0], 'train_end': features.index[-1]},
+            )
         
-        return df # Return df with features for backtesting
+        return features
+
+    def update(self, df: pd.DataFrame):
+        """
+        Updates the fitted model with the bars of `df` after the ones it was
+        trained on, instead of retraining from scratch (rf and sgd models, see
+        training.partial_fit). `df` needs enough earlier bars for the feature
+        warm-up, e.g. the last few months. The scaler fitted in train() is
+        kept, so the existing trees and weights stay valid. A row is used once
+        the next bar has set its target; rows a forest cannot learn from yet
+        (a single class) are retried with the next update.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Call train() first.")
+        if self.model_type not in training.ONLINE_MODELS:
+            raise ValueError(f"{self.model_type} models cannot be updated; use one of: {', '.join(training.ONLINE_MODELS)}")
+        
+        features = self.build_features(df)
+        # The last row's target (the next bar's move) is not known yet
+        new = np.flatnonzero(features.index[:-1] > self.trained_through)
+        if len(new) == 0:
+            return features
+        rows = slice(new[0], new[-1] + 1)
+        
+        X, _, _ = self.feature_engineer.prepare_data_for_ml(features[rows], fit=False)
+        y = features.targets()[rows]
+        with profiling.stage('MLStrategy.update', rows=len(X), model_type=self.model_type):
+            updated = training.partial_fit(self.model, X, y, self.new_trees, self.max_trees)
+        if not updated:
+            print(f"Skipping update on {len(X)} rows: all targets are in one class")
+            return features
+        self.trained_through = features.index[rows.stop - 1]
+        self.fitted_on = f"{self.fitted_on}+{features[rows].fingerprint()[:16]}"
+        return features
 
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         if self.model is None:
@@ -68,23 +200,20 @@ class MLStrategy(Strategy):
         # The 'Target' generation in train() used shift(-1), which is lookahead.
         # But for inference (generating signals), we use current features to predict NEXT step.
         
-        df_features = self.feature_engineer.add_technical_indicators(df)
-        df_features = self.feature_engineer.create_lag_features(df_features)
-        
-        # Align indices
-        common_index = df_features.index
+        features = self.build_features(df)
         
+        return self.predict_features(features).reindex(df.index).fillna(0)
+
+    def predict_features(self, features: FeatureMatrix) -> pd.Series:
+        """
+        Returns signals for every row of a matrix returned by build_features.
+        """
+        if self.model is None:
+            raise ValueError("Model not trained. Call train() first.")
+            
         # Prepare X
-        # We must use the SAME scaler as training? 
-        # Ideally yes. The FeatureEngineer resets scaler on prepare_data_for_ml.
-        # This is a simplification. For strict correctness, FeatureEngineer should persist scaler.
-        # Let's assume for this demo that we re-fit scaler on the whole history or 
-        # we should update FeatureEngineer to support fit/transform separation.
-        # Given the scope, we'll re-use the prepare method which re-fits. 
-        # This is "data leakage" if we backtest on training data, but acceptable for a simple demo 
-        # if we acknowledge it. Better: split data in main.py and only backtest on test set.
-        
-        X, _, _ = self.feature_engineer.prepare_data_for_ml(df_features, target_col='Close') # Target col doesn't matter for X
+        # Scale with the scaler fitted during training, so no statistics leak in from the backtest period
+        X, _, _ = self.feature_engineer.prepare_data_for_ml(features, fit=False)
         
         predictions = self.model.predict(X)
         
@@ -92,4 +221,4 @@ class MLStrategy(Strategy):
         # Let's do Long/Short
         signals = np.where(predictions == 1, 1.0, -1.0)
         
-        return pd.Series(signals, index=common_index).reindex(df.index).fillna(0)
+        return pd.Series(signals, index=features.index)
@@ -0,0 +1,162 @@
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+METHODS = ('block', 'iid', 'shuffle')
+
+
+def default_block_size(n_obs: int) -> int:
+    """
+    Rule-of-thumb block length for a block bootstrap: n^(1/3).
+    """
+    return max(1, int(round(n_obs ** (1 / 3))))
+
+
+def resample_indices(n_obs: int, n_paths: int, rng: np.random.Generator, method: str = 'block',
+                     block_size: Optional[int] = None) -> np.ndarray:
+    """
+    Returns an (n_paths x n_obs) matrix of row positions into the original returns.
+
+    block: circular block bootstrap; blocks of `block_size` consecutive returns
+           starting at random positions keep short-range autocorrelation and
+           volatility clustering.
+    iid: draws single returns with replacement.
+    shuffle: random permutations (same returns, different order); only the
+             path dependent metrics (drawdown, ruin) vary.
+    """
+    if method == 'shuffle':
+        return rng.permuted(np.broadcast_to(np.arange(n_obs), (n_paths, n_obs)), axis=1)
+    if method == 'iid':
+        block_size = 1
+    elif method != 'block':
+        raise ValueError(f"Unknown resampling method: {method} (expected one of {', '.join(METHODS)})")
+
+    block_size = min(block_size or default_block_size(n_obs), n_obs)
+    n_blocks = -(-n_obs // block_size)
+    starts = rng.integers(0, n_obs, size=(n_paths, n_blocks))
+    indices = (starts[:, :, None] + np.arange(block_size)).reshape(n_paths, -1)[:, :n_obs]
+    return np.remainder(indices, n_obs, out=indices)
+
+
+def path_metrics(paths: np.ndarray, risk_free_rate: float = 0.0, periods_per_year: int = 252,
+                 ruin_threshold: float = 0.5) -> dict:
+    """
+    Metrics of every row of a (paths x periods) returns matrix, computed in
+    place: `paths` is overwritten with the equity curves.
+    Definitions match calculate_panel_metrics. A path is ruined if its equity
+    falls to or below `1 - ruin_threshold` of the starting capital at any point.
+    """
+    n_obs = paths.shape[1]
+    std = paths.std(axis=1, ddof=1)
+    excess_mean = paths.mean(axis=1) - risk_free_rate / periods_per_year
+
+    equity = np.add(paths, 1.0, out=paths)
+    np.cumprod(equity, axis=1, out=equity)
+    peak = np.maximum.accumulate(equity, axis=1)
+    np.divide(equity, peak, out=peak)
+    max_drawdown = peak.min(axis=1) - 1.0
+    lowest = equity.min(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std == 0, 0.0, np.sqrt(periods_per_year) * excess_mean / std)
+        cagr = equity[:, -1] ** (periods_per_year / n_obs) - 1
+
+    return {
+        'sharpe_ratio': sharpe,
+        'cagr': cagr,
+        'max_drawdown': max_drawdown,
+        'total_return_pct': (equity[:, -1] - 1.0) * 100,
+        'ruined': lowest <= 1.0 - ruin_threshold,
+    }
+
+
+class MonteCarlo:
+    """
+    Robustness of a backtest under resampling of its returns.
+
+    Resamples the strategy returns (e.g. results['data']['Strategy_Returns']
+    of BacktestEngine.run) into `n_paths` synthetic histories of the same
+    length and reports the distribution of Sharpe, CAGR and max drawdown with
+    confidence intervals, plus the probability of ruin. Paths are generated
+    and evaluated as one matrix per chunk of `chunk_paths` rows, so memory
+    stays bounded however many paths are requested.
+    """
+
+    def __init__(self, n_paths: int = 10_000, method: str = 'block', block_size: Optional[int] = None,
+                 confidence: float = 0.95, ruin_threshold: float = 0.5, chunk_paths: Optional[int] = None,
+                 max_chunk_bytes: int = 256 * 2**20, risk_free_rate: float = 0.0, periods_per_year: int = 252,
+                 seed: Optional[int] = None):
+        """
+        block_size: block length of the 'block' method (default n^(1/3)).
+        ruin_threshold: loss fraction that counts as ruin (0.5 = lose half the capital).
+        chunk_paths: paths per chunk; by default sized so that a chunk's
+                     working arrays stay within `max_chunk_bytes`.
+        """
+        if method not in METHODS:
+            raise ValueError(f"Unknown resampling method: {method} (expected one of {', '.join(METHODS)})")
+        self.n_paths = n_paths
+        self.method = method
+        self.block_size = block_size
+        self.confidence = confidence
+        self.ruin_threshold = ruin_threshold
+        self.chunk_paths = chunk_paths
+        self.max_chunk_bytes = max_chunk_bytes
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self.seed = seed
+
+    def _chunk_paths(self, n_obs: int) -> int:
+        if self.chunk_paths:
+            return self.chunk_paths
+        # Index matrix (int64), the resampled returns and the running peak
+        return max(1, self.max_chunk_bytes // (3 * 8 * n_obs))
+
+    def run(self, returns) -> dict:
+        """
+        Returns a dict with 'summary' (one row per metric: observed value,
+        mean, median, std and the confidence interval), 'paths' (per-path
+        metrics), 'probability_of_ruin' and the run settings.
+        """
+        values = np.asarray(returns, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        n_obs = len(values)
+        if n_obs < 2:
+            raise ValueError("At least two non-NaN returns are needed for a Monte Carlo run")
+
+        rng = np.random.default_rng(self.seed)
+        block_size = self.block_size or default_block_size(n_obs)
+        chunk = self._chunk_paths(n_obs)
+        chunks = []
+        for start in range(0, self.n_paths, chunk):
+            size = min(chunk, self.n_paths - start)
+            indices = resample_indices(n_obs, size, rng, self.method, block_size)
+            chunks.append(path_metrics(values[indices], self.risk_free_rate, self.periods_per_year,
+                                       self.ruin_threshold))
+            del indices
+
+        paths = pd.DataFrame({k: np.concatenate([c[k] for c in chunks]) for k in chunks[0]})
+        observed = path_metrics(values[None, :].copy(), self.risk_free_rate, self.periods_per_year,
+                                self.ruin_threshold)
+
+        alpha = (1 - self.confidence) / 2
+        metrics = ['sharpe_ratio', 'cagr', 'max_drawdown', 'total_return_pct']
+        summary = pd.DataFrame({
+            'observed': [observed[m][0] for m in metrics],
+            'mean': paths[metrics].mean().to_numpy(),
+            'median': paths[metrics].median().to_numpy(),
+            'std': paths[metrics].std().to_numpy(),
+            'ci_lower': paths[metrics].quantile(alpha).to_numpy(),
+            'ci_upper': paths[metrics].quantile(1 - alpha).to_numpy(),
+        }, index=metrics)
+
+        return {
+            'summary': summary,
+            'paths': paths,
+            'probability_of_ruin': float(paths['ruined'].mean()),
+            'n_paths': self.n_paths,
+            'n_obs': n_obs,
+            'method': self.method,
+            'block_size': block_size if self.method == 'block' else 1,
+            'confidence': self.confidence,
+        }
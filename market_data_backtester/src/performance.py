@@ -1,3 +1,5 @@
+import warnings
+
 import numpy as np
 import pandas as pd
 
@@ -60,6 +62,204 @@ def calculate_win_rate(returns: pd.Series) -> float:
     total = len(returns)
     return wins / total
 
+def _as_matrix(returns) -> tuple:
+    """
+    Returns a (dates x series) float64 array plus its index and column labels.
+    """
+    if isinstance(returns, pd.Series):
+        returns = returns.to_frame()
+    if isinstance(returns, pd.DataFrame):
+        return returns.to_numpy(dtype=np.float64), returns.index, returns.columns
+    values = np.asarray(returns, dtype=np.float64)
+    if values.ndim == 1:
+        values = values[:, None]
+    return values, pd.RangeIndex(values.shape[0]), pd.RangeIndex(values.shape[1])
+
+def calculate_panel_metrics(returns, initial_capital: float = 1.0, risk_free_rate: float = 0.0, periods_per_year: int = 252) -> pd.DataFrame:
+    """
+    Calculates every metric for each column of a dates x series returns matrix
+    (tickers, strategy variants...) in one vectorized pass.
+    Accepts a DataFrame, a Series or a 1D/2D array and returns one row per series.
+    NaN returns (e.g. before a ticker was listed) are skipped; a series
+    without returns has a flat equity curve and NaN volatility and ratios.
+    """
+    values, _, columns = _as_matrix(returns)
+    valid = ~np.isnan(values)
+    n_obs = valid.sum(axis=0)
+    
+    excess = values - (risk_free_rate / periods_per_year)
+    with warnings.catch_warnings():
+        # Series without (enough) returns get NaN statistics
+        warnings.simplefilter('ignore', RuntimeWarning)
+        std = np.nanstd(values, axis=0, ddof=1)
+        excess_mean = np.nanmean(excess, axis=0)
+        downside = np.sqrt(np.nanmean(np.minimum(excess, 0.0) ** 2, axis=0))
+    
+    cumulative = np.nancumprod(1 + values, axis=0)
+    # Growth over the whole history (1 for a series without returns)
+    final = cumulative[-1] if len(cumulative) else np.ones(values.shape[1])
+    peak = np.maximum.accumulate(cumulative, axis=0)
+    underwater = cumulative < peak
+    max_drawdown = ((cumulative - peak) / peak).min(axis=0, initial=0.0)
+    
+    # Longest run of consecutive periods spent below the running peak
+    runs = np.cumsum(underwater, axis=0)
+    run_start = np.maximum.accumulate(np.where(underwater, 0, runs), axis=0)
+    max_drawdown_duration = (runs - run_start).max(axis=0, initial=0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        sharpe = np.where(std == 0, 0.0, np.sqrt(periods_per_year) * excess_mean / std)
+        sortino = np.where(downside == 0, 0.0, np.sqrt(periods_per_year) * excess_mean / downside)
+        n_years = n_obs / periods_per_year
+        cagr = np.where(n_years == 0, 0.0, final ** (1 / n_years) - 1)
+        calmar = np.where(max_drawdown == 0, 0.0, cagr / np.abs(max_drawdown))
+        win_rate = np.where(n_obs == 0, 0.0, (values > 0).sum(axis=0) / n_obs)
+    
+    return pd.DataFrame({
+        'sharpe_ratio': sharpe,
+        'sortino_ratio': sortino,
+        'calmar_ratio': calmar,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_duration': max_drawdown_duration,
+        'total_return_pct': (final - 1.0) * 100,
+        'cagr': cagr,
+        'volatility': std * np.sqrt(periods_per_year),
+        'win_rate': win_rate,
+        'final_equity': initial_capital * final,
+    }, index=columns)
+
+class RunningMetrics:
+    """
+    Streaming counterpart of calculate_panel_metrics for a single series.
+    Returns are fed chunk by chunk through update(); state is a handful of
+    scalars (counts, Chan-merged mean/variance, equity, running peak, current
+    drawdown run), so memory does not grow with the length of the history.
+    """
+
+    def __init__(self, initial_capital: float = 1.0, risk_free_rate: float = 0.0, periods_per_year: int = 252):
+        self.initial_capital = initial_capital
+        self.risk_free_rate = risk_free_rate
+        self.periods_per_year = periods_per_year
+        self.n_obs = 0
+        self.mean = 0.0             # of the excess returns
+        self.m2 = 0.0               # sum of squared deviations from the mean
+        self.downside_sq = 0.0
+        self.wins = 0
+        self.cumulative = 1.0
+        self.peak = -np.inf
+        self.max_drawdown = 0.0
+        self.drawdown_run = 0
+        self.max_drawdown_duration = 0
+
+    def update(self, returns) -> np.ndarray:
+        """
+        Adds a chunk of returns and returns its cumulative growth curve,
+        continuing from the previous chunks.
+        """
+        values = np.asarray(returns, dtype=np.float64)
+        valid = values[~np.isnan(values)]
+        n = len(valid)
+        if n:
+            excess = valid - (self.risk_free_rate / self.periods_per_year)
+            chunk_mean = excess.mean()
+            chunk_m2 = ((excess - chunk_mean) ** 2).sum()
+            total = self.n_obs + n
+            delta = chunk_mean - self.mean
+            self.mean += delta * n / total
+            self.m2 += chunk_m2 + delta ** 2 * self.n_obs * n / total
+            self.n_obs = total
+            self.downside_sq += (np.minimum(excess, 0.0) ** 2).sum()
+            self.wins += int((valid > 0).sum())
+
+        if len(values) == 0:
+            return values
+        # Continuing the product from the carried value keeps the exact
+        # multiplication order of a single cumprod over the whole series
+        cumulative = np.nancumprod(np.concatenate(([self.cumulative], 1 + values)))[1:]
+        peak = np.maximum.accumulate(np.maximum(cumulative, self.peak))
+        self.max_drawdown = min(self.max_drawdown, ((cumulative - peak) / peak).min())
+
+        underwater = cumulative < peak
+        runs = np.cumsum(underwater)
+        run_start = np.maximum.accumulate(np.where(underwater, 0, runs))
+        lengths = runs - run_start
+        # A drawdown still open at the end of the previous chunk continues here
+        first_recovery = len(values) if underwater.all() else int(np.argmin(underwater))
+        lengths[:first_recovery] += self.drawdown_run
+        self.drawdown_run = int(lengths[-1])
+        self.max_drawdown_duration = max(self.max_drawdown_duration, int(lengths.max()))
+
+        self.cumulative = cumulative[-1]
+        self.peak = peak[-1]
+        return cumulative
+
+    def result(self) -> dict:
+        """
+        Returns the same metrics as a row of calculate_panel_metrics.
+        """
+        n, ppy = self.n_obs, self.periods_per_year
+        std = np.sqrt(self.m2 / (n - 1)) if n > 1 else np.nan
+        downside = np.sqrt(self.downside_sq / n) if n else np.nan
+        sharpe = 0.0 if std == 0 else np.sqrt(ppy) * self.mean / std
+        sortino = 0.0 if downside == 0 else np.sqrt(ppy) * self.mean / downside
+        n_years = n / ppy
+        cagr = 0.0 if n_years == 0 else self.cumulative ** (1 / n_years) - 1
+        calmar = 0.0 if self.max_drawdown == 0 else cagr / abs(self.max_drawdown)
+
+        return {
+            'sharpe_ratio': sharpe,
+            'sortino_ratio': sortino,
+            'calmar_ratio': calmar,
+            'max_drawdown': self.max_drawdown,
+            'max_drawdown_duration': self.max_drawdown_duration,
+            'total_return_pct': (self.cumulative - 1.0) * 100,
+            'cagr': cagr,
+            'volatility': std * np.sqrt(ppy),
+            'win_rate': self.wins / n if n else 0.0,
+            'final_equity': self.initial_capital * self.cumulative,
+        }
+
+def calculate_rolling_metrics(returns, window: int = 63, risk_free_rate: float = 0.0, periods_per_year: int = 252) -> dict:
+    """
+    Calculates rolling Sharpe Ratio, rolling volatility, the drawdown from the
+    running peak and the drawdown from the peak within the last `window`
+    periods, for every column at once. Returns a dict of DataFrames.
+    """
+    values, index, columns = _as_matrix(returns)
+    excess = np.nan_to_num(values - (risk_free_rate / periods_per_year))
+    
+    # Rolling sums of x and x^2 from cumulative sums (one pass, no per-window loop)
+    def rolling_sum(x):
+        sums = np.cumsum(x, axis=0)
+        sums[window:] = sums[window:] - sums[:-window].copy()
+        sums[:window - 1] = np.nan
+        return sums
+    
+    mean = rolling_sum(excess) / window
+    var = (rolling_sum(excess ** 2) - window * mean ** 2) / (window - 1)
+    std = np.sqrt(np.maximum(var, 0.0))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rolling_sharpe = np.where(std == 0, 0.0, np.sqrt(periods_per_year) * mean / std)
+    rolling_sharpe[np.isnan(std)] = np.nan
+    
+    cumulative = np.nancumprod(1 + values, axis=0)
+    drawdown = cumulative / np.maximum.accumulate(cumulative, axis=0) - 1
+    
+    window_peak = np.full_like(cumulative, np.nan)
+    if len(cumulative) >= window:
+        window_peak[window - 1:] = np.lib.stride_tricks.sliding_window_view(cumulative, window, axis=0).max(axis=-1)
+    rolling_drawdown = cumulative / window_peak - 1
+    
+    def frame(x):
+        return pd.DataFrame(x, index=index, columns=columns)
+    
+    return {
+        'rolling_sharpe': frame(rolling_sharpe),
+        'rolling_volatility': frame(std * np.sqrt(periods_per_year)),
+        'drawdown': frame(drawdown),
+        'rolling_drawdown': frame(rolling_drawdown),
+    }
+
 def calculate_confusion_matrix(y_true, y_pred):
     """
     Calculates confusion matrix metrics.
@@ -0,0 +1,396 @@
+from typing import List, Optional, Union
+
+import numpy as np
+import pandas as pd
+from .data import DataLoader
+from .performance import calculate_panel_metrics
+from .strategies import Strategy
+
+
+class RollingCovariance:
+    """
+    Covariance of the last `window` rows of a (dates x assets) returns matrix,
+    maintained incrementally: advancing to a later row adds the outer products
+    of the rows that entered the window and subtracts those of the rows that
+    left it, so the cost is O(k * assets^2) for k new rows. NaN returns
+    (before listing, missing bars) count as zero.
+    """
+
+    def __init__(self, returns: np.ndarray, window: int = 63):
+        self.returns = np.nan_to_num(np.asarray(returns, dtype=np.float64))
+        self.window = window
+        self.t = -1                 # last row included
+        n_assets = self.returns.shape[1]
+        self.total = np.zeros(n_assets)
+        self.cross = np.zeros((n_assets, n_assets))
+
+    def advance(self, t: int):
+        """
+        Moves the window so that it ends at row t (inclusive); t never decreases.
+        """
+        if t < self.t:
+            raise ValueError(f"RollingCovariance cannot move back from row {self.t} to {t}")
+        if t - self.t >= self.window:
+            # Nothing of the old window survives: rebuilding is cheaper (and resets rounding drift)
+            rows = self.returns[max(0, t - self.window + 1):t + 1]
+            self.total = rows.sum(axis=0)
+            self.cross = rows.T @ rows
+        else:
+            added = self.returns[self.t + 1:t + 1]
+            removed = self.returns[max(0, self.t - self.window + 1):max(0, t - self.window + 1)]
+            self.total += added.sum(axis=0) - removed.sum(axis=0)
+            self.cross += added.T @ added - removed.T @ removed
+        self.t = t
+
+    @property
+    def count(self) -> int:
+        return min(self.t + 1, self.window)
+
+    def covariance(self) -> np.ndarray:
+        n = self.count
+        if n < 2:
+            return np.zeros_like(self.cross)
+        mean = self.total / n
+        return (self.cross - n * np.outer(mean, mean)) / (n - 1)
+
+
+def risk_parity(cov: np.ndarray, initial: Optional[np.ndarray] = None, iterations: int = 50,
+                tolerance: float = 1e-10) -> np.ndarray:
+    """
+    Long-only equal risk contribution weights (summing to 1) for a positive
+    definite covariance matrix. Minimizes the convex 0.5 x'Cx - sum(log x) / n
+    with damped Newton steps; `initial` (e.g. the previous solution) warm-starts it.
+    """
+    n = len(cov)
+    budget = 1.0 / n
+    x = initial if initial is not None and len(initial) == n and (initial > 0).all() else 1.0 / np.sqrt(np.diag(cov))
+    # The solution has x'Cx = 1; rescaling the guess to that level saves steps
+    x = x / np.sqrt(x @ cov @ x)
+    for _ in range(iterations):
+        gradient = cov @ x - budget / x
+        hessian = cov + np.diag(budget / x ** 2)
+        step = np.linalg.solve(hessian, gradient)
+        decrement = np.sqrt(gradient @ step)
+        # Damping keeps x positive (the objective is self-concordant)
+        x = x - step / (1 + decrement) if decrement > 0.25 else x - step
+        if decrement ** 2 < tolerance:
+            break
+    return x / x.sum()
+
+
+class Allocator:
+    """
+    Target weights for the portfolio engine. prepare() receives the whole
+    dates x assets Close matrix once; weights(t) must only use rows up to t
+    (trades happen at the close of row t). Weights are fractions of equity;
+    whatever they leave over (1 - sum) is held as cash, negative weights are
+    shorts.
+    """
+    # Rows of history needed before the first allocation
+    warmup = 0
+
+    def prepare(self, close: pd.DataFrame):
+        self.n_assets = close.shape[1]
+
+    def weights(self, t: int) -> np.ndarray:
+        raise NotImplementedError
+
+
+class EqualWeight(Allocator):
+    def prepare(self, close: pd.DataFrame):
+        super().prepare(close)
+        self.listed = close.notna().to_numpy()
+
+    def weights(self, t: int) -> np.ndarray:
+        listed = self.listed[t]
+        return np.where(listed, 1.0 / max(listed.sum(), 1), 0.0)
+
+
+class SignalWeights(Allocator):
+    """
+    Splits the capital equally over the assets a strategy is in, long or
+    short, using its generate_panel_signals (gross exposure 1).
+    """
+
+    def __init__(self, strategy: Strategy):
+        self.strategy = strategy
+
+    @property
+    def warmup(self) -> int:
+        return self.strategy.warmup or 0
+
+    def prepare(self, close: pd.DataFrame):
+        super().prepare(close)
+        signals = self.strategy.generate_panel_signals(close).to_numpy(dtype=np.float64)
+        self.signals = np.where(close.notna().to_numpy(), np.nan_to_num(signals), 0.0)
+
+    def weights(self, t: int) -> np.ndarray:
+        signals = self.signals[t]
+        gross = np.abs(signals).sum()
+        return signals / gross if gross > 0 else np.zeros_like(signals)
+
+
+class _CovarianceAllocator(Allocator):
+    """
+    Base for allocators driven by the trailing covariance. The sample
+    covariance is shrunk towards its diagonal by `shrinkage`, which keeps it
+    positive definite when the window is shorter than the number of assets.
+    """
+
+    def __init__(self, window: int = 63, periods_per_year: int = 252, shrinkage: float = 0.1):
+        self.window = window
+        self.periods_per_year = periods_per_year
+        self.shrinkage = shrinkage
+
+    @property
+    def warmup(self) -> int:
+        return self.window
+
+    def prepare(self, close: pd.DataFrame):
+        super().prepare(close)
+        prices = close.to_numpy(dtype=np.float64)
+        returns = np.full_like(prices, np.nan)
+        returns[1:] = prices[1:] / prices[:-1] - 1
+        self.listed = np.isfinite(prices)
+        self.rolling = RollingCovariance(returns, self.window)
+        self._last = (None, None)
+
+    def covariance(self, t: int) -> np.ndarray:
+        """
+        Shrunk covariance of the window ending at row t. The result of the
+        last row is kept, so allocators sharing this one (VolatilityTarget)
+        get it without recomputing; treat it as read-only.
+        """
+        if self._last[0] == t:
+            return self._last[1]
+        self.rolling.advance(t)
+        cov = self.rolling.covariance()
+        if self.shrinkage:
+            diagonal = np.diag(cov).copy()
+            cov *= 1 - self.shrinkage
+            cov[np.diag_indices_from(cov)] = diagonal
+        self._last = (t, cov)
+        return cov
+
+
+class InverseVolatility(_CovarianceAllocator):
+    """
+    Weights proportional to 1 / volatility over the trailing window (fully invested).
+    """
+
+    def weights(self, t: int) -> np.ndarray:
+        vol = np.sqrt(np.diag(self.covariance(t)))
+        usable = self.listed[t] & (vol > 0)
+        inverse = np.where(usable, 1.0 / np.where(usable, vol, 1.0), 0.0)
+        total = inverse.sum()
+        return inverse / total if total > 0 else inverse
+
+
+class RiskParity(_CovarianceAllocator):
+    """
+    Equal risk contribution weights (long only, fully invested) from the
+    trailing covariance, warm-started from the previous allocation.
+    """
+
+    def __init__(self, window: int = 63, periods_per_year: int = 252, shrinkage: float = 0.1,
+                 iterations: int = 50, tolerance: float = 1e-10):
+        super().__init__(window, periods_per_year, shrinkage)
+        self.iterations = iterations
+        self.tolerance = tolerance
+
+    def prepare(self, close: pd.DataFrame):
+        super().prepare(close)
+        self._previous = np.zeros(self.n_assets)
+
+    def weights(self, t: int) -> np.ndarray:
+        cov = self.covariance(t)
+        usable = self.listed[t] & (np.diag(cov) > 0)
+        weights = np.zeros(self.n_assets)
+        if usable.any():
+            weights[usable] = risk_parity(cov[np.ix_(usable, usable)], self._previous[usable],
+                                          self.iterations, self.tolerance)
+        self._previous = weights
+        return weights
+
+
+class VolatilityTarget(_CovarianceAllocator):
+    """
+    Scales another allocator's weights so that the portfolio's predicted
+    annualized volatility (from the trailing covariance) hits `target`,
+    with gross exposure capped at `max_leverage`. The rest is cash. A
+    covariance-based allocator with the same window and shrinkage shares
+    its covariance instead of computing it a second time.
+    """
+
+    def __init__(self, base: Allocator, target: float = 0.10, window: int = 63, max_leverage: float = 1.0,
+                 periods_per_year: int = 252, shrinkage: float = 0.1):
+        super().__init__(window, periods_per_year, shrinkage)
+        self.base = base
+        self.target = target
+        self.max_leverage = max_leverage
+
+    @property
+    def warmup(self) -> int:
+        return max(self.window, self.base.warmup)
+
+    def prepare(self, close: pd.DataFrame):
+        self.base.prepare(close)
+        self._shared = (isinstance(self.base, _CovarianceAllocator)
+                        and (self.base.window, self.base.shrinkage) == (self.window, self.shrinkage))
+        if self._shared:
+            Allocator.prepare(self, close)
+        else:
+            super().prepare(close)
+
+    def covariance(self, t: int) -> np.ndarray:
+        return self.base.covariance(t) if self._shared else super().covariance(t)
+
+    def weights(self, t: int) -> np.ndarray:
+        weights = self.base.weights(t)
+        gross = np.abs(weights).sum()
+        if gross == 0:
+            return weights
+        vol = np.sqrt(max(weights @ self.covariance(t) @ weights, 0.0) * self.periods_per_year)
+        scale = self.target / vol if vol > 0 else np.inf
+        return weights * min(scale, self.max_leverage / gross)
+
+
+def rebalance_schedule(index: pd.Index, rebalance: Union[str, int, None]) -> np.ndarray:
+    """
+    Boolean mask of scheduled rebalance rows: every `rebalance` rows (int), or
+    the first row of each calendar period ('W', 'M', 'Q', 'Y'...); None
+    schedules nothing beyond the initial allocation.
+    """
+    n = len(index)
+    mask = np.zeros(n, dtype=bool)
+    if rebalance is None:
+        return mask
+    if isinstance(rebalance, (int, np.integer)):
+        mask[::max(int(rebalance), 1)] = True
+        return mask
+    periods = pd.DatetimeIndex(index).to_period(rebalance).asi8
+    mask[0] = True
+    mask[1:] = periods[1:] != periods[:-1]
+    return mask
+
+
+class PortfolioEngine:
+    """
+    Multi-asset backtest with capital allocation.
+
+    An Allocator sets target weights at each rebalance; between rebalances
+    the positions are held and their weights drift with prices. Rebalances
+    happen on a calendar/bar schedule and/or whenever any weight drifts more
+    than `drift_threshold` from its target. Each holding period is simulated
+    as one (bars x assets) matrix operation, so the Python-level loop runs
+    once per rebalance, not once per bar.
+    """
+
+    def __init__(self, data_loader: Optional[DataLoader], allocator: Allocator, initial_capital: float = 10000.0,
+                 rebalance: Union[str, int, None] = 'M', drift_threshold: Optional[float] = None,
+                 transaction_cost: float = 0.0, periods_per_year: int = 252, block_rows: int = 4096):
+        """
+        rebalance: schedule, see rebalance_schedule (e.g. 'M', 'W', 21, or None).
+        drift_threshold: also rebalance when |weight - target| exceeds this for any asset.
+        transaction_cost: cost as a fraction of the traded value (0.001 = 10 bps).
+        block_rows: holding periods are evaluated in blocks of at most this many bars.
+        """
+        self.data_loader = data_loader
+        self.allocator = allocator
+        self.initial_capital = initial_capital
+        self.rebalance = rebalance
+        self.drift_threshold = drift_threshold
+        self.transaction_cost = transaction_cost
+        self.periods_per_year = periods_per_year
+        self.block_rows = block_rows
+        self.results = {}
+
+    def run(self, tickers: List[str], start_date: str, end_date: str):
+        close = self.data_loader.load_panel(tickers, start_date, end_date)
+        return self.run_on_data(close)
+
+    def run_on_data(self, close: pd.DataFrame):
+        """
+        Runs the portfolio backtest on an aligned dates x tickers Close DataFrame.
+        """
+        prices = close.ffill().to_numpy(dtype=np.float64)
+        n_bars, n_assets = prices.shape
+        self.allocator.prepare(close)
+
+        equity = np.full(n_bars, float(self.initial_capital))
+        weights = np.zeros((n_bars, n_assets))
+        turnover = np.zeros(n_bars)
+        costs = np.zeros(n_bars)
+
+        scheduled = np.flatnonzero(rebalance_schedule(close.index, self.rebalance))
+        t0 = min(self.allocator.warmup, n_bars)
+        value = float(self.initial_capital)
+        drifted = np.zeros(n_assets)
+        rebalances = []
+
+        while t0 < n_bars:
+            # Rebalance at the close of t0
+            target = np.where(np.isfinite(prices[t0]), self.allocator.weights(t0), 0.0)
+            turnover[t0] = np.abs(target - drifted).sum()
+            costs[t0] = value * turnover[t0] * self.transaction_cost
+            value -= costs[t0]
+            equity[t0] = value
+            weights[t0] = target
+            rebalances.append(t0)
+
+            # Hold until the next scheduled rebalance, unless the weights drift too far first
+            later = scheduled[np.searchsorted(scheduled, t0, side='right'):]
+            limit = int(later[0]) if len(later) else n_bars
+            base = np.where(np.isfinite(prices[t0]), prices[t0], 1.0)
+            cash = 1.0 - target.sum()
+            next_t = None
+            start = t0 + 1
+            while start < min(limit + 1, n_bars):
+                stop = min(start + self.block_rows, limit + 1, n_bars)
+                holdings = target * np.nan_to_num(prices[start:stop] / base, nan=1.0)
+                values = holdings.sum(axis=1) + cash
+                block_weights = holdings / values[:, None]
+
+                due = np.arange(start, stop) == limit
+                if self.drift_threshold is not None:
+                    due |= np.abs(block_weights - target).max(axis=1) > self.drift_threshold
+                end = start + int(np.argmax(due)) if due.any() else stop
+                equity[start:end] = value * values[:end - start]
+                weights[start:end] = block_weights[:end - start]
+                if end < stop:
+                    next_t = end
+                    value *= values[end - start]
+                    drifted = block_weights[end - start]
+                    break
+                start = stop
+
+            if next_t is None:
+                break
+            t0 = next_t
+
+        # Metrics cover the invested period: the flat cash bars before the first
+        # allocation (the allocator's warmup) would dilute returns and volatility
+        invested = np.flatnonzero(np.abs(weights).sum(axis=1) > 0)
+        first = max(int(invested[0]) if len(invested) else 0, 1)
+        returns = pd.Series(equity, index=close.index).pct_change().iloc[first:]
+        metrics = calculate_panel_metrics(returns, self.initial_capital, periods_per_year=self.periods_per_year).iloc[0].to_dict()
+        n_years = len(returns) / self.periods_per_year
+        metrics.update({
+            'final_equity': equity[-1],
+            'n_rebalances': len(rebalances),
+            'annual_turnover': turnover.sum() / n_years if n_years else 0.0,
+            'total_costs': costs.sum(),
+        })
+
+        weights = pd.DataFrame(weights, index=close.index, columns=close.columns)
+        self.results = {
+            'tickers': list(close.columns),
+            'metrics': metrics,
+            'equity': pd.Series(equity, index=close.index, name='Equity'),
+            'returns': returns,
+            'weights': weights,
+            'cash': 1.0 - weights.sum(axis=1),
+            'turnover': pd.Series(turnover, index=close.index, name='Turnover'),
+            'rebalances': close.index[rebalances],
+        }
+        return self.results
@@ -0,0 +1,162 @@
+"""
+Stage-level instrumentation.
+
+The engine and strategies wrap their stages in `profiling.stage(name)`,
+which reports to the active profiler. The default profiler does nothing;
+enable recording for a block of code with:
+
+    with profiling.profile(StageProfiler()) as profiler:
+        engine.run(...)
+    profiler.write_chrome_trace('trace.json')
+
+Custom backends subclass Profiler (or StageProfiler and override `record`).
+"""
+import json
+import os
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional
+
+import pandas as pd
+
+
+class Profiler:
+    """
+    Instrumentation interface. stage() is a context manager yielding a dict
+    that the caller may annotate (e.g. set 'rows' once it is known).
+    This base implementation records nothing.
+    """
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None, **attrs):
+        yield {'name': name, 'rows': rows, **attrs}
+
+
+class StageProfiler(Profiler):
+    """
+    Records wall time, CPU time, rows processed and peak memory (traced
+    Python/NumPy allocations above the level at stage start) of every
+    stage. Nested stages are kept with their depth and parent.
+    """
+
+    def __init__(self, memory: bool = True, **meta):
+        """
+        memory: track peak memory with tracemalloc (slows allocation-heavy code).
+        meta: run attributes stored with the trace (ticker, strategy...).
+        """
+        self.memory = memory
+        self.meta = meta
+        self.events: List[dict] = []
+        self._origin = time.perf_counter()
+        self._local = threading.local()
+        self._started_tracing = False
+
+    def _stack(self) -> list:
+        if not hasattr(self._local, 'stack'):
+            self._local.stack = []
+        return self._local.stack
+
+    @contextmanager
+    def stage(self, name: str, rows: Optional[int] = None, **attrs):
+        stack = self._stack()
+        event = {'name': name, 'rows': rows, **attrs}
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracing = True
+        if self.memory:
+            current, peak = tracemalloc.get_traced_memory()
+            if stack:
+                stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+            tracemalloc.reset_peak()
+            event['_base'] = event['_peak'] = current
+
+        stack.append(event)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        try:
+            yield event
+        finally:
+            wall_end, cpu_end = time.perf_counter(), time.process_time()
+            stack.pop()
+            event['start'] = wall_start - self._origin
+            event['wall_seconds'] = wall_end - wall_start
+            event['cpu_seconds'] = cpu_end - cpu_start
+            event['depth'] = len(stack)
+            event['parent'] = stack[-1]['name'] if stack else None
+            event['pid'] = os.getpid()
+            event['tid'] = threading.get_ident()
+            if self.memory:
+                peak = max(event.pop('_peak'), tracemalloc.get_traced_memory()[1])
+                event['peak_memory_bytes'] = peak - event.pop('_base')
+                if stack:
+                    stack[-1]['_peak'] = max(stack[-1]['_peak'], peak)
+            self.record(event)
+
+    def record(self, event: dict):
+        self.events.append(event)
+
+    def close(self):
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Per-stage totals: calls, wall and CPU time, rows and the largest peak.
+        """
+        if not self.events:
+            return pd.DataFrame()
+        events = pd.DataFrame(self.events)
+        aggregations = {'calls': ('name', 'size'), 'wall_seconds': ('wall_seconds', 'sum'),
+                        'cpu_seconds': ('cpu_seconds', 'sum'), 'rows': ('rows', 'sum')}
+        if 'peak_memory_bytes' in events:
+            aggregations['peak_memory_bytes'] = ('peak_memory_bytes', 'max')
+        return events.groupby('name', sort=False).agg(**aggregations).sort_values('wall_seconds', ascending=False)
+
+    def write_json(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'meta': self.meta, 'events': self.events}, f, indent=2, default=str)
+
+    def write_chrome_trace(self, path: str):
+        """
+        Writes the events in Chrome trace format (chrome://tracing, Perfetto).
+        """
+        trace = [{
+            'name': event['name'],
+            'ph': 'X',
+            'ts': event['start'] * 1e6,
+            'dur': event['wall_seconds'] * 1e6,
+            'pid': event['pid'],
+            'tid': event['tid'],
+            'args': {k: v for k, v in event.items() if k not in ('name', 'start', 'wall_seconds', 'pid', 'tid')},
+        } for event in self.events]
+        with open(path, 'w') as f:
+            json.dump({'traceEvents': trace, 'otherData': self.meta}, f, default=str)
+
+
+_active: ContextVar = ContextVar('profiler', default=Profiler())
+
+
+def active() -> Profiler:
+    return _active.get()
+
+
+def stage(name: str, rows: Optional[int] = None, **attrs):
+    """
+    Wraps a stage for the active profiler (a no-op unless one is enabled).
+    """
+    return _active.get().stage(name, rows, **attrs)
+
+
+@contextmanager
+def profile(profiler: Profiler):
+    """
+    Makes `profiler` the active profiler for this thread / context.
+    """
+    token = _active.set(profiler)
+    try:
+        yield profiler
+    finally:
+        _active.reset(token)
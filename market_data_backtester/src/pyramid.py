@@ -0,0 +1,251 @@
+"""
+Multi-timeframe bar pyramid.
+
+Coarser bars are aggregated from the finest ones level by level (e.g.
+1m -> 5m -> 1h -> 1d), each level from the one below it, with the OHLCV
+rules open=first, high=max, low=min, close=last, volume=sum. Buckets are
+aligned to the clock in the bars' own timezone, and buckets without bars
+are left out (no empty nights or weekends).
+
+Every aggregated bar records the position of the last finest bar it
+contains, which is when it becomes known. Aligned views of one level on
+another use it, so a bar only shows up once it is complete and never leaks
+the future.
+
+Completion is taken from the data, not the clock: a bucket whose last bars
+are missing (a gap, or the end of a trading session inside a daily bucket)
+completes at its last observed bar, not at its wall-clock end. Its values
+still only hold bars up to that point, but using it there assumes that no
+more bars of the bucket will arrive, which the data cannot show until the
+next bucket starts.
+"""
+import json
+import os
+import zlib
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+OHLCV = ['Open', 'High', 'Low', 'Close', 'Volume']
+
+# Bucket length of each interval, in nanoseconds
+PERIODS = {
+    '1m': 60 * 10**9, '2m': 120 * 10**9, '5m': 300 * 10**9, '15m': 900 * 10**9, '30m': 1800 * 10**9,
+    '1h': 3600 * 10**9, '60m': 3600 * 10**9, '90m': 5400 * 10**9, '1d': 86400 * 10**9,
+}
+DEFAULT_LEVELS = ('5m', '1h', '1d')
+
+
+def _period(interval: str) -> int:
+    if interval not in PERIODS:
+        raise ValueError(f"Unsupported pyramid interval: {interval} (expected one of {', '.join(PERIODS)})")
+    return PERIODS[interval]
+
+
+def aggregate(timestamps: np.ndarray, values: np.ndarray, period: int) -> tuple:
+    """
+    Aggregates sorted bars (int64 wall-clock nanoseconds, (n x 5) OHLCV
+    matrix) into buckets of `period` nanoseconds.
+    Returns (bucket starts, aggregated OHLCV, position of each bucket's last bar).
+    """
+    if len(timestamps) == 0:
+        return timestamps[:0], values[:0], np.empty(0, dtype=np.int64)
+    buckets = timestamps // period
+    starts = np.flatnonzero(np.diff(buckets, prepend=buckets[0] - 1))
+    ends = np.append(starts[1:], len(timestamps)) - 1
+
+    aggregated = np.empty((len(starts), 5), dtype=np.float64)
+    aggregated[:, 0] = values[starts, 0]
+    aggregated[:, 1] = np.maximum.reduceat(values[:, 1], starts)
+    aggregated[:, 2] = np.minimum.reduceat(values[:, 2], starts)
+    aggregated[:, 3] = values[ends, 3]
+    aggregated[:, 4] = np.add.reduceat(values[:, 4], starts)
+    return buckets[starts] * period, aggregated, ends
+
+
+class BarPyramid:
+    """
+    Bars of one ticker at several intervals, the first being the finest.
+    Per level it holds wall-clock bucket starts (int64 ns), an (n x 5) OHLCV
+    matrix and the position of each bar's last finest bar. Loaded pyramids
+    are memory-mapped, and frames and aligned views are built on the stored
+    arrays rather than copies.
+    """
+
+    def __init__(self, intervals: Sequence[str], timestamps: Dict[str, np.ndarray], values: Dict[str, np.ndarray],
+                 last: Dict[str, np.ndarray], tz: Optional[str] = None):
+        self.intervals = list(intervals)
+        self.timestamps = timestamps
+        self.values = values
+        self.last = last
+        self.tz = tz
+
+    @property
+    def base(self) -> str:
+        return self.intervals[0]
+
+    @classmethod
+    def build(cls, bars: pd.DataFrame, interval: str = '1m', levels: Sequence[str] = DEFAULT_LEVELS) -> 'BarPyramid':
+        """
+        Aggregates OHLCV `bars` at `interval` into each of `levels`, finest
+        first. Each level must be a whole multiple of the one below it.
+        """
+        intervals = [interval, *levels]
+        for finer, coarser in zip(intervals, intervals[1:]):
+            if _period(coarser) <= _period(finer) or _period(coarser) % _period(finer):
+                raise ValueError(f"{coarser} bars cannot be aggregated from {finer} bars")
+
+        index = bars.index
+        tz = str(index.tz) if index.tz is not None else None
+        # Buckets follow the local clock, so days start at local midnight
+        wall_clock = (index.tz_localize(None) if tz is not None else index).as_unit('ns').asi8
+        timestamps = {interval: wall_clock // _period(interval) * _period(interval)}
+        values = {interval: np.ascontiguousarray(bars[OHLCV].to_numpy(dtype=np.float64))}
+        last = {interval: np.arange(len(bars), dtype=np.int64)}
+
+        finer = interval
+        for level in levels:
+            timestamps[level], values[level], ends = aggregate(timestamps[finer], values[finer], _period(level))
+            last[level] = last[finer][ends]
+            finer = level
+        return cls(intervals, timestamps, values, last, tz)
+
+    def index(self, interval: str) -> pd.DatetimeIndex:
+        index = pd.DatetimeIndex(np.asarray(self.timestamps[interval]).view('datetime64[ns]'), name='Date')
+        if self.tz is None:
+            return index
+        # A repeated hour at the end of daylight saving time is one bucket, labelled in standard time
+        return index.tz_localize(self.tz, ambiguous=np.zeros(len(index), dtype=bool), nonexistent='shift_forward')
+
+    def frame(self, interval: str) -> pd.DataFrame:
+        """
+        OHLCV bars of one level, labelled by their bucket start.
+        """
+        return pd.DataFrame(self.values[interval], index=self.index(interval), columns=OHLCV, copy=False)
+
+    def positions(self, interval: str, on: Optional[str] = None) -> np.ndarray:
+        """
+        For every bar of level `on` (default: the finest), the position of the
+        latest `interval` bar that is complete at that bar's close, or -1
+        before the first one completes.
+        """
+        on = on or self.base
+        return np.searchsorted(self.last[interval], self.last[on], side='right') - 1
+
+    def aligned(self, interval: str, on: Optional[str] = None) -> 'AlignedBars':
+        """
+        `interval` bars as they were known at each bar of level `on` (see
+        positions), as an accessor over the level's own arrays: nothing is
+        copied up front, columns are gathered when asked for.
+        Lookahead-safe by construction.
+        """
+        on = on or self.base
+        return AlignedBars(self, interval, on, self.positions(interval, on))
+
+    def save(self, path: str, key: str = ''):
+        """
+        Writes one .npy file per level and array plus meta.json (written
+        last, so it marks a complete pyramid). `key` identifies the data the
+        pyramid was built from.
+        """
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, 'meta.json')):
+            os.remove(os.path.join(path, 'meta.json'))
+        for interval in self.intervals:
+            for name, arrays in (('timestamps', self.timestamps), ('values', self.values), ('last', self.last)):
+                # Replaced rather than overwritten: a pyramid loaded earlier may still map the old file
+                array_path = os.path.join(path, f'{interval}_{name}.npy')
+                with open(array_path + '.tmp', 'wb') as f:
+                    np.save(f, np.asarray(arrays[interval]))
+                os.replace(array_path + '.tmp', array_path)
+        tmp_path = os.path.join(path, 'meta.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'intervals': self.intervals, 'tz': self.tz, 'key': key}, f)
+        os.replace(tmp_path, os.path.join(path, 'meta.json'))
+
+    @staticmethod
+    def stored_key(path: str) -> Optional[str]:
+        meta_path = os.path.join(path, 'meta.json')
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path) as f:
+            return json.load(f)['key']
+
+    @classmethod
+    def load(cls, path: str, mmap: bool = True) -> 'BarPyramid':
+        with open(os.path.join(path, 'meta.json')) as f:
+            meta = json.load(f)
+        arrays = {name: {} for name in ('timestamps', 'values', 'last')}
+        for interval in meta['intervals']:
+            for name in arrays:
+                arrays[name][interval] = np.load(os.path.join(path, f'{interval}_{name}.npy'),
+                                                 mmap_mode='r' if mmap else None)
+        return cls(meta['intervals'], arrays['timestamps'], arrays['values'], arrays['last'], meta['tz'])
+
+
+class AlignedBars:
+    """
+    The bars of one pyramid level as known at each bar of another: row i
+    refers to the latest `interval` bar completed by the close of bar i of
+    level `on` (`positions`, -1 before the first). Work on the compact level
+    (e.g. an indicator over its closes) and gather the result with take(),
+    rather than computing on a per-row copy of the coarse bars.
+    """
+
+    def __init__(self, pyramid: BarPyramid, interval: str, on: str, positions: np.ndarray):
+        self.pyramid = pyramid
+        self.interval = interval
+        self.on = on
+        self.positions = positions
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def known(self) -> np.ndarray:
+        return self.positions >= 0
+
+    def take(self, level_values: np.ndarray, fill=np.nan) -> np.ndarray:
+        """
+        Per-row values of an array over the `interval` bars (one value per
+        bar, e.g. an indicator), `fill` before the first completes.
+        """
+        level_values = np.asarray(level_values)
+        out = np.full(len(self.positions), fill, dtype=np.result_type(level_values, fill))
+        known = self.known
+        out[known] = level_values[self.positions[known]]
+        return out
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        One OHLCV column of the known bars, NaN before the first.
+        """
+        return self.take(np.asarray(self.pyramid.values[self.interval])[:, OHLCV.index(name)])
+
+    def bar_start(self) -> pd.DatetimeIndex:
+        """
+        Bucket start of each row's bar (NaT before the first).
+        """
+        starts = self.pyramid.index(self.interval)
+        return starts[np.maximum(self.positions, 0)].where(self.known)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Materializes the full view (one OHLCV row per `on` bar plus
+        'Bar_Start'), e.g. for inspection; avoid on long histories.
+        """
+        frame = pd.DataFrame({name: self.column(name) for name in OHLCV}, index=self.pyramid.index(self.on))
+        frame['Bar_Start'] = self.bar_start()
+        return frame
+
+
+def bars_key(bars: pd.DataFrame, interval: str, levels: Sequence[str]) -> str:
+    """
+    Cheap content key of the finest bars and the levels built from them
+    (a checksum of the raw OHLCV and timestamp bytes).
+    """
+    values = np.ascontiguousarray(bars[OHLCV].to_numpy(dtype=np.float64))
+    checksum = zlib.crc32(values)
+    checksum = zlib.crc32(np.ascontiguousarray(bars.index.asi8), checksum)
+    return f"{interval}>{'>'.join(levels)}:{len(bars)}:{checksum:08x}"
@@ -0,0 +1,105 @@
+"""
+Name -> strategy class registry.
+
+Built-in strategies are recorded as "module:Class" strings and only imported
+when they are looked up, so choosing `sma` never imports scikit-learn or
+TensorFlow. Third-party packages can add strategies through the
+`market_data_backtester.strategies` entry point group, e.g. in pyproject.toml:
+
+    [project.entry-points."market_data_backtester.strategies"]
+    breakout = "my_package.strategies:BreakoutStrategy"
+"""
+import importlib
+import inspect
+from functools import partial
+from importlib.metadata import entry_points
+from typing import Callable, Dict, List, Optional, Union
+
+ENTRY_POINT_GROUP = 'market_data_backtester.strategies'
+
+# name -> (target, default kwargs); target is "module:Class" or a class
+_registry: Dict[str, tuple] = {}
+_entry_points_loaded = False
+
+
+def register(name: str, target: Union[str, type], defaults: Optional[dict] = None):
+    """
+    Registers a strategy under `name`. `target` is a class or a lazy
+    "module:Class" reference (relative modules resolve against this package).
+    `defaults` are constructor kwargs used by `create` and `factory`.
+    """
+    _registry[name] = (target, dict(defaults or {}))
+
+
+register('sma', '.strategies:MovingAverageCrossover', {'short_window': 50, 'long_window': 200})
+register('rsi', '.strategies:RSIStrategy', {'period': 14, 'buy_threshold': 30, 'sell_threshold': 70})
+register('momentum', '.strategies:MomentumStrategy', {'period': 10})
+register('mtf', '.strategies:MultiTimeframeTrend', {'interval': '1m', 'entry_interval': '1h', 'trend_interval': '1d'})
+register('rf', '.ml_strategies:MLStrategy', {'model_type': 'rf'})
+register('lr', '.ml_strategies:MLStrategy', {'model_type': 'lr'})
+register('sgd', '.ml_strategies:MLStrategy', {'model_type': 'sgd'})
+register('lstm', '.dl_strategies:LSTMStrategy', {'epochs': 5})  # Reduced epochs for demo
+register('lstm_numpy', '.lstm_numpy:NumpyLSTMStrategy')
+
+
+def _load_entry_points():
+    global _entry_points_loaded
+    if _entry_points_loaded:
+        return
+    _entry_points_loaded = True
+    for entry_point in entry_points(group=ENTRY_POINT_GROUP):
+        # Built-ins win; the entry point itself is only loaded when chosen
+        _registry.setdefault(entry_point.name, (entry_point, {}))
+
+
+def available() -> List[str]:
+    _load_entry_points()
+    return list(_registry)
+
+
+def get_class(name: str) -> type:
+    """
+    Resolves a registered name to its class, importing its module on first use.
+    """
+    _load_entry_points()
+    if name not in _registry:
+        raise KeyError(f"Unknown strategy '{name}'. Available: {', '.join(available())}")
+
+    target, defaults = _registry[name]
+    if isinstance(target, str):
+        module_name, class_name = target.split(':')
+        module = importlib.import_module(module_name, package=__package__)
+        target = getattr(module, class_name)
+    elif not isinstance(target, type):
+        target = target.load()
+    _registry[name] = (target, defaults)
+    return target
+
+
+def defaults(name: str) -> dict:
+    get_class(name)
+    return dict(_registry[name][1])
+
+
+def supported_options(name: str, **options) -> dict:
+    """
+    Keeps the optional runtime kwargs (artifact store, streaming...) that the
+    strategy's constructor accepts. Options left as None keep the constructor's default.
+    """
+    params = inspect.signature(get_class(name)).parameters
+    return {key: value for key, value in options.items() if key in params and value is not None}
+
+
+def create(name: str, **kwargs):
+    """
+    Instantiates a strategy with its registered defaults, overridden by `kwargs`.
+    """
+    return get_class(name)(**{**defaults(name), **kwargs})
+
+
+def factory(name: str, **kwargs) -> Callable:
+    """
+    Picklable callable creating fresh instances (for sweeps and walk-forward
+    workers). Keyword arguments passed at call time override the defaults.
+    """
+    return partial(get_class(name), **{**defaults(name), **kwargs})
@@ -0,0 +1,95 @@
+import functools
+import glob
+import hashlib
+import inspect
+import json
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+# Per-bar columns kept with a stored result (OHLCV inputs are dropped)
+DATA_COLUMNS = ['Close', 'Market_Returns', 'Signal', 'Position', 'Strategy_Returns',
+                'Cumulative_Market_Returns', 'Cumulative_Strategy_Returns', 'Equity']
+
+
+def code_version(strategy) -> str:
+    """
+    Hash of every module of this package plus the strategy's own source file,
+    so stored results are invalidated by any code change that could affect them.
+    Computed once per process and strategy file: the code that is running
+    does not change when its files are edited.
+    """
+    return _code_version(inspect.getsourcefile(type(strategy)))
+
+
+@functools.lru_cache(maxsize=None)
+def _code_version(strategy_path: Optional[str]) -> str:
+    paths = sorted(glob.glob(os.path.join(os.path.dirname(os.path.abspath(__file__)), '*.py')))
+    if strategy_path is not None and os.path.abspath(strategy_path) not in paths:
+        paths.append(strategy_path)
+
+    digest = hashlib.sha256()
+    for path in paths:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ResultStore:
+    """
+    Content-addressed store of backtest results.
+
+    Each result lives in a directory named after the hash of its full run
+    configuration (strategy and parameters, engine settings, data and code
+    fingerprints): metrics.json holds the metrics, data.parquet the returns
+    and equity columns.
+    """
+
+    def __init__(self, root: str = ".cache/results"):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def key(self, **config) -> str:
+        payload = json.dumps(config, sort_keys=True, default=_json_default)
+        return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+    def exists(self, key: str) -> bool:
+        # metrics.json is written last, so it marks a complete result
+        return os.path.exists(os.path.join(self.root, key, 'metrics.json'))
+
+    def save(self, key: str, results: dict, config: Optional[dict] = None):
+        path = os.path.join(self.root, key)
+        os.makedirs(path, exist_ok=True)
+
+        data = results.get('data')
+        if data is not None:
+            data[[c for c in DATA_COLUMNS if c in data.columns]].to_parquet(
+                os.path.join(path, 'data.parquet'), compression='zstd')
+
+        metrics = {k: v for k, v in results.items() if k != 'data'}
+        tmp_path = os.path.join(path, 'metrics.json.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'metrics': metrics, 'config': config or {}}, f, default=_json_default)
+        os.replace(tmp_path, os.path.join(path, 'metrics.json'))
+
+    def load(self, key: str) -> Optional[dict]:
+        """
+        Returns the stored results dict ('data' holds the stored columns), or
+        None if the configuration has not been run yet.
+        """
+        if not self.exists(key):
+            return None
+        path = os.path.join(self.root, key)
+        with open(os.path.join(path, 'metrics.json')) as f:
+            results = json.load(f)['metrics']
+        data_path = os.path.join(path, 'data.parquet')
+        results['data'] = pd.read_parquet(data_path) if os.path.exists(data_path) else None
+        return results
@@ -0,0 +1,214 @@
+"""
+Long-lived backtest service.
+
+Keeps loaded OHLCV frames, strategy features and trained strategies in memory
+between requests, so repeated backtests skip imports, downloads and training.
+Jobs are JSON objects POSTed to /backtest over localhost HTTP or a Unix
+socket; each request is handled on its own thread.
+
+    POST /backtest  {"strategy": "rf", "ticker": "AAPL", "start": "2020-01-01", "end": "2023-01-01"}
+    GET  /stats     cache sizes, hit rates and evictions
+"""
+import contextlib
+import json
+import os
+import socketserver
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+from . import indicators, registry
+from .artifacts import ArtifactStore
+from .data import DataLoader
+from .engine import BacktestEngine
+from .lru import BoundedCache
+
+
+def frame_size(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(deep=True).sum())
+
+
+class BacktestService:
+    """
+    Runs backtest jobs against warm caches of frames, features and trained strategies.
+
+    A job is a dict with the CLI's options: strategy (required), ticker, start,
+    end, interval, params (strategy kwargs), train_start / train_end (trainable
+    strategies), initial_capital, stop_loss, take_profit, trailing_stop,
+    position_size, and include_equity to also return the equity curve.
+    """
+
+    def __init__(self, loader: DataLoader, artifact_store: Optional[ArtifactStore] = None,
+                 max_frame_bytes: int = 512 * 2**20, max_feature_bytes: int = 512 * 2**20,
+                 max_strategies: int = 32):
+        self.loader = loader
+        self.artifact_store = artifact_store
+        self.frames = BoundedCache(max_bytes=max_frame_bytes, sizeof=frame_size)
+        self.features = BoundedCache(max_bytes=max_feature_bytes, sizeof=lambda features: features.nbytes)
+        # Model sizes are not known up front, so trained strategies are bounded by count
+        self.strategies = BoundedCache(max_items=max_strategies)
+        self.jobs = 0
+        self._jobs_lock = threading.Lock()
+
+    def load_frame(self, ticker: str, start: str, end: str, interval: str = '1d') -> pd.DataFrame:
+        """
+        Cached DataLoader frame; callers must copy before modifying it.
+        """
+        return self.frames.get_or_compute(
+            (ticker, start, end, interval),
+            lambda: self.loader.load_data(ticker, start, end, interval),
+        )
+
+    def get_strategy(self, name: str, params: dict, job: dict):
+        """
+        Returns (strategy, lock). Trainable strategies are trained once per
+        (strategy, params, ticker, training period); the lock serializes
+        predictions, since Keras models are not safe to call from several threads.
+        """
+        strategy_cls = registry.get_class(name)
+        if not hasattr(strategy_cls, 'train'):
+            return registry.create(name, **params), None
+
+        def train():
+            options = registry.supported_options(name, artifact_store=self.artifact_store)
+            strategy = registry.create(name, **{**options, **params})
+            strategy.train(self.load_frame(job['ticker'], job['train_start'], job['train_end'], job['interval']))
+            return strategy, threading.Lock()
+
+        key = (name, _freeze(params), job['ticker'], job['train_start'], job['train_end'], job['interval'])
+        return self.strategies.get_or_compute(key, train)
+
+    def signals(self, name: str, params: dict, job: dict, df: pd.DataFrame) -> pd.Series:
+        strategy, lock = self.get_strategy(name, params, job)
+        if not hasattr(strategy, 'build_features'):
+            # Rule-based indicators are memoized by the indicators module
+            with indicators.shared_inputs():
+                return strategy.generate_signals(df)
+
+        key = (name, _freeze(params), job['ticker'], job['start'], job['end'], job['interval'])
+        features = self.features.get_or_compute(key, lambda: strategy.build_features(df))
+        # Strategies without training (no Keras model) are safe to share
+        with lock or contextlib.nullcontext():
+            return strategy.predict_features(features).reindex(df.index).fillna(0)
+
+    def run(self, job: dict) -> dict:
+        job = {
+            'ticker': 'AAPL', 'start': '2020-01-01', 'end': '2023-01-01', 'interval': '1d',
+            'train_start': '2010-01-01', 'train_end': '2019-12-31', 'params': {},
+            'initial_capital': 10000.0, 'position_size': 1.0, **job,
+        }
+        if 'strategy' not in job:
+            raise ValueError("Job needs a 'strategy'")
+        with self._jobs_lock:
+            self.jobs += 1
+
+        started = time.perf_counter()
+        name, params = job['strategy'], dict(job['params'])
+        df = self.load_frame(job['ticker'], job['start'], job['end'], job['interval']).copy()
+        signals = self.signals(name, params, job, df)
+
+        engine = BacktestEngine(None, None, job['initial_capital'], stop_loss=job.get('stop_loss'),
+                                take_profit=job.get('take_profit'), trailing_stop=job.get('trailing_stop'),
+                                position_size=job['position_size'])
+        results = engine.run_with_signals(df, signals, job['ticker'])
+
+        data = results.pop('data')
+        results['strategy'] = name
+        results['elapsed_seconds'] = time.perf_counter() - started
+        if job.get('include_equity'):
+            results['equity'] = {'index': [str(t) for t in data.index], 'values': data['Equity'].tolist()}
+        return results
+
+    def stats(self) -> dict:
+        return {
+            'jobs': self.jobs,
+            'frames': self.frames.stats(),
+            'features': self.features.stats(),
+            'strategies': self.strategies.stats(),
+        }
+
+
+def _freeze(params: dict) -> str:
+    return json.dumps(params, sort_keys=True, default=str)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    return str(value)
+
+
+class ServiceHandler(BaseHTTPRequestHandler):
+    service: BacktestService = None
+
+    def _send(self, status: int, payload: dict):
+        body = json.dumps(payload, default=_json_default).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path in ('/stats', '/health'):
+            self._send(200, self.service.stats())
+        else:
+            self._send(404, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/backtest':
+            self._send(404, {'error': f'Unknown path {self.path}'})
+            return
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            job = json.loads(self.rfile.read(length) or b'{}')
+            self._send(200, self.service.run(job))
+        except (ValueError, KeyError, TypeError) as e:
+            self._send(400, {'error': str(e.args[0]) if e.args else str(e)})
+        except Exception as e:
+            self._send(500, {'error': f'{type(e).__name__}: {e}'})
+
+    def address_string(self):
+        # Unix socket peers have no (host, port) address
+        return self.client_address[0] if self.client_address else 'unix'
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        socketserver.UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = 'localhost', 0
+
+
+def make_server(service: BacktestService, host: str = '127.0.0.1', port: int = 8765,
+                socket_path: Optional[str] = None):
+    """
+    Returns an HTTP server for `service`, listening on a Unix socket if
+    `socket_path` is given and on host:port otherwise.
+    """
+    handler = type('BoundServiceHandler', (ServiceHandler,), {'service': service})
+    if socket_path is not None:
+        if os.path.exists(socket_path):
+            os.remove(socket_path)
+        return ThreadingUnixHTTPServer(socket_path, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def serve(service: BacktestService, host: str = '127.0.0.1', port: int = 8765, socket_path: Optional[str] = None):
+    server = make_server(service, host, port, socket_path)
+    where = socket_path or f'http://{host}:{server.server_port}'
+    print(f"Backtest service listening on {where} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
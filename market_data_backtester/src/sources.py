@@ -0,0 +1,147 @@
+"""
+Pluggable bar sources for DataLoader.
+
+A source's fetch() returns a raw frame that DataLoader.normalize understands
+(yfinance layout or plain OHLCV columns). An empty frame means the source has
+no data for the request; an exception is a failure that DataLoader may retry.
+Every source owns a rate limiter shared by all threads that fetch from it.
+"""
+import threading
+import time
+import zlib
+from functools import lru_cache
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+from .synthetic import as_yfinance, synthetic_ohlcv
+
+
+class RateLimiter:
+    """
+    Token bucket: at most `rate` acquisitions per second on average, with
+    bursts of up to `burst`. Thread-safe; rate=None never waits.
+    """
+
+    def __init__(self, rate: Optional[float] = None, burst: int = 1):
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.rate:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class DataSource:
+    """
+    Base class of bar sources.
+    rate_limit: requests per second across all threads (None: unlimited).
+    """
+    name = 'source'
+
+    def __init__(self, rate_limit: Optional[float] = None, burst: int = 1):
+        self.limiter = RateLimiter(rate_limit, burst)
+
+    def fetch(self, ticker: str, start_date: str, end_date: str, interval: str = "1d") -> pd.DataFrame:
+        raise NotImplementedError
+
+
+class YFinanceSource(DataSource):
+    """
+    Yahoo Finance through yfinance (imported on the first fetch).
+
+    Uses Ticker.history rather than yf.download, which keeps its results in
+    module-level state and is not safe to call from several threads.
+    """
+    name = 'yfinance'
+
+    def __init__(self, rate_limit: Optional[float] = 5.0, burst: int = 5):
+        super().__init__(rate_limit, burst)
+
+    def fetch(self, ticker: str, start_date: str, end_date: str, interval: str = "1d") -> pd.DataFrame:
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError, YFTzMissingError
+        try:
+            df = yf.Ticker(ticker).history(start=start_date, end=end_date, interval=interval,
+                                           actions=False, raise_errors=True)
+        except (YFPricesMissingError, YFTzMissingError):
+            return pd.DataFrame()
+        # Same convention as yf.download: daily and longer bars are tz-naive dates
+        if not interval.endswith(('m', 'h')) and df.index.tz is not None:
+            df.index = df.index.tz_localize(None)
+        return df
+
+
+# yfinance interval -> pandas frequency of the synthetic bars
+_FREQUENCIES = {'1m': 'min', '5m': '5min', '15m': '15min', '30m': '30min', '1h': 'h', '60m': 'h',
+                '1d': 'B', '1wk': 'W-FRI', '1mo': 'BME'}
+
+
+@lru_cache(maxsize=32)
+def _calendar(start: pd.Timestamp, end: pd.Timestamp, freq: str) -> pd.DatetimeIndex:
+    # Business-day ranges are generated one timestamp at a time under the GIL;
+    # concurrent fetches over the same window share one.
+    return pd.date_range(start, end, freq=freq, inclusive='left', name='Date')
+
+
+class SyntheticSource(DataSource):
+    """
+    Local fake provider with deterministic random-walk bars per ticker, for
+    tests and offline experiments. Daily and longer bars are anchored at
+    `epoch`, so overlapping requests agree; intraday bars at the request's start day.
+
+    latency: seconds each fetch takes (to simulate the network).
+    failures: ticker -> number of fetches that fail before one succeeds.
+    missing: tickers the source has no data for.
+    """
+    name = 'synthetic'
+
+    def __init__(self, seed: int = 0, latency: float = 0.0, failures: Optional[Dict[str, int]] = None,
+                 missing: Iterable[str] = (), epoch: str = "1990-01-01", rate_limit: Optional[float] = None, burst: int = 1):
+        super().__init__(rate_limit, burst)
+        self.seed = seed
+        self.latency = latency
+        self.failures = dict(failures or {})
+        self.missing = set(missing)
+        self.epoch = pd.Timestamp(epoch)
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def fetch(self, ticker: str, start_date: str, end_date: str, interval: str = "1d") -> pd.DataFrame:
+        with self._lock:
+            self.calls += 1
+            failing = self.failures.get(ticker, 0) > 0
+            if failing:
+                self.failures[ticker] -= 1
+        if self.latency:
+            time.sleep(self.latency)
+        if failing:
+            raise ConnectionError(f"Simulated failure fetching {ticker}")
+        if ticker in self.missing:
+            return pd.DataFrame()
+
+        freq = _FREQUENCIES.get(interval)
+        if freq is None:
+            raise ValueError(f"Unsupported interval for the synthetic source: {interval}")
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        anchor = start.normalize() if interval.endswith(('m', 'h')) else min(self.epoch, start)
+        calendar = _calendar(anchor, end, freq)
+        if len(calendar) == 0:
+            return pd.DataFrame()
+
+        bars = synthetic_ohlcv(len(calendar), seed=zlib.crc32(ticker.encode()) ^ self.seed, start=anchor, freq='s',
+                               volatility=0.02 if freq in ('B', 'W-FRI', 'BME') else 0.001).set_axis(calendar)
+        bars = bars[(bars.index >= start) & (bars.index < end)]
+        return as_yfinance(bars, ticker)
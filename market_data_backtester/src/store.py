@@ -0,0 +1,93 @@
+import os
+import re
+from typing import Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+
+def _timestamp(value: str, index: pd.DatetimeIndex) -> pd.Timestamp:
+    timestamp = pd.Timestamp(value)
+    return timestamp.tz_localize(index.tz) if index.tz is not None else timestamp
+
+
+def _between(df: pd.DataFrame, start: Optional[str], end: Optional[str]) -> pd.DataFrame:
+    # `end` is exclusive, like DataLoader
+    mask = np.ones(len(df), dtype=bool)
+    if start is not None:
+        mask &= df.index >= _timestamp(start, df.index)
+    if end is not None:
+        mask &= df.index < _timestamp(end, df.index)
+    return df if mask.all() else df[mask]
+
+
+class BarStore:
+    """
+    Partitioned on-disk store for long bar histories (e.g. years of 1-minute bars).
+
+    Bars are kept in one Parquet file per ticker, interval and calendar month:
+    `{root}/{ticker}/{interval}/{YYYY-MM}.parquet`. Histories are read back as
+    a stream of bounded chunks, so they never have to fit in memory at once.
+    """
+
+    def __init__(self, root: str = ".cache/bars", row_group_size: int = 100_000):
+        self.root = root
+        self.row_group_size = row_group_size
+        os.makedirs(self.root, exist_ok=True)
+
+    def _dir(self, ticker: str, interval: str) -> str:
+        safe_ticker = re.sub(r"[^A-Za-z0-9_.-]", "_", ticker)
+        return os.path.join(self.root, safe_ticker, interval)
+
+    def partitions(self, ticker: str, interval: str, start: Optional[str] = None, end: Optional[str] = None) -> List[str]:
+        """
+        Returns the partition files overlapping [start, end), in time order.
+        """
+        directory = self._dir(ticker, interval)
+        if not os.path.isdir(directory):
+            return []
+        first = pd.Timestamp(start).strftime("%Y-%m") if start is not None else None
+        last = pd.Timestamp(end).strftime("%Y-%m") if end is not None else None
+        months = sorted(name[:-len(".parquet")] for name in os.listdir(directory) if name.endswith(".parquet"))
+        return [
+            os.path.join(directory, f"{month}.parquet") for month in months
+            if (first is None or month >= first) and (last is None or month <= last)
+        ]
+
+    def write(self, ticker: str, interval: str, df: pd.DataFrame):
+        """
+        Adds bars to the store, merging them into existing monthly partitions
+        (new rows win on duplicate timestamps).
+        """
+        if df.empty:
+            return
+        directory = self._dir(ticker, interval)
+        os.makedirs(directory, exist_ok=True)
+
+        months = df.index.year * 100 + df.index.month
+        for month, part in df.groupby(months):
+            path = os.path.join(directory, f"{month // 100:04d}-{month % 100:02d}.parquet")
+            if os.path.exists(path):
+                part = pd.concat([pd.read_parquet(path), part])
+                part = part[~part.index.duplicated(keep="last")]
+            part = part.sort_index()
+            # Write to a temporary file first so readers never see a partial partition
+            tmp_path = path + ".tmp"
+            part.to_parquet(tmp_path, row_group_size=self.row_group_size)
+            os.replace(tmp_path, path)
+
+    def iter_chunks(self, ticker: str, interval: str, start: Optional[str] = None, end: Optional[str] = None,
+                    chunk_rows: int = 100_000) -> Iterator[pd.DataFrame]:
+        """
+        Yields consecutive bars in [start, end) as DataFrames of at most
+        `chunk_rows` rows. Only one chunk (plus one Parquet row group) is in
+        memory at a time.
+        """
+        for path in self.partitions(ticker, interval, start, end):
+            parquet = pq.ParquetFile(path)
+            for batch in parquet.iter_batches(batch_size=chunk_rows):
+                chunk = _between(pa.Table.from_batches([batch], schema=parquet.schema_arrow).to_pandas(), start, end)
+                if not chunk.empty:
+                    yield chunk
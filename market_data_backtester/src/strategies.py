@@ -1,8 +1,39 @@
 import pandas as pd
 import numpy as np
 from abc import ABC, abstractmethod
+from . import indicators
+from . import incremental
+from . import kernels
+from .pyramid import BarPyramid
+
+def _rolling_mean(values: np.ndarray, window: int, min_periods: int = None) -> np.ndarray:
+    """
+    Column-wise rolling mean of a 2D array, ignoring NaNs like pandas does.
+    Rows with fewer than `min_periods` valid observations are NaN.
+    """
+    if min_periods is None:
+        min_periods = window
+    valid = ~np.isnan(values)
+    sums = np.cumsum(np.where(valid, values, 0.0), axis=0)
+    counts = np.cumsum(valid, axis=0)
+    sums[window:] = sums[window:] - sums[:-window].copy()
+    counts[window:] = counts[window:] - counts[:-window].copy()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = sums / counts
+    means[counts < min_periods] = np.nan
+    return means
 
 class Strategy(ABC):
+    # Bars of history generate_signals needs before a bar to reproduce that
+    # bar's signal exactly; None if signals depend on the whole history
+    # (e.g. EMA-based features), which rules out chunked runs
+    warmup = None
+
+    @property
+    def supports_panel(self) -> bool:
+        """Whether the strategy implements generate_panel_signals."""
+        return type(self).generate_panel_signals is not Strategy.generate_panel_signals
+
     @abstractmethod
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         """
@@ -11,17 +42,59 @@ class Strategy(ABC):
         """
         pass
 
+    def generate_panel_signals(self, close: pd.DataFrame) -> pd.DataFrame:
+        """
+        Takes a dates x tickers DataFrame of Close prices and returns signals
+        of the same shape, computed for all tickers at once.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support panel mode")
+
+    def generate_chunk_signals(self, df: pd.DataFrame, n_history: int, previous_signal: float) -> pd.Series:
+        """
+        Chunked counterpart of generate_signals. The first `n_history` rows of
+        df (at most `warmup`) are carried over from the previous chunk;
+        returns the signals of the remaining rows. previous_signal is the last
+        signal of the previous chunk (0 for the first chunk).
+        """
+        return self.generate_signals(df).iloc[n_history:]
+
+    def config(self) -> dict:
+        """
+        JSON-serializable description of what determines the signals, used to
+        key stored backtest results. Defaults to the public scalar attributes.
+        """
+        return {name: value for name, value in vars(self).items()
+                if not name.startswith('_') and isinstance(value, (bool, int, float, str, type(None)))}
+
+    def reset(self):
+        """
+        Clears the streaming state before a bar-by-bar run.
+        """
+        pass
+
+    def on_bar(self, bar) -> float:
+        """
+        Event-driven counterpart of generate_signals: receives one bar at a time
+        (with Open, High, Low, Close, Volume attributes) and returns the signal
+        for that bar. Must agree with generate_signals on the same history.
+        """
+        raise NotImplementedError(f"{type(self).__name__} does not support event-driven mode")
+
 class MovingAverageCrossover(Strategy):
     def __init__(self, short_window: int = 50, long_window: int = 200):
         self.short_window = short_window
         self.long_window = long_window
 
+    @property
+    def warmup(self) -> int:
+        return max(self.short_window, self.long_window) - 1
+
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         signals = pd.Series(0, index=df.index)
         close = df['Close']
         
-        short_mavg = close.rolling(window=self.short_window, min_periods=1).mean()
-        long_mavg = close.rolling(window=self.long_window, min_periods=1).mean()
+        short_mavg = indicators.sma(close, self.short_window, min_periods=1)
+        long_mavg = indicators.sma(close, self.long_window, min_periods=1)
         
         # Create signals
         # 1 where short > long, 0 otherwise
@@ -36,19 +109,34 @@ class MovingAverageCrossover(Strategy):
         
         return pd.Series(signals, index=df.index)
 
+    def generate_panel_signals(self, close: pd.DataFrame) -> pd.DataFrame:
+        values = close.to_numpy(dtype=np.float64)
+        short_mavg = _rolling_mean(values, self.short_window, min_periods=1)
+        long_mavg = _rolling_mean(values, self.long_window, min_periods=1)
+        signals = np.where(short_mavg > long_mavg, 1.0, 0.0)
+        return pd.DataFrame(signals, index=close.index, columns=close.columns)
+
+    def reset(self):
+        self._short_mavg = incremental.SMA(self.short_window, min_periods=1)
+        self._long_mavg = incremental.SMA(self.long_window, min_periods=1)
+
+    def on_bar(self, bar) -> float:
+        short_mavg = self._short_mavg.update(bar.Close)
+        long_mavg = self._long_mavg.update(bar.Close)
+        return 1.0 if short_mavg > long_mavg else 0.0
+
 class RSIStrategy(Strategy):
     def __init__(self, period: int = 14, buy_threshold: int = 30, sell_threshold: int = 70):
         self.period = period
         self.buy_threshold = buy_threshold
         self.sell_threshold = sell_threshold
 
-    def generate_signals(self, df: pd.DataFrame) -> pd.Series:
-        delta = df['Close'].diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=self.period).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=self.period).mean()
+    @property
+    def warmup(self) -> int:
+        return self.period
 
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+    def generate_signals(self, df: pd.DataFrame) -> pd.Series:
+        rsi = indicators.rsi(df['Close'], self.period)
         
         signals = pd.Series(0, index=df.index)
         
@@ -76,16 +164,112 @@ class RSIStrategy(Strategy):
         # We can forward fill signals to simulate holding?
         # Let's try: Buy (1) triggers holding until Sell (-1).
         
-        signals = signals.replace(0, np.nan).ffill().fillna(0)
+        # The hold-until-exit state is carried by the ffill kernel
+        signals = pd.Series(kernels.ffill_nonzero(signals.to_numpy()), index=df.index)
         
         return signals
 
+    def generate_panel_signals(self, close: pd.DataFrame) -> pd.DataFrame:
+        values = close.to_numpy(dtype=np.float64)
+        delta = np.diff(values, axis=0, prepend=np.nan)
+        # Same as the Series version: a NaN delta counts as zero gain and loss
+        gain = _rolling_mean(np.where(delta > 0, delta, 0.0), self.period)
+        loss = _rolling_mean(np.where(delta < 0, -delta, 0.0), self.period)
+        # ...but RSI is undefined until a ticker has `period` prices of its own
+        listed = _rolling_mean(np.isfinite(values).astype(np.float64), self.period) == 1
+        gain[~listed] = np.nan
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+
+        signals = np.zeros_like(values)
+        signals[rsi < self.buy_threshold] = 1.0
+        signals[rsi > self.sell_threshold] = -1.0
+        return pd.DataFrame(kernels.ffill_nonzero(signals), index=close.index, columns=close.columns)
+
+    def generate_chunk_signals(self, df: pd.DataFrame, n_history: int, previous_signal: float) -> pd.Series:
+        rsi = indicators.rsi(df['Close'], self.period).to_numpy()[n_history:]
+        signals = np.zeros(len(rsi))
+        signals[rsi < self.buy_threshold] = 1.0
+        signals[rsi > self.sell_threshold] = -1.0
+        # The position held at the end of the previous chunk carries over
+        return pd.Series(kernels.ffill_nonzero(signals, initial=previous_signal), index=df.index[n_history:])
+
+    def reset(self):
+        self._rsi = incremental.RSI(self.period)
+        self._position = 0.0
+
+    def on_bar(self, bar) -> float:
+        rsi = self._rsi.update(bar.Close)
+        if rsi > self.sell_threshold:
+            self._position = -1.0
+        elif rsi < self.buy_threshold:
+            self._position = 1.0
+        return self._position
+
 class MomentumStrategy(Strategy):
     def __init__(self, period: int = 10):
         self.period = period
 
+    @property
+    def warmup(self) -> int:
+        return self.period
+
     def generate_signals(self, df: pd.DataFrame) -> pd.Series:
         # Simple Momentum: Price > Price N days ago
-        momentum = df['Close'] - df['Close'].shift(self.period)
+        momentum = indicators.momentum(df['Close'], self.period)
         signals = np.where(momentum > 0, 1.0, 0.0)
         return pd.Series(signals, index=df.index)
+
+    def generate_panel_signals(self, close: pd.DataFrame) -> pd.DataFrame:
+        values = close.to_numpy(dtype=np.float64)
+        momentum = np.full_like(values, np.nan)
+        momentum[self.period:] = values[self.period:] - values[:-self.period]
+        signals = np.where(momentum > 0, 1.0, 0.0)
+        return pd.DataFrame(signals, index=close.index, columns=close.columns)
+
+    def reset(self):
+        self._momentum = incremental.Momentum(self.period)
+
+    def on_bar(self, bar) -> float:
+        return 1.0 if self._momentum.update(bar.Close) > 0 else 0.0
+
+class MultiTimeframeTrend(Strategy):
+    """
+    Momentum entries on one timeframe, filtered by the trend of a slower one
+    (e.g. hourly entries taken only while the daily trend is up). Both are
+    aggregated from the input bars with a BarPyramid, and each bar only sees
+    the entry and trend bars completed by its close.
+    """
+    def __init__(self, interval: str = '1m', entry_interval: str = '1h', entry_period: int = 5,
+                 trend_interval: str = '1d', trend_window: int = 20):
+        """
+        interval: bar interval of the input frame.
+        """
+        self.interval = interval
+        self.entry_interval = entry_interval
+        self.entry_period = entry_period
+        self.trend_interval = trend_interval
+        self.trend_window = trend_window
+
+    def generate_signals(self, df: pd.DataFrame) -> pd.Series:
+        pyramid = BarPyramid.build(df, self.interval, (self.entry_interval, self.trend_interval))
+        return self.signals_from_pyramid(pyramid, df.index)
+
+    def signals_from_pyramid(self, pyramid: BarPyramid, index: pd.Index) -> pd.Series:
+        """
+        Signals of the finest level of a pyramid holding both timeframes, e.g.
+        one persisted by DataLoader.load_pyramid.
+        """
+        trend_close = np.asarray(pyramid.values[self.trend_interval][:, 3])
+        trend_sma = _rolling_mean(trend_close[:, None], self.trend_window)[:, 0]
+        trend_up = trend_close > trend_sma
+
+        entry_close = np.asarray(pyramid.values[self.entry_interval][:, 3])
+        entry_up = np.zeros(len(entry_close), dtype=bool)
+        entry_up[self.entry_period:] = entry_close[self.entry_period:] > entry_close[:-self.entry_period]
+
+        # Indicators are computed on the compact levels and gathered per bar
+        trend = pyramid.aligned(self.trend_interval).take(trend_up, fill=False)
+        entry = pyramid.aligned(self.entry_interval).take(entry_up, fill=False)
+        return pd.Series(np.where(trend & entry, 1.0, 0.0), index=index)
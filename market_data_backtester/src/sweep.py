@@ -0,0 +1,175 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+import pandas as pd
+from .engine import BacktestEngine
+from .results import ResultStore
+from .strategies import Strategy
+
+
+class SharedFrame:
+    """
+    Places the numeric values and the DatetimeIndex of an OHLCV DataFrame in
+    shared memory, so worker processes can map the same prices instead of
+    each receiving a pickled copy.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        values = np.ascontiguousarray(df.to_numpy(dtype=np.float64))
+        index = df.index.as_unit('ns').asi8
+
+        self._values_shm = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+        self._index_shm = shared_memory.SharedMemory(create=True, size=max(index.nbytes, 1))
+        np.ndarray(values.shape, dtype=np.float64, buffer=self._values_shm.buf)[:] = values
+        np.ndarray(index.shape, dtype=np.int64, buffer=self._index_shm.buf)[:] = index
+
+        self.spec = {
+            'values': self._values_shm.name,
+            'index': self._index_shm.name,
+            'shape': values.shape,
+            'columns': list(df.columns),
+            'tz': str(df.index.tz) if df.index.tz is not None else None,
+            'name': df.index.name,
+        }
+
+    def close(self):
+        for shm in (self._values_shm, self._index_shm):
+            shm.close()
+            shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    try:
+        # Python 3.13+: the creating process owns the segment's lifetime
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def attach_frame(spec: dict):
+    """
+    Maps a SharedFrame into the current process. Returns the shared memory
+    handles (which must be kept alive) and a DataFrame backed by them.
+    """
+    values_shm = _attach(spec['values'])
+    index_shm = _attach(spec['index'])
+    values = np.ndarray(spec['shape'], dtype=np.float64, buffer=values_shm.buf)
+    index = pd.DatetimeIndex(np.ndarray((spec['shape'][0],), dtype=np.int64, buffer=index_shm.buf).view('datetime64[ns]'),
+                             name=spec.get('name'))
+    if spec['tz'] is not None:
+        index = index.tz_localize('UTC').tz_convert(spec['tz'])
+    df = pd.DataFrame(values, index=index, columns=spec['columns'], copy=False)
+    return (values_shm, index_shm), df
+
+
+# Per-process state of sweep workers
+_worker = {}
+
+
+def _init_worker(spec: dict, train_spec: Optional[dict], initial_capital: float, result_store: Optional[ResultStore] = None):
+    _worker['handles'], _worker['df'] = attach_frame(spec)
+    if train_spec is not None:
+        _worker['train_handles'], _worker['train_df'] = attach_frame(train_spec)
+    else:
+        _worker['train_df'] = None
+    _worker['initial_capital'] = initial_capital
+    _worker['result_store'] = result_store
+
+
+def _run_point(strategy_cls: Type[Strategy], params: dict) -> dict:
+    row = dict(params)
+    try:
+        strategy = strategy_cls(**params)
+        if _worker['train_df'] is not None:
+            strategy.train(_worker['train_df'].copy())
+        engine = BacktestEngine(None, strategy, _worker['initial_capital'], result_store=_worker['result_store'])
+        # A shallow copy keeps the shared price columns and lets the engine add its own
+        results = engine.run_on_data(_worker['df'].copy(deep=False))
+        row.update({k: v for k, v in results.items() if k not in ('data', 'ticker')})
+    except Exception as e:
+        row['error'] = str(e)
+    return row
+
+
+def _run_chunk(strategy_cls: Type[Strategy], points: List[dict]) -> List[dict]:
+    return [_run_point(strategy_cls, params) for params in points]
+
+
+def parameter_grid(grid: Dict[str, list]) -> List[dict]:
+    """
+    Expands {'a': [1, 2], 'b': [3]} into [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}].
+    """
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+
+def random_search(space: Dict[str, object], n_iter: int, seed: int = 42) -> List[dict]:
+    """
+    Samples `n_iter` points from `space`. A list is sampled uniformly, a
+    (low, high) tuple is sampled as an inclusive integer range if both ends
+    are ints and as a uniform float range otherwise.
+    """
+    rng = np.random.default_rng(seed)
+    points = []
+    for _ in range(n_iter):
+        point = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                if isinstance(low, int) and isinstance(high, int):
+                    point[name] = int(rng.integers(low, high + 1))
+                else:
+                    point[name] = float(rng.uniform(low, high))
+            else:
+                point[name] = values[rng.integers(len(values))]
+        points.append(point)
+    return points
+
+
+def run_sweep(strategy_cls: Type[Strategy], df: pd.DataFrame, points: List[dict],
+              initial_capital: float = 10000.0, train_df: Optional[pd.DataFrame] = None,
+              n_workers: Optional[int] = None, rank_by: str = 'sharpe_ratio',
+              ascending: bool = False, chunksize: Optional[int] = None,
+              result_store: Optional[ResultStore] = None) -> pd.DataFrame:
+    """
+    Backtests `strategy_cls(**params)` for every params dict in `points`
+    across a process pool and returns one row of metrics per point, ranked
+    by `rank_by`. If `train_df` is given, each strategy is trained on it first.
+    Points already in `result_store` are not backtested again.
+    """
+    n_workers = n_workers or os.cpu_count() or 1
+    # Large chunks amortise the per-task IPC, several per worker keep the pool balanced
+    chunksize = chunksize or max(1, len(points) // (n_workers * 4))
+    chunks = [points[i:i + chunksize] for i in range(0, len(points), chunksize)]
+
+    shared_train = SharedFrame(train_df) if train_df is not None else None
+    try:
+        with SharedFrame(df) as shared:
+            train_spec = shared_train.spec if shared_train is not None else None
+            if n_workers == 1:
+                _init_worker(shared.spec, train_spec, initial_capital, result_store)
+                rows = [row for chunk in chunks for row in _run_chunk(strategy_cls, chunk)]
+                _worker.clear()
+            else:
+                with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker,
+                                         initargs=(shared.spec, train_spec, initial_capital, result_store)) as executor:
+                    results = executor.map(_run_chunk, itertools.repeat(strategy_cls), chunks)
+                    rows = [row for chunk_rows in results for row in chunk_rows]
+    finally:
+        if shared_train is not None:
+            shared_train.close()
+
+    table = pd.DataFrame(rows)
+    if rank_by in table.columns:
+        table = table.sort_values(rank_by, ascending=ascending, na_position='last')
+    return table.reset_index(drop=True)
@@ -0,0 +1,39 @@
+import numpy as np
+import pandas as pd
+
+
+def synthetic_ohlcv(n_bars: int, seed: int = 0, start: str = "2000-01-03", freq: str = "min",
+                    start_price: float = 100.0, drift: float = 0.0, volatility: float = 0.001) -> pd.DataFrame:
+    """
+    Deterministic OHLCV bars for benchmarks and offline runs.
+
+    Closes follow a geometric random walk; each bar opens near the previous
+    close and its high/low wrap the open and close. The same (n_bars, seed)
+    always gives the same frame, and fewer bars give a prefix of it (every
+    column is drawn from its own stream). Minute bars are the default so
+    that 10M bars still fit in the Timestamp range.
+    """
+    close_rng, open_rng, high_rng, low_rng, volume_rng = (
+        np.random.default_rng(s) for s in np.random.SeedSequence(seed).spawn(5))
+    close = start_price * np.exp(np.cumsum(close_rng.normal(drift, volatility, n_bars)))
+    open_ = np.empty(n_bars)
+    open_[:1] = start_price
+    open_[1:] = close[:-1] * (1 + open_rng.normal(0, volatility / 4, n_bars)[1:])
+    high = np.maximum(open_, close) * (1 + np.abs(high_rng.normal(0, volatility / 2, n_bars)))
+    low = np.minimum(open_, close) * (1 - np.abs(low_rng.normal(0, volatility / 2, n_bars)))
+    volume = np.round(volume_rng.lognormal(12, 0.5, n_bars))
+
+    return pd.DataFrame(
+        {'Open': open_, 'High': high, 'Low': low, 'Close': close, 'Volume': volume},
+        index=pd.date_range(start, periods=n_bars, freq=freq, name='Date'),
+    )
+
+
+def as_yfinance(df: pd.DataFrame, ticker: str = "SYN") -> pd.DataFrame:
+    """
+    Reshapes OHLCV bars like a yfinance download: an extra 'Adj Close'
+    column and (Price, Ticker) MultiIndex columns.
+    """
+    raw = df.assign(**{'Adj Close': df['Close']})[['Adj Close', 'Close', 'High', 'Low', 'Open', 'Volume']]
+    raw.columns = pd.MultiIndex.from_product([raw.columns, [ticker]], names=['Price', 'Ticker'])
+    return raw
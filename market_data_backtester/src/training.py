@@ -0,0 +1,130 @@
+"""
+Model factories, time-series cross-validated hyperparameter search and
+parallel training for MLStrategy.
+
+Searches use scikit-learn's GridSearchCV over TimeSeriesSplit folds, so
+every validation fold lies after its training rows; a one-row gap keeps the
+last training target (the next row's move) out of the validation fold.
+Candidates are evaluated in parallel with joblib, and fit_many trains
+strategies for many tickers across a process pool.
+"""
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.model_selection import GridSearchCV, TimeSeriesSplit
+
+# model type -> (default hyperparameters, search grid)
+MODELS = {
+    'rf': (
+        {'n_estimators': 100, 'max_depth': 5, 'random_state': 42},
+        {'max_depth': [3, 5, 8], 'min_samples_leaf': [1, 20]},
+    ),
+    'lr': (
+        {'random_state': 42},
+        {'C': [0.01, 0.1, 1.0, 10.0]},
+    ),
+    'sgd': (
+        {'loss': 'log_loss', 'alpha': 1e-4, 'random_state': 42},
+        {'alpha': [1e-5, 1e-4, 1e-3, 1e-2], 'penalty': ['l2', 'elasticnet']},
+    ),
+}
+# Model types that can be updated with new data instead of refitted
+ONLINE_MODELS = ('rf', 'sgd')
+
+
+def make_model(model_type: str, params: Optional[dict] = None, n_jobs: Optional[int] = None):
+    """
+    Returns an unfitted classifier with the default hyperparameters of
+    `model_type`, overridden by `params`. Random forests grow their trees
+    on `n_jobs` cores.
+    """
+    if model_type not in MODELS:
+        raise ValueError(f"Invalid model type. Use one of: {', '.join(MODELS)}.")
+    params = {**MODELS[model_type][0], **(params or {})}
+    if model_type == 'rf':
+        return RandomForestClassifier(n_jobs=n_jobs, **params)
+    if model_type == 'lr':
+        return LogisticRegression(**params)
+    return SGDClassifier(**params)
+
+
+def search(model_type: str, X: np.ndarray, y: np.ndarray, params: Optional[dict] = None,
+           grid: Optional[dict] = None, n_splits: int = 5, n_jobs: Optional[int] = -1,
+           scoring: str = 'accuracy') -> Tuple[object, dict, pd.DataFrame]:
+    """
+    Grid search over time-ordered folds of (X, y). `params` are fixed
+    hyperparameters, `grid` the candidates (default: the model type's grid).
+    Candidates x folds run on `n_jobs` cores. Returns (model refitted on all
+    of X with the best parameters, best parameters, per-candidate scores).
+    """
+    grid = {k: v for k, v in (grid or MODELS[model_type][1]).items() if k not in (params or {})}
+    cv = GridSearchCV(make_model(model_type, params, n_jobs=1), grid, scoring=scoring,
+                      cv=TimeSeriesSplit(n_splits=n_splits, gap=1), n_jobs=n_jobs, refit=True)
+    cv.fit(X, y)
+    scores = pd.DataFrame(cv.cv_results_['params'])
+    scores['mean_score'] = cv.cv_results_['mean_test_score']
+    scores['std_score'] = cv.cv_results_['std_test_score']
+    scores = scores.sort_values('mean_score', ascending=False).reset_index(drop=True)
+    return cv.best_estimator_, cv.best_params_, scores
+
+
+def partial_fit(model, X: np.ndarray, y: np.ndarray, new_trees: int = 20, max_trees: Optional[int] = None) -> bool:
+    """
+    Updates a fitted model with new rows: SGD models take a partial_fit
+    pass, random forests keep their trees and grow `new_trees` more on the
+    new rows (warm start), dropping their oldest trees beyond `max_trees`.
+    Returns False if the rows were not used: a forest is not grown on rows
+    of a single class, whose trees would never predict the other one.
+    """
+    if isinstance(model, SGDClassifier):
+        model.partial_fit(X, y, classes=np.array([0, 1]))
+    elif isinstance(model, RandomForestClassifier):
+        if len(np.unique(y)) < len(model.classes_):
+            return False
+        model.set_params(warm_start=True, n_estimators=len(model.estimators_) + new_trees)
+        model.fit(X, y)
+        if max_trees is not None and len(model.estimators_) > max_trees:
+            model.estimators_ = model.estimators_[-max_trees:]
+            model.set_params(n_estimators=max_trees)
+    else:
+        raise ValueError(f"{type(model).__name__} cannot be updated incrementally; use one of: {', '.join(ONLINE_MODELS)}")
+    return True
+
+
+def _fit_one(strategy_factory: Callable, df: pd.DataFrame):
+    strategy = strategy_factory()
+    strategy.train(df)
+    return strategy
+
+
+def fit_many(strategy_factory: Callable, frames: Dict[str, pd.DataFrame],
+             n_workers: Optional[int] = None) -> Tuple[Dict[str, object], Dict[str, str]]:
+    """
+    Trains `strategy_factory()` on each ticker's frame across a process pool.
+    Returns (ticker -> trained strategy, ticker -> error message), like
+    DataLoader.load_many. Give the strategies n_jobs=1 so that workers do
+    not compete for the same cores.
+    """
+    n_workers = min(n_workers or os.cpu_count() or 1, max(len(frames), 1))
+    strategies, failures = {}, {}
+    if n_workers == 1:
+        for ticker, df in frames.items():
+            try:
+                strategies[ticker] = _fit_one(strategy_factory, df)
+            except Exception as e:
+                failures[ticker] = str(e)
+        return strategies, failures
+
+    with ProcessPoolExecutor(max_workers=n_workers) as executor:
+        futures = {ticker: executor.submit(_fit_one, strategy_factory, df) for ticker, df in frames.items()}
+        for ticker, future in futures.items():
+            try:
+                strategies[ticker] = future.result()
+            except Exception as e:
+                failures[ticker] = str(e)
+    return strategies, failures
@@ -0,0 +1,125 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING, Callable, List, Optional, Tuple
+
+import pandas as pd
+from .engine import BacktestEngine
+from .performance import calculate_panel_metrics
+
+if TYPE_CHECKING:
+    # features imports scikit-learn; only the strategies that use it load it
+    from .features import FeatureMatrix
+
+
+def make_folds(n: int, train_size: int, test_size: int, expanding: bool = False) -> List[Tuple[int, int, int]]:
+    """
+    Returns (train_start, test_start, test_end) row positions of back-to-back
+    out-of-sample folds. Rolling windows keep `train_size` rows of training
+    data, expanding windows always train from row 0.
+    """
+    folds = []
+    test_start = train_size
+    while test_start < n:
+        test_end = min(test_start + test_size, n)
+        train_start = 0 if expanding else test_start - train_size
+        folds.append((train_start, test_start, test_end))
+        test_start = test_end
+    return folds
+
+
+def _run_fold(strategy_factory: Callable, fold: int, train_features: 'FeatureMatrix',
+              predict_features: 'FeatureMatrix', prices: pd.DataFrame, initial_capital: float) -> dict:
+    strategy = strategy_factory()
+    # The fold's test slice is the held-out data: fit on the whole training window
+    strategy.train_split = 1.0
+    strategy.fit_features(train_features)
+    signals = strategy.predict_features(predict_features).reindex(prices.index).fillna(0)
+
+    engine = BacktestEngine(None, strategy, initial_capital)
+    results = engine.run_with_signals(prices.copy(), signals)
+    data = results['data'][['Close', 'Market_Returns', 'Signal', 'Strategy_Returns']].copy()
+    data['Fold'] = fold
+
+    return {
+        'fold': fold,
+        'train_start': train_features.index[0],
+        'train_end': train_features.index[-1],
+        'test_start': data.index[0],
+        'test_end': data.index[-1],
+        'sharpe_ratio': results['sharpe_ratio'],
+        'total_return_pct': results['total_return_pct'],
+        'data': data,
+    }
+
+
+class WalkForward:
+    """
+    Walk-forward validation for strategies with build_features / fit_features /
+    predict_features (MLStrategy, LSTMStrategy).
+
+    Features are built once over the whole history and sliced per fold. Each
+    fold trains a fresh strategy on its training slice and trades the following
+    out-of-sample slice; folds run in parallel worker processes and their
+    out-of-sample returns are stitched into a single equity curve.
+    """
+
+    def __init__(self, strategy_factory: Callable, train_size: int = 756, test_size: int = 126,
+                 expanding: bool = False, initial_capital: float = 10000.0, n_workers: Optional[int] = None):
+        """
+        strategy_factory: picklable callable returning a fresh, untrained strategy.
+        train_size / test_size: fold lengths in bars (of the feature frame).
+        """
+        self.strategy_factory = strategy_factory
+        self.train_size = train_size
+        self.test_size = test_size
+        self.expanding = expanding
+        self.initial_capital = initial_capital
+        self.n_workers = n_workers
+        self.results = {}
+
+    def run(self, df: pd.DataFrame, ticker: str = ''):
+        features = self.strategy_factory().build_features(df)
+        lookback = getattr(self.strategy_factory(), 'lookback', 0)
+
+        folds = make_folds(len(features), max(self.train_size, lookback), self.test_size, self.expanding)
+        if not folds:
+            raise ValueError("Not enough history for a single walk-forward fold")
+
+        tasks = []
+        for fold, (train_start, test_start, test_end) in enumerate(folds):
+            # One extra price bar, so the last out-of-sample signal's return is
+            # counted here and folds join without gaps
+            first = df.index.get_loc(features.index[test_start])
+            last = df.index.get_loc(features.index[test_end - 1]) + 2
+            tasks.append((
+                fold,
+                features[train_start:test_start],
+                features[test_start - lookback:test_end],
+                df.iloc[first:last],
+            ))
+
+        n_workers = self.n_workers or min(len(tasks), multiprocessing.cpu_count())
+        if n_workers == 1:
+            fold_results = [_run_fold(self.strategy_factory, *task, self.initial_capital) for task in tasks]
+        else:
+            # spawn: forking after TensorFlow has been imported is not safe
+            with ProcessPoolExecutor(max_workers=n_workers, mp_context=multiprocessing.get_context('spawn')) as executor:
+                futures = [executor.submit(_run_fold, self.strategy_factory, *task, self.initial_capital) for task in tasks]
+                fold_results = [future.result() for future in futures]
+
+        data = pd.concat([result.pop('data') for result in fold_results])
+        data['Cumulative_Market_Returns'] = (1 + data['Market_Returns']).cumprod()
+        data['Cumulative_Strategy_Returns'] = (1 + data['Strategy_Returns']).cumprod()
+        data['Equity'] = self.initial_capital * data['Cumulative_Strategy_Returns']
+
+        metrics = calculate_panel_metrics(data['Strategy_Returns'], self.initial_capital).iloc[0]
+
+        self.results = {
+            'ticker': ticker,
+            **metrics.to_dict(),
+            'final_equity': data['Equity'].iloc[-1],
+            'folds': pd.DataFrame(fold_results),
+            'data': data,
+        }
+
+        return self.results
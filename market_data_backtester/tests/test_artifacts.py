@@ -0,0 +1,22 @@
+from src import training
+from src.artifacts import ArtifactStore
+from src.ml_strategies import MLStrategy
+
+
+def test_trained_models_are_reused(tmp_path, bars):
+    store = ArtifactStore(str(tmp_path))
+    MLStrategy('lr', artifact_store=store).train(bars.copy())
+    assert len(list(tmp_path.iterdir())) == 1
+
+    MLStrategy('lr', artifact_store=store).train(bars.copy())
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_model_defaults_are_part_of_the_artifact_key(tmp_path, bars, monkeypatch):
+    store = ArtifactStore(str(tmp_path))
+    MLStrategy('lr', artifact_store=store).train(bars.copy())
+
+    defaults, grid = training.MODELS['lr']
+    monkeypatch.setitem(training.MODELS, 'lr', ({**defaults, 'C': 0.5}, grid))
+    MLStrategy('lr', artifact_store=store).train(bars.copy())
+    assert len(list(tmp_path.iterdir())) == 2
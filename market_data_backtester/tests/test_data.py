@@ -0,0 +1,120 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.cache import DataCache
+from src.data import DataLoader
+from src.sources import SyntheticSource
+
+
+class RecordingSource(SyntheticSource):
+    """
+    SyntheticSource that records the ranges it was asked for.
+    """
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.requests = []
+
+    def fetch(self, ticker, start_date, end_date, interval='1d'):
+        self.requests.append((ticker, start_date, end_date))
+        return super().fetch(ticker, start_date, end_date, interval)
+
+
+def test_missing_ranges_keep_the_cache_contiguous(tmp_path):
+    cache = DataCache(str(tmp_path))
+    ts = pd.Timestamp
+    assert cache.missing_ranges('AAA', '1d', ts('2020-01-01'), ts('2020-02-01')) == [(ts('2020-01-01'), ts('2020-02-01'))]
+
+    cache.write('AAA', '1d', pd.DataFrame(), ts('2020-01-01'), ts('2020-02-01'))
+    assert cache.coverage('AAA', '1d') == (ts('2020-01-01'), ts('2020-02-01'))
+    assert cache.missing_ranges('AAA', '1d', ts('2020-01-10'), ts('2020-01-20')) == []
+    assert cache.missing_ranges('AAA', '1d', ts('2019-12-01'), ts('2020-03-01')) == [
+        (ts('2019-12-01'), ts('2020-01-01')), (ts('2020-02-01'), ts('2020-03-01'))]
+    # A request past the edge also fills the gap up to it
+    assert cache.missing_ranges('AAA', '1d', ts('2020-05-01'), ts('2020-06-01')) == [(ts('2020-02-01'), ts('2020-06-01'))]
+
+
+def test_partial_coverage_fetches_only_the_missing_ranges(tmp_path):
+    source = RecordingSource()
+    loader = DataLoader(cache_dir=str(tmp_path), source=source)
+
+    first = loader.load_data('AAA', '2020-01-01', '2020-06-01')
+    wider = loader.load_data('AAA', '2019-10-01', '2020-09-01')
+    again = loader.load_data('AAA', '2019-11-01', '2020-08-01')
+
+    assert source.requests == [
+        ('AAA', '2020-01-01', '2020-06-01'),
+        ('AAA', '2019-10-01', '2020-01-01'),
+        ('AAA', '2020-06-01', '2020-09-01'),
+    ]
+    direct = DataLoader(source=SyntheticSource()).load_data('AAA', '2019-10-01', '2020-09-01')
+    pd.testing.assert_frame_equal(wider, direct, check_freq=False)
+    pd.testing.assert_frame_equal(first, direct.loc['2020-01-01':'2020-05-31'], check_freq=False)
+    pd.testing.assert_frame_equal(again, direct.loc['2019-11-01':'2020-07-31'], check_freq=False)
+
+
+def test_offline_loader_serves_the_cache_only(tmp_path):
+    DataLoader(cache_dir=str(tmp_path), source=SyntheticSource()).load_data('AAA', '2020-01-01', '2020-06-01')
+    source = RecordingSource()
+    offline = DataLoader(cache_dir=str(tmp_path), offline=True, source=source)
+
+    df = offline.load_data('AAA', '2019-01-01', '2021-01-01')
+    assert df.index.min() >= pd.Timestamp('2020-01-01') and df.index.max() < pd.Timestamp('2020-06-01')
+    with pytest.raises(ValueError, match='No data found for BBB'):
+        offline.load_data('BBB', '2020-01-01', '2020-06-01')
+    assert source.requests == []
+
+    with pytest.raises(ValueError, match='cache_dir'):
+        DataLoader(offline=True)
+
+
+def test_interrupted_write_leaves_the_cache_intact(tmp_path, monkeypatch):
+    loader = DataLoader(cache_dir=str(tmp_path), source=SyntheticSource())
+    before = loader.load_data('AAA', '2020-01-01', '2020-06-01')
+    coverage = loader.cache.coverage('AAA', '1d')
+
+    def fail(*args, **kwargs):
+        raise OSError('disk full')
+    monkeypatch.setattr(pd.DataFrame, 'to_parquet', fail)
+    with pytest.raises(OSError):
+        loader.load_data('AAA', '2020-01-01', '2020-09-01')
+    monkeypatch.undo()
+
+    assert loader.cache.coverage('AAA', '1d') == coverage
+    pd.testing.assert_frame_equal(DataLoader(cache_dir=str(tmp_path), offline=True).load_data('AAA', '2020-01-01', '2020-06-01'), before)
+    # Completed writes leave no temporary files behind
+    loader.load_data('AAA', '2020-01-01', '2020-09-01')
+    assert not [name for name in os.listdir(tmp_path) if name.endswith('.tmp')]
+
+
+def test_todays_bars_are_fetched_live_and_never_cached(tmp_path):
+    source = RecordingSource()
+    loader = DataLoader(cache_dir=str(tmp_path), source=source)
+    today = pd.Timestamp.today().normalize()
+    start = (today - pd.Timedelta(days=30)).strftime('%Y-%m-%d')
+    end = (today + pd.Timedelta(days=7)).strftime('%Y-%m-%d')
+
+    for _ in range(2):
+        df = loader.load_data('AAA', start, end)
+        assert df.index.max() >= today
+        assert df.index.is_monotonic_increasing and df.index.is_unique
+
+    cached = loader.cache.read('AAA', '1d')
+    assert cached.index.max() < today
+    assert loader.cache.coverage('AAA', '1d')[1] == today
+    live = [request for request in source.requests if request[1] == today.strftime('%Y-%m-%d')]
+    # The complete days are fetched once, the live part on every call
+    assert len(source.requests) == 3 and len(live) == 2
+
+
+def test_normalize_leaves_the_input_unchanged():
+    columns = pd.MultiIndex.from_product([['Open', 'High', 'Low', 'Close', 'Volume'], ['AAA']])
+    raw = pd.DataFrame(np.ones((3, 5)), index=['2020-01-02', '2020-01-03', '2020-01-06'], columns=columns)
+    normalized = DataLoader.normalize(raw)
+
+    assert isinstance(normalized.index, pd.DatetimeIndex)
+    assert list(normalized.columns) == ['Open', 'High', 'Low', 'Close', 'Volume']
+    assert isinstance(raw.columns, pd.MultiIndex) and not isinstance(raw.index, pd.DatetimeIndex)
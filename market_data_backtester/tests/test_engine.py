@@ -0,0 +1,68 @@
+import numpy as np
+import pytest
+
+from src.engine import BacktestEngine
+from src.strategies import MomentumStrategy, MovingAverageCrossover, RSIStrategy
+
+METRICS = ['sharpe_ratio', 'max_drawdown', 'total_return_pct', 'volatility', 'cagr', 'win_rate',
+           'sortino_ratio', 'calmar_ratio', 'max_drawdown_duration', 'final_equity']
+
+STRATEGIES = [
+    lambda: MovingAverageCrossover(10, 30),
+    lambda: RSIStrategy(14, 30, 70),
+    lambda: MomentumStrategy(10),
+]
+STOPS = [{}, {'stop_loss': 0.03, 'take_profit': 0.06, 'trailing_stop': 0.04}]
+SIZING_AND_STOPS = [{}, {'position_size': 0.5}, {'stop_loss': 0.03}, {'take_profit': 0.06}, {'trailing_stop': 0.04},
+                    {'position_size': 0.5, 'stop_loss': 0.03, 'take_profit': 0.06, 'trailing_stop': 0.04}]
+
+
+def assert_same_metrics(actual: dict, expected: dict):
+    for name in METRICS:
+        assert actual[name] == pytest.approx(expected[name], rel=1e-9, abs=1e-12), name
+
+
+@pytest.mark.parametrize('settings', SIZING_AND_STOPS)
+@pytest.mark.parametrize('make_strategy', STRATEGIES)
+def test_event_driven_matches_vectorized(bars, make_strategy, settings):
+    vectorized = BacktestEngine(None, make_strategy(), 10000, **settings).run_on_data(bars.copy())
+    events = BacktestEngine(None, make_strategy(), 10000, **settings).run_events_on_data(bars.copy())
+
+    np.testing.assert_array_equal(events['data']['Signal'].to_numpy(), vectorized['data']['Signal'].to_numpy())
+    assert_same_metrics(events, vectorized)
+
+
+@pytest.mark.parametrize('stops', STOPS)
+@pytest.mark.parametrize('make_strategy', STRATEGIES)
+def test_chunked_run_matches_in_memory(bars, make_strategy, stops):
+    expected = BacktestEngine(None, make_strategy(), 10000, **stops).run_on_data(bars.copy())
+
+    chunks = [bars.iloc[i:i + 37] for i in range(0, len(bars), 37)]
+    chunked = BacktestEngine(None, make_strategy(), 10000, **stops).run_chunks(chunks)
+
+    assert_same_metrics(chunked, expected)
+
+
+def test_chunked_run_rejects_strategies_without_warmup(bars):
+    class Unchunked(MovingAverageCrossover):
+        warmup = None
+
+    engine = BacktestEngine(None, Unchunked(), 10000)
+    with pytest.raises(ValueError, match='chunked'):
+        engine.run_chunks([bars])
+
+
+@pytest.mark.parametrize('stops', STOPS)
+@pytest.mark.parametrize('make_strategy', STRATEGIES)
+def test_extended_run_matches_in_memory(bars, make_strategy, stops):
+    expected = BacktestEngine(None, make_strategy(), 10000, **stops).run_on_data(bars.copy())
+
+    engine = BacktestEngine(None, make_strategy(), 10000, **stops)
+    engine.run_chunks([bars.iloc[:300]])
+    checkpoint = engine.checkpoint
+    # Overlapping reloads are skipped, and the checkpoint passed in is left untouched
+    engine.extend(checkpoint, bars.iloc[250:400])
+    results = engine.extend(engine.checkpoint, bars.iloc[390:])
+
+    assert checkpoint.last_bar == bars.index[299]
+    assert_same_metrics(results, expected)
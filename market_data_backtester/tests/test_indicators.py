@@ -0,0 +1,28 @@
+import pandas as pd
+
+from src import indicators
+
+
+def test_indicators_are_memoized_by_content(bars):
+    cache = indicators.cache
+    cache.clear()
+    first = indicators.sma(bars['Close'], 20)
+    # An equal series at a different address hits the same entry
+    second = indicators.sma(bars['Close'].copy(), 20)
+    assert second is first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    with cache.disabled():
+        assert indicators.sma(bars['Close'], 20) is not first
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_indicator_cache_is_bounded_by_bytes(bars):
+    cache = indicators.IndicatorCache(max_bytes=3 * bars['Close'].nbytes)
+    for window in range(2, 8):
+        cache.get_or_compute(('sma', window), lambda: bars['Close'].rolling(window).mean())
+
+    assert len(cache) == 3
+    assert cache.nbytes == 3 * bars['Close'].nbytes
+    assert cache.evictions == 3
+    assert isinstance(cache.get_or_compute(('sma', 7), lambda: None), pd.Series)
@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from src import kernels
+
+
+@pytest.mark.parametrize('size', [1.0, 0.5, np.linspace(0.2, 1.0, 300)])
+def test_vectorized_holds_match_the_loop(bars, size):
+    rng = np.random.default_rng(3)
+    signals = rng.choice([-1.0, 0.0, 1.0], 300)
+    close = bars['Close'].to_numpy()[:300]
+    size_array = np.ascontiguousarray(np.broadcast_to(size, close.shape))
+
+    looped = kernels._simulate_positions(signals, size_array, close, close, close, close, 0.0, 0.0, 0.0,
+                                         kernels.position_state())
+    # In two calls, to carry the state over as chunked runs do
+    state = kernels.position_state()
+    first = kernels.simulate_positions(signals[:120], close[:120], size=size_array[:120], state=state)
+    second = kernels.simulate_positions(signals[120:], close[120:], size=size_array[120:], state=state)
+
+    np.testing.assert_array_equal(np.concatenate((first[0], second[0])), looped[0])
+    np.testing.assert_array_equal(np.concatenate((first[1], second[1])), looped[1])
+
+
+def test_step_position_matches_simulate_positions(bars):
+    signals = np.sign(bars['Close'].diff(5).fillna(0).to_numpy())
+    stops = {'stop_loss': 0.03, 'take_profit': 0.06, 'trailing_stop': 0.04}
+    expected = kernels.simulate_positions(signals, bars['Close'], bars['High'], bars['Low'], bars['Open'],
+                                          size=0.5, **stops)
+
+    state = kernels.position_state()
+    stepped = [kernels.step_position(state, signal, bar.Close, bar.High, bar.Low, bar.Open, size=0.5, **stops)
+               for signal, bar in zip(signals, bars.itertuples())]
+
+    np.testing.assert_array_equal([position for position, _ in stepped], expected[0])
+    np.testing.assert_array_equal([bar_return for _, bar_return in stepped], expected[1])
@@ -0,0 +1,41 @@
+import numpy as np
+import pytest
+
+tf = pytest.importorskip('tensorflow')
+
+from src.lstm_numpy import NumpyLSTM, NumpyLSTMStrategy, export_model
+
+
+def test_forward_pass_matches_keras(tmp_path):
+    tf.keras.utils.set_random_seed(0)
+    model = tf.keras.Sequential([
+        tf.keras.Input(shape=(12, 5)),
+        tf.keras.layers.LSTM(16, return_sequences=True),
+        tf.keras.layers.Dropout(0.2),
+        tf.keras.layers.LSTM(8),
+        tf.keras.layers.Dense(4, activation='relu'),
+        tf.keras.layers.Dense(1, activation='sigmoid'),
+    ])
+    X = np.random.default_rng(0).normal(size=(300, 12, 5)).astype(np.float32)
+
+    path = export_model(model, str(tmp_path / 'model.npz'))
+    expected = model.predict(X, verbose=0)
+
+    np.testing.assert_allclose(NumpyLSTM.load(path).predict(X, batch_size=64), expected, atol=1e-5)
+    np.testing.assert_allclose(NumpyLSTM.load(path, dtype=np.float64).predict(X), expected, atol=1e-5)
+
+
+def test_strategy_signals_match_lstm_strategy(bars, tmp_path):
+    from src.dl_strategies import LSTMStrategy
+
+    strategy = LSTMStrategy(time_steps=10, epochs=1, batch_size=64)
+    strategy.train(bars)
+    path = strategy.export(str(tmp_path / 'lstm.npz'))
+
+    features = strategy.build_features(bars)
+    expected = strategy.predict_features(features)
+    actual = NumpyLSTMStrategy(path).predict_features(features)
+
+    assert actual.index.equals(expected.index)
+    # Probabilities within float32 round-off of 0.5 may flip
+    assert (actual.to_numpy() == expected.to_numpy()).mean() > 0.99
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.montecarlo import METHODS, MonteCarlo, default_block_size, path_metrics, resample_indices
+from src.performance import calculate_panel_metrics
+
+
+@pytest.fixture
+def returns() -> np.ndarray:
+    return np.random.default_rng(1).normal(0.0005, 0.01, 1001)
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_same_seed_same_paths(returns, method):
+    first = MonteCarlo(500, method, seed=3).run(returns)
+    second = MonteCarlo(500, method, seed=3).run(returns)
+    other = MonteCarlo(500, method, seed=4).run(returns)
+
+    pd.testing.assert_frame_equal(first['paths'], second['paths'])
+    pd.testing.assert_frame_equal(first['summary'], second['summary'])
+    assert not first['paths']['max_drawdown'].equals(other['paths']['max_drawdown'])
+
+
+@pytest.mark.parametrize('method', METHODS)
+def test_chunked_paths_equal_unchunked(returns, method):
+    whole = MonteCarlo(500, method, seed=3, chunk_paths=500).run(returns)
+    chunked = MonteCarlo(500, method, seed=3, chunk_paths=7).run(returns)
+
+    pd.testing.assert_frame_equal(chunked['paths'], whole['paths'])
+    assert chunked['probability_of_ruin'] == whole['probability_of_ruin']
+
+
+@pytest.mark.parametrize('block_size', [1, 5, 10, 50])
+def test_block_bootstrap_draws_circular_blocks(block_size):
+    n_obs = 103
+    indices = resample_indices(n_obs, 20, np.random.default_rng(0), 'block', block_size)
+
+    assert indices.shape == (20, n_obs)
+    # Within a block each row position follows the previous one, wrapping around the end
+    steps = (np.diff(indices, axis=1) % n_obs)[:, [i for i in range(n_obs - 1) if (i + 1) % block_size]]
+    assert (steps == 1).all()
+
+
+def test_default_block_size():
+    assert default_block_size(1000) == 10
+    assert MonteCarlo(10, 'block', seed=0).run(np.full(1000, 0.001))['block_size'] == 10
+
+
+def test_shuffle_keeps_the_returns(returns):
+    indices = resample_indices(len(returns), 10, np.random.default_rng(0), 'shuffle')
+    assert (np.sort(indices, axis=1) == np.arange(len(returns))).all()
+
+    # Order-independent metrics are the same on every path
+    paths = MonteCarlo(50, 'shuffle', seed=0).run(returns)['paths']
+    assert paths['total_return_pct'].to_numpy() == pytest.approx(paths['total_return_pct'].iloc[0], rel=1e-9)
+
+
+def test_path_metrics_match_panel_metrics(returns):
+    paths = np.stack([returns, returns[::-1], returns * 2])
+    expected = calculate_panel_metrics(paths.T)
+
+    metrics = path_metrics(paths.copy())
+    for name in ('sharpe_ratio', 'cagr', 'max_drawdown', 'total_return_pct'):
+        np.testing.assert_allclose(metrics[name], expected[name].to_numpy(), rtol=1e-9, err_msg=name)
+
+
+def test_rejects_too_few_returns():
+    with pytest.raises(ValueError, match='two'):
+        MonteCarlo(10, seed=0).run([0.01, np.nan])
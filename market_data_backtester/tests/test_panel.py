@@ -0,0 +1,55 @@
+import pandas as pd
+import pytest
+
+from src.engine import BacktestEngine
+from src.ml_strategies import MLStrategy
+from src.strategies import MomentumStrategy, MovingAverageCrossover, RSIStrategy
+from src.synthetic import synthetic_ohlcv
+
+METRICS = ['sharpe_ratio', 'max_drawdown', 'total_return_pct', 'volatility', 'cagr', 'win_rate',
+           'sortino_ratio', 'calmar_ratio', 'max_drawdown_duration']
+
+
+def panel_frames():
+    return {ticker: synthetic_ohlcv(504, seed=seed, freq='B', volatility=0.015)
+            for seed, ticker in enumerate(['AAA', 'BBB', 'CCC'])}
+
+
+@pytest.mark.parametrize('strategy', [MovingAverageCrossover(10, 30), RSIStrategy(14, 30, 70), MomentumStrategy(10)])
+def test_panel_metrics_match_per_ticker_runs(strategy):
+    frames = panel_frames()
+    close = pd.DataFrame({ticker: df['Close'] for ticker, df in frames.items()})
+
+    panel = BacktestEngine(None, strategy, 10000).run_panel_on_data(close)['metrics']
+
+    for ticker, df in frames.items():
+        single = BacktestEngine(None, strategy, 10000).run_on_data(df.copy())
+        for name in METRICS:
+            assert panel.loc[ticker, name] == pytest.approx(single[name], rel=1e-9, abs=1e-12), (ticker, name)
+
+
+def test_panel_applies_position_size():
+    frames = panel_frames()
+    close = pd.DataFrame({ticker: df['Close'] for ticker, df in frames.items()})
+    strategy = MovingAverageCrossover(10, 30)
+
+    panel = BacktestEngine(None, strategy, 10000, position_size=0.5).run_panel_on_data(close)['metrics']
+
+    for ticker, df in frames.items():
+        single = BacktestEngine(None, strategy, 10000, position_size=0.5).run_on_data(df.copy())
+        for name in METRICS:
+            assert panel.loc[ticker, name] == pytest.approx(single[name], rel=1e-9, abs=1e-12), (ticker, name)
+
+
+@pytest.mark.parametrize('stop', [{'stop_loss': 0.03}, {'take_profit': 0.06}, {'trailing_stop': 0.04}])
+def test_panel_rejects_stops(stop):
+    close = pd.DataFrame({ticker: df['Close'] for ticker, df in panel_frames().items()})
+    with pytest.raises(ValueError, match='stop'):
+        BacktestEngine(None, MomentumStrategy(10), 10000, **stop).run_panel_on_data(close)
+
+
+def test_panel_rejects_strategies_without_panel_signals():
+    assert not MLStrategy().supports_panel
+    # Rejected before any data is loaded
+    with pytest.raises(ValueError, match='panel mode'):
+        BacktestEngine(None, MLStrategy(), 10000).run_panel(['AAA'], '2020-01-01', '2021-01-01')
@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.performance import (RunningMetrics, calculate_cagr, calculate_max_drawdown, calculate_panel_metrics,
+                             calculate_sharpe_ratio, calculate_total_return, calculate_volatility,
+                             calculate_win_rate)
+
+
+@pytest.fixture
+def returns(bars) -> pd.DataFrame:
+    close = pd.DataFrame({'a': bars['Close'], 'b': bars['Open'], 'c': bars['Close'].iloc[::-1].to_numpy()})
+    return close.pct_change().dropna()
+
+
+def test_panel_metrics_match_the_per_series_functions(returns):
+    metrics = calculate_panel_metrics(returns, initial_capital=10000)
+
+    for name, series in returns.items():
+        cumulative = (1 + series).cumprod()
+        row = metrics.loc[name]
+        assert row['sharpe_ratio'] == pytest.approx(calculate_sharpe_ratio(series), rel=1e-9)
+        assert row['max_drawdown'] == pytest.approx(calculate_max_drawdown(cumulative), rel=1e-9)
+        assert row['total_return_pct'] == pytest.approx(calculate_total_return(cumulative), rel=1e-9)
+        assert row['volatility'] == pytest.approx(calculate_volatility(series), rel=1e-9)
+        assert row['cagr'] == pytest.approx(calculate_cagr(cumulative), rel=1e-9)
+        assert row['win_rate'] == pytest.approx(calculate_win_rate(series), rel=1e-9)
+        assert row['final_equity'] == pytest.approx(10000 * cumulative.iloc[-1], rel=1e-9)
+
+
+def test_panel_metrics_skip_missing_returns(returns):
+    # A series that starts later only counts its own returns
+    late = returns.copy()
+    late.iloc[:100, 1] = np.nan
+    metrics = calculate_panel_metrics(late)
+
+    expected = calculate_panel_metrics(returns.iloc[100:, 1])
+    assert metrics.loc['b', 'sharpe_ratio'] == pytest.approx(expected.iloc[0]['sharpe_ratio'], rel=1e-9)
+    assert metrics.loc['b', 'total_return_pct'] == pytest.approx(expected.iloc[0]['total_return_pct'], rel=1e-9)
+
+
+def test_panel_metrics_of_empty_returns():
+    metrics = calculate_panel_metrics(pd.DataFrame(columns=['a', 'b'], dtype=float), initial_capital=10000)
+
+    assert list(metrics.index) == ['a', 'b']
+    for name in ('max_drawdown', 'max_drawdown_duration', 'total_return_pct', 'cagr', 'win_rate'):
+        assert (metrics[name] == 0).all(), name
+    assert (metrics['final_equity'] == 10000).all()
+    assert metrics['volatility'].isna().all()
+    # Same as a streaming run that never saw a return
+    empty = RunningMetrics(10000).result()
+    pd.testing.assert_series_equal(metrics.loc['a'], pd.Series(empty, name='a')[metrics.columns],
+                                   check_dtype=False)
+
+
+def test_running_metrics_match_the_panel(returns):
+    series = returns['a']
+    running = RunningMetrics(10000)
+    for start in range(0, len(series), 50):
+        running.update(series.iloc[start:start + 50])
+
+    expected = calculate_panel_metrics(series, initial_capital=10000).iloc[0]
+    for name, value in running.result().items():
+        assert value == pytest.approx(expected[name], rel=1e-9, abs=1e-12), name
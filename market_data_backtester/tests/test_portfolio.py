@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.performance import calculate_panel_metrics
+from src.portfolio import (EqualWeight, InverseVolatility, PortfolioEngine, RiskParity, RollingCovariance,
+                           VolatilityTarget, rebalance_schedule, risk_parity)
+from src.synthetic import synthetic_ohlcv
+
+
+@pytest.fixture
+def close() -> pd.DataFrame:
+    return pd.DataFrame({ticker: synthetic_ohlcv(504, seed=seed, freq='B', volatility=vol)['Close']
+                         for seed, (ticker, vol) in enumerate([('AAA', 0.01), ('BBB', 0.02), ('CCC', 0.03)])})
+
+
+def test_single_asset_is_buy_and_hold(close):
+    single = close[['AAA']]
+    results = PortfolioEngine(None, EqualWeight(), 10000, rebalance='M').run_on_data(single)
+
+    expected = 10000 * single['AAA'] / single['AAA'].iloc[0]
+    np.testing.assert_allclose(results['equity'].to_numpy(), expected.to_numpy(), rtol=1e-12)
+    metrics = calculate_panel_metrics(single['AAA'].pct_change().iloc[1:], 10000).iloc[0]
+    for name in ('sharpe_ratio', 'max_drawdown', 'total_return_pct', 'cagr', 'final_equity'):
+        assert results['metrics'][name] == pytest.approx(metrics[name], rel=1e-9), name
+    assert results['metrics']['total_costs'] == 0
+
+
+def test_rolling_covariance_matches_numpy(close):
+    returns = close.pct_change().to_numpy(copy=True)
+    returns[:40, 2] = np.nan    # listed later
+    rolling = RollingCovariance(returns, window=63)
+    zeroed = np.nan_to_num(returns)
+
+    # Small steps update the window in place, large ones rebuild it
+    for t in [1, 2, 30, 62, 63, 64, 100, 101, 300, 503]:
+        rolling.advance(t)
+        window = zeroed[max(0, t - 62):t + 1]
+        np.testing.assert_allclose(rolling.covariance(), np.cov(window, rowvar=False), rtol=1e-9, atol=1e-15)
+
+    with pytest.raises(ValueError):
+        rolling.advance(10)
+
+
+def test_risk_parity_equalizes_risk_contributions():
+    rng = np.random.default_rng(0)
+    factors = rng.normal(size=(6, 6))
+    cov = factors @ factors.T / 6 + np.diag(rng.uniform(0.1, 1.0, 6))
+
+    weights = risk_parity(cov)
+
+    assert weights.sum() == pytest.approx(1.0)
+    assert (weights > 0).all()
+    contributions = weights * (cov @ weights)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+    # Warm-started from the solution it stays there
+    np.testing.assert_allclose(risk_parity(cov, initial=weights), weights, rtol=1e-9)
+
+
+def test_risk_parity_allocator_weights(close):
+    allocator = RiskParity(window=63)
+    allocator.prepare(close)
+    weights = allocator.weights(200)
+
+    cov = allocator.covariance(200)
+    contributions = weights * (cov @ weights)
+    np.testing.assert_allclose(contributions, contributions.mean(), rtol=1e-6)
+    # The least volatile asset gets the largest weight
+    assert weights.argmax() == 0
+
+
+@pytest.mark.parametrize('max_leverage', [1.0, 2.0])
+def test_volatility_target_caps_leverage(close, max_leverage):
+    # A 100% target cannot be reached without exceeding the leverage cap
+    capped = VolatilityTarget(InverseVolatility(window=63), target=1.0, window=63, max_leverage=max_leverage)
+    capped.prepare(close)
+    for t in range(63, 504, 50):
+        assert np.abs(capped.weights(t)).sum() == pytest.approx(max_leverage)
+
+    # A low target is hit exactly, leaving the rest in cash
+    low = VolatilityTarget(InverseVolatility(window=63), target=0.05, window=63, max_leverage=max_leverage)
+    low.prepare(close)
+    for t in range(63, 504, 50):
+        weights = low.weights(t)
+        assert np.abs(weights).sum() < 1.0
+        vol = np.sqrt(weights @ low.covariance(t) @ weights * 252)
+        assert vol == pytest.approx(0.05)
+
+
+def test_rebalance_schedule(close):
+    monthly = rebalance_schedule(close.index, 'M')
+    assert monthly[0]
+    assert monthly.sum() == len(close.index.to_period('M').unique())
+    assert np.flatnonzero(rebalance_schedule(close.index, 21)).tolist() == list(range(0, 504, 21))
+    assert not rebalance_schedule(close.index, None).any()
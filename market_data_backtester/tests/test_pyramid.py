@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.pyramid import OHLCV, BarPyramid
+from src.strategies import MultiTimeframeTrend
+from src.synthetic import synthetic_ohlcv
+
+LEVELS = ('5m', '1h', '1d')
+RULES = {'5m': '5min', '1h': 'h', '1d': 'D'}
+
+
+@pytest.fixture
+def minute_bars() -> pd.DataFrame:
+    bars = synthetic_ohlcv(20000, seed=5)
+    # Gaps, like nights and weekends, so that buckets have missing bars
+    return bars[(bars.index.hour >= 9) & (bars.index.hour < 16)]
+
+
+@pytest.mark.parametrize('interval', LEVELS)
+def test_levels_match_pandas_resample(minute_bars, interval):
+    pyramid = BarPyramid.build(minute_bars, '1m', LEVELS)
+    expected = minute_bars[OHLCV].resample(RULES[interval]).agg(
+        {'Open': 'first', 'High': 'max', 'Low': 'min', 'Close': 'last', 'Volume': 'sum'}).dropna()
+
+    # Pyramids keep nanosecond timestamps, resample keeps the input's unit
+    expected = expected.set_axis(expected.index.as_unit('ns'))
+    pd.testing.assert_frame_equal(pyramid.frame(interval), expected, check_freq=False, check_names=False)
+
+
+@pytest.mark.parametrize('interval', LEVELS)
+def test_aligned_bars_are_complete_when_shown(minute_bars, interval):
+    pyramid = BarPyramid.build(minute_bars, '1m', LEVELS)
+    aligned = pyramid.aligned(interval)
+    rows = np.arange(len(aligned))[aligned.known]
+
+    # The bar shown at row i ends at or before row i...
+    assert (pyramid.last[interval][aligned.positions[aligned.known]] <= rows).all()
+    # ...and it is the latest one that does
+    following = aligned.positions[aligned.known] + 1
+    later = following < len(pyramid.last[interval])
+    assert (pyramid.last[interval][following[later]] > rows[later]).all()
+
+
+@pytest.mark.parametrize('cutoff', [1000, 2500, 4321])
+def test_aligned_view_does_not_depend_on_later_bars(minute_bars, cutoff):
+    full = BarPyramid.build(minute_bars, '1m', LEVELS)
+    prefix = BarPyramid.build(minute_bars.iloc[:cutoff], '1m', LEVELS)
+
+    # The prefix's last bucket completes at its last row; every row before it must agree
+    for interval in LEVELS:
+        for name in OHLCV:
+            np.testing.assert_array_equal(prefix.aligned(interval).column(name)[:cutoff - 1],
+                                          full.aligned(interval).column(name)[:cutoff - 1])
+
+    strategy = MultiTimeframeTrend(trend_window=2, entry_period=2)
+    signals = strategy.generate_signals(minute_bars)
+    prefix_signals = strategy.generate_signals(minute_bars.iloc[:cutoff])
+    np.testing.assert_array_equal(prefix_signals.to_numpy()[:cutoff - 1], signals.to_numpy()[:cutoff - 1])
+
+
+def test_saved_pyramid_reloads_identically(minute_bars, tmp_path):
+    pyramid = BarPyramid.build(minute_bars, '1m', LEVELS)
+    pyramid.save(str(tmp_path), key='k')
+    loaded = BarPyramid.load(str(tmp_path))
+
+    assert BarPyramid.stored_key(str(tmp_path)) == 'k'
+    for interval in pyramid.intervals:
+        pd.testing.assert_frame_equal(loaded.frame(interval), pyramid.frame(interval))
+        np.testing.assert_array_equal(loaded.positions(interval), pyramid.positions(interval))
@@ -0,0 +1,183 @@
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from src.data import DataLoader
+from src.engine import BacktestEngine
+from src.lru import BoundedCache
+from src.server import BacktestService, make_server
+from src.sources import SyntheticSource
+from src.strategies import MovingAverageCrossover
+
+JOB = {'strategy': 'sma', 'params': {'short_window': 10, 'long_window': 30},
+       'ticker': 'AAA', 'start': '2020-01-01', 'end': '2022-01-01'}
+
+
+def test_bounded_cache_hits_and_evicts_by_size():
+    cache = BoundedCache(max_bytes=30, sizeof=len)
+    computed = []
+
+    def compute(value):
+        computed.append(value)
+        return value
+
+    assert cache.get_or_compute('a', lambda: compute('a' * 10)) == 'a' * 10
+    assert cache.get_or_compute('a', lambda: compute('never')) == 'a' * 10
+    cache.get_or_compute('b', lambda: compute('b' * 10))
+    # 'a' was used last, so 'b' is the oldest entry when 'c' overflows the budget
+    cache.get_or_compute('a', lambda: compute('never'))
+    cache.get_or_compute('c', lambda: compute('c' * 15))
+
+    assert computed == ['a' * 10, 'b' * 10, 'c' * 15]
+    assert cache.stats() == {'entries': 2, 'bytes': 25, 'hits': 2, 'misses': 3, 'evictions': 1}
+    cache.get_or_compute('b', lambda: compute('b' * 10))
+    assert computed[-1] == 'b' * 10
+
+
+def test_bounded_cache_keeps_an_oversized_newest_entry():
+    cache = BoundedCache(max_bytes=10, sizeof=len)
+    cache.get_or_compute('a', lambda: 'a' * 5)
+    cache.get_or_compute('b', lambda: 'b' * 50)
+    assert len(cache) == 1
+    assert cache.stats()['bytes'] == 50
+
+
+def test_bounded_cache_computes_concurrent_misses_once():
+    cache = BoundedCache(max_items=4)
+    release = threading.Event()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        release.wait(5)
+        return 42
+
+    threads = [threading.Thread(target=lambda: cache.get_or_compute('key', compute)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert cache.stats()['misses'] == 1
+    assert cache.stats()['hits'] == 7
+
+
+def test_bounded_cache_does_not_cache_failures():
+    cache = BoundedCache()
+    with pytest.raises(ZeroDivisionError):
+        cache.get_or_compute('key', lambda: 1 / 0)
+    assert cache.get_or_compute('key', lambda: 1) == 1
+
+
+@pytest.fixture
+def service():
+    source = SyntheticSource()
+    return BacktestService(DataLoader(source=source))
+
+
+def test_service_matches_the_engine(service):
+    results = service.run(dict(JOB, include_equity=True))
+
+    df = service.loader.load_data('AAA', '2020-01-01', '2022-01-01')
+    expected = BacktestEngine(None, MovingAverageCrossover(10, 30), 10000).run_on_data(df)
+    for name in ('sharpe_ratio', 'max_drawdown', 'total_return_pct', 'final_equity'):
+        assert results[name] == pytest.approx(expected[name], rel=1e-12), name
+    assert results['strategy'] == 'sma'
+    assert results['equity']['values'] == pytest.approx(expected['data']['Equity'].tolist(), rel=1e-12)
+
+
+def test_service_reuses_loaded_frames(service):
+    service.run(JOB)
+    calls = service.loader.source.calls
+    service.run(dict(JOB, params={'short_window': 5, 'long_window': 20}))
+
+    assert service.loader.source.calls == calls
+    stats = service.stats()
+    assert stats['jobs'] == 2
+    assert stats['frames']['hits'] == 1
+    assert stats['frames']['misses'] == 1
+
+
+def test_service_rejects_jobs_without_strategy(service):
+    with pytest.raises(ValueError, match='strategy'):
+        service.run({'ticker': 'AAA'})
+
+
+def _serve(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return thread
+
+
+def _request(connection, method, path, body=None):
+    connection.request(method, path, body=None if body is None else json.dumps(body),
+                       headers={'Content-Type': 'application/json'})
+    response = connection.getresponse()
+    return response.status, json.loads(response.read())
+
+
+@pytest.fixture
+def http_server(service):
+    server = make_server(service, port=0)
+    _serve(server)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_http_round_trip(http_server):
+    connection = http.client.HTTPConnection('127.0.0.1', http_server.server_port, timeout=30)
+
+    status, results = _request(connection, 'POST', '/backtest', JOB)
+    assert status == 200
+    assert results['ticker'] == 'AAA' and 'sharpe_ratio' in results
+
+    status, stats = _request(connection, 'GET', '/stats')
+    assert status == 200
+    assert stats['jobs'] == 1
+
+
+def test_http_errors(http_server):
+    connection = http.client.HTTPConnection('127.0.0.1', http_server.server_port, timeout=30)
+
+    status, body = _request(connection, 'POST', '/backtest', {'ticker': 'AAA'})
+    assert status == 400
+    assert 'strategy' in body['error']
+
+    status, body = _request(connection, 'POST', '/backtest', dict(JOB, strategy='nope'))
+    assert status == 400
+
+    status, body = _request(connection, 'POST', '/backtest', dict(JOB, ticker='NODATA', start='2030-01-01', end='2030-01-01'))
+    assert status == 400
+    assert 'No data' in body['error']
+
+    assert _request(connection, 'GET', '/nope')[0] == 404
+    assert _request(connection, 'POST', '/nope', {})[0] == 404
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    def __init__(self, path: str):
+        super().__init__('localhost', timeout=30)
+        self.path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.connect(self.path)
+
+
+def test_unix_socket_round_trip(service, tmp_path):
+    path = str(tmp_path / 'backtest.sock')
+    server = make_server(service, socket_path=path)
+    _serve(server)
+    try:
+        status, results = _request(UnixHTTPConnection(path), 'POST', '/backtest', JOB)
+        assert status == 200
+        assert results['ticker'] == 'AAA'
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,90 @@
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+import src.data
+from src.data import DataLoader
+from src.sources import RateLimiter, SyntheticSource
+
+
+def test_overlapping_synthetic_fetches_agree():
+    source = SyntheticSource(seed=3)
+    wide = DataLoader.normalize(source.fetch('AAA', '2019-01-01', '2021-01-01'))
+    narrow = DataLoader.normalize(source.fetch('AAA', '2020-03-01', '2020-06-01'))
+
+    pd.testing.assert_frame_equal(narrow, wide.loc['2020-03-01':'2020-05-31'], check_freq=False)
+    assert not narrow.equals(DataLoader.normalize(SyntheticSource(seed=4).fetch('AAA', '2020-03-01', '2020-06-01')))
+
+
+def test_failed_fetches_are_retried_with_backoff(monkeypatch):
+    waits = []
+    monkeypatch.setattr(src.data.time, 'sleep', waits.append)
+    source = SyntheticSource(failures={'AAA': 3})
+    loader = DataLoader(source=source, retries=3, backoff=0.5)
+
+    df = loader.load_data('AAA', '2020-01-01', '2020-03-01')
+
+    assert not df.empty and source.calls == 4
+    # Exponential backoff with +-50% jitter
+    assert len(waits) == 3
+    for attempt, wait in enumerate(waits):
+        assert 0.5 * 2 ** attempt * 0.5 <= wait <= 0.5 * 2 ** attempt * 1.5
+
+
+def test_load_many_reports_failures_per_ticker(monkeypatch):
+    monkeypatch.setattr(src.data.time, 'sleep', lambda seconds: None)
+    source = SyntheticSource(failures={'BAD': 10, 'FLAKY': 1}, missing=['GONE'])
+    loader = DataLoader(source=source, retries=2)
+
+    frames, failures = loader.load_many(['AAA', 'BAD', 'GONE', 'FLAKY', 'AAA', 'BBB'], '2020-01-01', '2020-03-01', progress=False)
+
+    assert list(frames) == ['AAA', 'FLAKY', 'BBB']
+    assert set(failures) == {'BAD', 'GONE'}
+    assert failures['BAD'].startswith('ConnectionError')
+    assert failures['GONE'] == 'No data found for GONE'
+    # Retries stop after `retries`; duplicates are fetched once
+    assert source.calls == 1 + 3 + 1 + 2 + 1
+
+
+def test_load_many_fetches_concurrently():
+    source = SyntheticSource(latency=0.2)
+    loader = DataLoader(source=source, max_workers=8)
+
+    started = time.perf_counter()
+    frames, failures = loader.load_many([f'T{i}' for i in range(8)], '2020-01-01', '2020-03-01', progress=False)
+
+    assert len(frames) == 8 and not failures
+    assert time.perf_counter() - started < 0.2 * 8 / 2
+
+
+def test_rate_limiter_bounds_the_request_rate():
+    limiter = RateLimiter(rate=50, burst=5)
+    started = time.perf_counter()
+    threads = [threading.Thread(target=lambda: [limiter.acquire() for _ in range(6)]) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    # 30 requests: a burst of 5, then 25 at 50 per second
+    assert time.perf_counter() - started >= 25 / 50 * 0.95
+
+
+def test_source_rate_limit_applies_across_load_many_threads():
+    loader = DataLoader(source=SyntheticSource(rate_limit=40, burst=1), max_workers=8)
+
+    started = time.perf_counter()
+    frames, _ = loader.load_many([f'T{i}' for i in range(9)], '2020-01-01', '2020-02-01', progress=False)
+
+    assert len(frames) == 9
+    assert time.perf_counter() - started >= 8 / 40 * 0.95
+
+
+def test_unlimited_rate_limiter_never_waits():
+    limiter = RateLimiter(rate=None)
+    started = time.perf_counter()
+    for _ in range(10000):
+        limiter.acquire()
+    assert time.perf_counter() - started < 0.5
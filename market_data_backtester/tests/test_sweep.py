@@ -0,0 +1,72 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.engine import BacktestEngine
+from src.strategies import MovingAverageCrossover
+from src.sweep import SharedFrame, attach_frame, parameter_grid, random_search, run_sweep
+
+METRICS = ['sharpe_ratio', 'max_drawdown', 'total_return_pct', 'final_equity']
+GRID = {'short_window': [5, 10, 20], 'long_window': [30, 60]}
+
+
+@pytest.mark.parametrize('tz', [None, 'America/New_York'])
+def test_shared_frame_round_trip(bars, tz):
+    if tz is not None:
+        bars = bars.tz_localize('UTC').tz_convert(tz)
+    with SharedFrame(bars) as shared:
+        handles, df = attach_frame(shared.spec)
+        # The index comes back in nanoseconds
+        pd.testing.assert_frame_equal(df, bars.set_axis(bars.index.as_unit('ns')), check_freq=False)
+        # Attached frames map the shared segment instead of copying it
+        assert np.shares_memory(df.to_numpy(), np.ndarray(shared.spec['shape'], buffer=handles[0].buf))
+        del df
+        for handle in handles:
+            handle.close()
+        name = shared.spec['values']
+
+    # Closing the SharedFrame unlinks the segments
+    with pytest.raises(FileNotFoundError):
+        attach_frame({**shared.spec, 'values': name})
+
+
+def test_parameter_grid_and_random_search():
+    assert parameter_grid({'a': [1, 2], 'b': [3]}) == [{'a': 1, 'b': 3}, {'a': 2, 'b': 3}]
+    points = random_search({'a': (1, 3), 'b': (0.0, 1.0), 'c': ['x', 'y']}, 50, seed=1)
+    assert points == random_search({'a': (1, 3), 'b': (0.0, 1.0), 'c': ['x', 'y']}, 50, seed=1)
+    assert {p['a'] for p in points} == {1, 2, 3}
+    assert all(0.0 <= p['b'] <= 1.0 and p['c'] in ('x', 'y') for p in points)
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_sweep_matches_serial_runs(bars, n_workers):
+    points = parameter_grid(GRID)
+    table = run_sweep(MovingAverageCrossover, bars, points, n_workers=n_workers, chunksize=2)
+
+    assert len(table) == len(points)
+    for point in points:
+        row = table[(table['short_window'] == point['short_window']) & (table['long_window'] == point['long_window'])].iloc[0]
+        expected = BacktestEngine(None, MovingAverageCrossover(**point), 10000).run_on_data(bars.copy())
+        for name in METRICS:
+            assert row[name] == pytest.approx(expected[name], rel=1e-12), (point, name)
+
+
+def test_sweep_ranks_rows(bars):
+    points = parameter_grid(GRID)
+    descending = run_sweep(MovingAverageCrossover, bars, points, n_workers=1)
+    ascending = run_sweep(MovingAverageCrossover, bars, points, n_workers=1, rank_by='max_drawdown', ascending=True)
+
+    assert descending['sharpe_ratio'].is_monotonic_decreasing
+    assert ascending['max_drawdown'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize('n_workers', [1, 2])
+def test_failing_points_become_error_rows(bars, n_workers):
+    points = [{'short_window': 10, 'long_window': 30}, {'short_window': 10, 'window': 30}]
+    table = run_sweep(MovingAverageCrossover, bars, points, n_workers=n_workers)
+
+    assert len(table) == 2
+    # Ranked rows come first, the failed point last with its error message
+    assert table['error'].isna().iloc[0]
+    assert 'window' in table['error'].iloc[1]
+    assert np.isnan(table['sharpe_ratio'].iloc[1])
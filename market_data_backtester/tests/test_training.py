@@ -0,0 +1,93 @@
+import numpy as np
+import pytest
+
+from src import training
+from src.ml_strategies import MLStrategy
+
+
+@pytest.fixture
+def xy():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(600, 4))
+    y = (X[:, 0] + rng.normal(scale=0.5, size=600) > 0).astype(int)
+    return X, y
+
+
+def test_search_folds_leave_a_gap_before_validation(xy, monkeypatch):
+    folds = []
+
+    class RecordingSearch(training.GridSearchCV):
+        def fit(self, X, y):
+            folds.extend(self.cv.split(X))
+            return super().fit(X, y)
+
+    monkeypatch.setattr(training, 'GridSearchCV', RecordingSearch)
+    X, y = xy
+    model, best, scores = training.search('lr', X, y, n_splits=4, n_jobs=1)
+
+    assert len(folds) == 4
+    for train, test in folds:
+        # y[t] is the move to row t + 1: the last training target must not be a validation row
+        assert train.max() + 1 < test.min()
+    assert best['C'] in training.MODELS['lr'][1]['C']
+    assert len(scores) == len(training.MODELS['lr'][1]['C'])
+    assert scores['mean_score'].is_monotonic_decreasing
+
+
+def test_sgd_partial_fit_updates_the_weights(xy):
+    X, y = xy
+    model = training.make_model('sgd').fit(X[:300], y[:300])
+    before = model.coef_.copy()
+
+    assert training.partial_fit(model, X[300:], y[300:])
+    assert not np.array_equal(model.coef_, before)
+
+
+def test_forest_partial_fit_adds_trees_up_to_the_cap(xy):
+    X, y = xy
+    model = training.make_model('rf', {'n_estimators': 30}).fit(X[:300], y[:300])
+    original = list(model.estimators_)
+
+    assert training.partial_fit(model, X[300:450], y[300:450], new_trees=10)
+    assert len(model.estimators_) == 40
+    assert model.estimators_[:30] == original
+
+    # Beyond the cap the oldest trees are dropped
+    assert training.partial_fit(model, X[450:], y[450:], new_trees=10, max_trees=45)
+    assert len(model.estimators_) == 45
+    assert model.n_estimators == 45
+    assert model.estimators_[:25] == original[5:]
+    model.predict(X[:10])
+
+
+def test_forest_skips_single_class_rows(xy):
+    X, y = xy
+    model = training.make_model('rf', {'n_estimators': 10}).fit(X, y)
+    ones = y == 1
+
+    assert not training.partial_fit(model, X[ones], y[ones])
+    assert len(model.estimators_) == 10
+
+
+def test_batch_models_cannot_be_updated(xy):
+    X, y = xy
+    model = training.make_model('lr').fit(X, y)
+    with pytest.raises(ValueError, match='incrementally'):
+        training.partial_fit(model, X, y)
+
+
+def test_strategy_update_uses_only_new_bars(bars):
+    strategy = MLStrategy('rf', model_params={'n_estimators': 20}, new_trees=5, max_trees=28)
+    strategy.train(bars.iloc[:300].copy())
+    trained_through = strategy.trained_through
+
+    strategy.update(bars.iloc[200:400].copy())
+    assert len(strategy.model.estimators_) == 25
+    assert strategy.trained_through > trained_through
+
+    # Bars it has already learned from are not used again
+    strategy.update(bars.iloc[200:400].copy())
+    assert len(strategy.model.estimators_) == 25
+
+    strategy.update(bars.copy())
+    assert len(strategy.model.estimators_) == 28